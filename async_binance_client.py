@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+import logging
+from urllib.parse import urlencode
+import aiohttp
+from config import Config
+from rate_limiter import get_rate_limiter
+from http_tape import aiohttp_request
+from binance_client import build_order_params, build_stop_loss_params
+from symbol_rules import SymbolRules, SymbolRulesBook
+from lazy_imports import LazyModule
+
+logger = logging.getLogger(__name__)
+
+# Seules les exceptions de python-binance sont utilisées: import à la première erreur
+binance_exceptions = LazyModule("binance.exceptions")
+
+
+class AsyncBinanceREST:
+    """Endpoints REST Binance bruts en asyncio, session aiohttp keep-alive partagée
+
+    Les méthodes reprennent les noms/paramètres de python-binance `Client`.
+    """
+
+    def __init__(self, api_key: str = None, api_secret: str = None, base_url: str = None):
+        self.api_key = api_key if api_key is not None else Config.BINANCE_API_KEY
+        self.api_secret = api_secret if api_secret is not None else Config.BINANCE_API_SECRET
+        self.base_url = (base_url or Config.BINANCE_BASE_URL).rstrip('/')
+        self._session = None
+        # Dernière réponse HTTP (headers X-MBX-USED-WEIGHT-1M lus par le rate limiter)
+        self.response = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=Config.EXCHANGE_POOL_SIZE,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=Config.EXCHANGE_TIMEOUT_SECONDS),
+                headers={'X-MBX-APIKEY': self.api_key or ''}
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _request(self, method: str, path: str, params: dict = None, signed: bool = False):
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        if signed:
+            params['timestamp'] = int(time.time() * 1000)
+            query = urlencode(params)
+            signature = hmac.new(
+                (self.api_secret or '').encode(), query.encode(), hashlib.sha256
+            ).hexdigest()
+            query = f"{query}&signature={signature}"
+        else:
+            query = urlencode(params)
+
+        url = f"{self.base_url}{path}"
+        if query:
+            url = f"{url}?{query}"
+
+        session = await self._get_session()
+        response = await aiohttp_request(session, method, url)
+        self.response = response
+        if response.status >= 400:
+            raise binance_exceptions.BinanceAPIException(response, response.status, response.text)
+        return response.json()
+
+    async def ping(self):
+        return await self._request('GET', '/api/v3/ping')
+
+    async def get_exchange_info(self, **params):
+        return await self._request('GET', '/api/v3/exchangeInfo', params)
+
+    async def get_symbol_info(self, symbol: str):
+        info = await self.get_exchange_info(symbol=symbol)
+        return next((s for s in info['symbols'] if s['symbol'] == symbol), None)
+
+    async def get_account(self, **params):
+        return await self._request('GET', '/api/v3/account', params, signed=True)
+
+    async def get_klines(self, **params):
+        return await self._request('GET', '/api/v3/klines', params)
+
+    async def get_symbol_ticker(self, **params):
+        return await self._request('GET', '/api/v3/ticker/price', params)
+
+    async def get_ticker(self, **params):
+        return await self._request('GET', '/api/v3/ticker/24hr', params)
+
+    async def create_order(self, **params):
+        return await self._request('POST', '/api/v3/order', params, signed=True)
+
+    async def get_open_orders(self, **params):
+        return await self._request('GET', '/api/v3/openOrders', params, signed=True)
+
+    async def cancel_order(self, **params):
+        return await self._request('DELETE', '/api/v3/order', params, signed=True)
+
+    async def create_oco_order(self, **params):
+        return await self._request('POST', '/api/v3/order/oco', params, signed=True)
+
+    async def cancel_replace_order(self, **params):
+        return await self._request('POST', '/api/v3/order/cancelReplace', params, signed=True)
+
+    async def get_order(self, **params):
+        return await self._request('GET', '/api/v3/order', params, signed=True)
+
+    async def stream_get_listen_key(self):
+        result = await self._request('POST', '/api/v3/userDataStream')
+        return result['listenKey']
+
+    async def stream_keepalive(self, listenKey: str):
+        return await self._request('PUT', '/api/v3/userDataStream', {'listenKey': listenKey})
+
+
+class AsyncBinanceClient:
+    """Équivalent asyncio de BinanceClient (même surface, mêmes retours en cas d'erreur)"""
+
+    def __init__(self, rest: AsyncBinanceREST = None):
+        self.rest = rest or AsyncBinanceREST()
+        self.rate_limiter = get_rate_limiter()
+        self.symbol_rules = SymbolRulesBook()
+
+    async def close(self):
+        await self.rest.close()
+
+    async def _call(self, method: str, **params):
+        """Appel REST via le rate limiter (poids + retry)"""
+        return await self.rate_limiter.call_async(
+            method, getattr(self.rest, method), self._last_response_headers, **params
+        )
+
+    def _last_response_headers(self):
+        return getattr(self.rest.response, 'headers', None)
+
+    async def load_symbol_rules(self):
+        """Règles de tous les symboles depuis un seul exchangeInfo"""
+        return self.symbol_rules.load(await self._call('get_exchange_info'))
+
+    async def get_symbol_rules(self, symbol: str) -> SymbolRules:
+        """Règles précompilées (exchangeInfo complet au premier appel)"""
+        if not self.symbol_rules.loaded_at:
+            await self.load_symbol_rules()
+        try:
+            return self.symbol_rules.get(symbol)
+        except KeyError:
+            # Symbole listé depuis le dernier chargement
+            info = await self._call('get_symbol_info', symbol=symbol)
+            if not info:
+                raise
+            return self.symbol_rules.add(info)
+
+    async def adjust_quantity(self, symbol: str, quantity: float):
+        """Ajuste quantité selon rules Binance"""
+        return (await self.get_symbol_rules(symbol)).adjust_quantity(quantity)
+
+    async def get_account_balance(self):
+        """Balance USDT"""
+        try:
+            account = await self._call('get_account')
+            usdt = next((float(b['free']) for b in account['balances'] if b['asset'] == 'USDT'), 0.0)
+            logger.info(f"Balance USDT: {usdt}")
+            return usdt
+        except (binance_exceptions.BinanceAPIException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erreur balance: {e}")
+            return 0.0
+
+    async def get_klines(self, symbol: str, interval: str, limit: int = 100):
+        """Klines"""
+        try:
+            return await self._call('get_klines', symbol=symbol, interval=interval, limit=limit)
+        except (binance_exceptions.BinanceAPIException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erreur klines: {e}")
+            return []
+
+    async def get_current_price(self, symbol: str):
+        """Prix actuel"""
+        try:
+            ticker = await self._call('get_symbol_ticker', symbol=symbol)
+            return float(ticker['price'])
+        except (binance_exceptions.BinanceAPIException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erreur prix: {e}")
+            return 0.0
+
+    async def place_order(self, symbol: str, side: str, quantity: float, price: float = None):
+        """Place ordre avec checks"""
+        try:
+            rules = await self.get_symbol_rules(symbol)
+            current_price = price or await self.get_current_price(symbol)
+
+            params = build_order_params(rules, symbol, side, quantity, current_price, price)
+            order = await self._call('create_order', **params)
+
+            logger.info(f"✅ Ordre #{order['orderId']} placé")
+            return order
+
+        except (binance_exceptions.BinanceAPIException, aiohttp.ClientError, asyncio.TimeoutError, KeyError) as e:
+            logger.error(f"❌ Erreur ordre: {e}")
+            return None
+
+    async def place_stop_loss(self, symbol: str, quantity: float, stop_price: float):
+        """Stop loss"""
+        try:
+            rules = await self.get_symbol_rules(symbol)
+            params = build_stop_loss_params(rules, symbol, quantity, stop_price)
+            order = await self._call('create_order', **params)
+            logger.info(f"✅ Stop loss: {order}")
+            return order
+        except (binance_exceptions.BinanceAPIException, aiohttp.ClientError, asyncio.TimeoutError, KeyError) as e:
+            logger.error(f"❌ Erreur stop: {e}")
+            return None
+
+    async def get_open_orders(self, symbol: str = None):
+        """Ordres ouverts (None si erreur: à distinguer d'une liste vide)"""
+        try:
+            return await self._call('get_open_orders', symbol=symbol)
+        except (binance_exceptions.BinanceAPIException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erreur ordres: {e}")
+            return None
+
+    async def cancel_order(self, symbol: str, order_id: int):
+        """Annule ordre"""
+        try:
+            result = await self._call('cancel_order', symbol=symbol, orderId=order_id)
+            logger.info(f"Annulé: {result}")
+            return result
+        except (binance_exceptions.BinanceAPIException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erreur annulation: {e}")
+            return None
+
+
+class AsyncClientBridge:
+    """Expose AsyncBinanceREST en synchrone (API python-binance) via une boucle asyncio dédiée
+
+    Permet à BinanceClient et au cycle multi-thread de partager le pool keep-alive.
+    """
+
+    def __init__(self, rest: AsyncBinanceREST = None):
+        self.rest = rest or AsyncBinanceREST()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="binance-async", daemon=True)
+        self._thread.start()
+
+    def run(self, coro):
+        """Exécute une coroutine sur la boucle du bridge et attend le résultat"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def close(self):
+        self.run(self.rest.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def __getattr__(self, name):
+        method = getattr(self.rest, name)
+        if not asyncio.iscoroutinefunction(method):
+            return method
+
+        def call(*args, **kwargs):
+            try:
+                return self.run(method(*args, **kwargs))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Même contrat que python-binance: les appelants n'attrapent que BinanceAPIException
+                raise binance_exceptions.BinanceAPIException(None, 0, json.dumps({'code': -1, 'msg': str(e)}))
+        return call
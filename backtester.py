@@ -0,0 +1,375 @@
+import argparse
+import heapq
+import json
+import time
+import logging
+from dataclasses import dataclass, asdict
+import numpy as np
+from config import Config
+from indicator_engine import indicator_series
+from kline_store import KlineStore
+from llm_pipeline import rule_based_signals
+from market_analyzer import (
+    classify_trend, classify_timeframe, alignment_score, recommendation_from_score, tp_sl_pct
+)
+from models import StrategyParams
+from position_manager import risk_fraction
+from strategy_optimizer import trade_scores, load_strategy_params
+
+logger = logging.getLogger(__name__)
+
+# Timeframes rejoués: signal (1h) + multi-TF / tendance (4h, 1d)
+INTERVALS = ("1h", "4h", "1d")
+
+# Taille minimale d'un ordre (même seuil que le bot live)
+MIN_POSITION_USD = 10
+
+# Fenêtre initiale de recherche de sortie (doublée tant qu'aucun événement)
+SCAN_BARS = 256
+
+INTERVAL_MS = {"1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000}
+
+
+@dataclass
+class BacktestTrade:
+    symbol: str
+    entry_time: int
+    exit_time: int
+    entry_price: float
+    exit_price: float
+    quantity: float
+    cost: float
+    pnl: float
+    reason: str
+    confidence: float
+    market_trend: str
+    pyramids: int
+
+
+def _aligned(source_close_time, target_close_time):
+    """Index de la dernière bougie source clôturée à chaque close_time cible (-1 si aucune)"""
+    return np.searchsorted(source_close_time, target_close_time, side='right') - 1
+
+
+def _take(values, idx):
+    """values[idx] avec NaN là où idx < 0"""
+    out = np.asarray(values, dtype=np.float64)[np.maximum(idx, 0)]
+    return np.where(idx >= 0, out, np.nan)
+
+
+def prepare_symbol(data: dict, signal_fn=rule_based_signals, sentiment_label: str = "NEUTRAL") -> dict:
+    """Signaux du pipeline PRO sur toute la série 1h, en opérations vectorisées
+
+    data: {interval: colonnes klines clôturées}. Seules les bougies 4h/1d déjà
+    clôturées à la clôture de chaque bougie 1h sont utilisées (pas de look-ahead).
+    """
+    h1_cols = data["1h"]
+    ind = {interval: indicator_series(cols) for interval, cols in data.items()}
+    close_time = np.asarray(h1_cols['close_time'])
+
+    idx_d = _aligned(data["1d"]['close_time'], close_time)
+    idx_h4 = _aligned(data["4h"]['close_time'], close_time)
+
+    def tf_trend(series: dict, idx=None):
+        pick = (lambda v: v) if idx is None else (lambda v: _take(v, idx))
+        return classify_timeframe(
+            pick(series['ema_20']), pick(series['ema_50']),
+            pick(series['macd']), pick(series['macd_signal']), pick(series['rsi'])
+        )
+
+    market_trend = classify_trend(_take(ind["1d"]['ema_50'], idx_d), _take(ind["1d"]['ema_200'], idx_d))
+    score = alignment_score(tf_trend(ind["1d"], idx_d), tf_trend(ind["4h"], idx_h4), tf_trend(ind["1h"]))
+    recommendation = recommendation_from_score(score)
+
+    actions, confidence = signal_fn(ind["1h"])
+
+    close = np.asarray(h1_cols['close'], dtype=np.float64)
+    atr_h4 = _take(ind["4h"]['atr'], idx_h4)
+    # TP/SL d'une entrée à la clôture de chaque bougie
+    with np.errstate(invalid='ignore'):
+        tp_pct, sl_pct = tp_sl_pct(atr_h4 / close * 100)
+
+    return {
+        'open_time': np.asarray(h1_cols['open_time']),
+        'close_time': close_time,
+        'open': np.asarray(h1_cols['open'], dtype=np.float64),
+        'high': np.asarray(h1_cols['high'], dtype=np.float64),
+        'low': np.asarray(h1_cols['low'], dtype=np.float64),
+        'close': close,
+        'atr_h4': atr_h4,
+        'take_profit': close * (1 + tp_pct),
+        'stop_loss': close * (1 - sl_pct),
+        'market_trend': market_trend,
+        'recommendation': recommendation,
+        'action': actions,
+        'confidence': confidence,
+        'sentiment': sentiment_label,
+        'valid': (idx_d >= 0) & (idx_h4 >= 0) & ~np.isnan(atr_h4)
+    }
+
+
+def _dynamic_tp_sl(entry: float, atr: float):
+    """TP/SL absolus comme MarketAnalyzer.calculate_dynamic_tp_sl (ATR 4h / entrée)"""
+    tp, sl = tp_sl_pct(atr / entry * 100)
+    return entry * (1 + float(tp)), entry * (1 - float(sl))
+
+
+def _first(mask) -> int:
+    hits = np.flatnonzero(mask)
+    return int(hits[0]) if len(hits) else -1
+
+
+def simulate_trade(sym: dict, i0: int, size_usd: float, fee: float, params: StrategyParams, n: int = None) -> dict:
+    """Chemin d'une position ouverte à la clôture de la bougie i0 (clôturée au plus tard à la bougie n-1)
+
+    Segments entre événements de pyramiding; dans chaque segment, trailing stop
+    (max cumulé), touches SL/TP et déclencheur de pyramide sont vectorisés.
+    Le stop calculé à la clôture d'une bougie est en vigueur dès la suivante.
+    """
+    high, low, close, opens = sym['high'], sym['low'], sym['close'], sym['open']
+    n = len(close) if n is None else n
+    trail_trigger = 1 + params.trailing_trigger_pct / 100
+    trail_keep = 1 - params.trailing_distance_pct / 100
+    pyramid_trigger = 1 + params.pyramid_trigger_pct / 100
+    pyramid_sizes = params.pyramid_sizes
+
+    entry = close[i0]
+    quantity = original_quantity = size_usd / entry
+    cost = size_usd * (1 + fee)
+    take_profit, stop_loss = sym['take_profit'][i0], sym['stop_loss'][i0]
+    pyramids = 0
+    start = i0 + 1
+    window = SCAN_BARS
+
+    while start < n:
+        end = min(n, start + window)
+        c = close[start:end]
+
+        trail = np.where(c > entry * trail_trigger, c * trail_keep, -np.inf)
+        trail = np.maximum.accumulate(trail)
+        stops = np.maximum(stop_loss, np.concatenate(([-np.inf], trail[:-1])))
+
+        exit_at = _first((low[start:end] <= stops) | (high[start:end] >= take_profit))
+        pyramid_at = -1
+        if pyramids < len(pyramid_sizes):
+            pyramid_at = _first(c >= entry * pyramid_trigger)
+
+        if pyramid_at >= 0 and (exit_at < 0 or pyramid_at < exit_at):
+            j = start + pyramid_at
+            price = close[j]
+            add_quantity = entry * original_quantity * pyramid_sizes[pyramids] / price
+            entry = (entry * quantity + price * add_quantity) / (quantity + add_quantity)
+            quantity += add_quantity
+            cost += add_quantity * price * (1 + fee)
+            pyramids += 1
+            # TP/SL recalculés sur le prix moyen (stop remis au niveau dynamique)
+            take_profit, stop_loss = _dynamic_tp_sl(entry, sym['atr_h4'][j])
+            start, window = j + 1, SCAN_BARS
+            continue
+
+        if exit_at >= 0:
+            j = start + exit_at
+            stop = stops[exit_at]
+            if low[j] <= stop:
+                # Stop prioritaire si SL et TP dans la même bougie; gap → ouverture
+                exit_price, reason = min(opens[j], stop), "STOP_LOSS"
+            else:
+                exit_price, reason = max(opens[j], take_profit), "TAKE_PROFIT"
+            return _closed(sym, i0, j, entry, exit_price, quantity, cost, fee, reason, pyramids)
+
+        if end == n:
+            break
+        window *= 2
+
+    return _closed(sym, i0, n - 1, entry, close[n - 1], quantity, cost, fee, "END", pyramids)
+
+
+def _closed(sym, i0, j, entry, exit_price, quantity, cost, fee, reason, pyramids) -> dict:
+    proceeds = quantity * exit_price * (1 - fee)
+    return {
+        'exit_index': j,
+        'exit_time': int(sym['close_time'][j]),
+        'entry_price': float(entry),
+        'exit_price': float(exit_price),
+        'quantity': float(quantity),
+        'cost': float(cost),
+        'pnl': float(proceeds - cost),
+        'reason': reason,
+        'pyramids': pyramids
+    }
+
+
+def run_backtest(prepared: dict, initial_balance: float, params: StrategyParams = None,
+                 start_time: int = None, end_time: int = None,
+                 max_positions: int = None, fee_pct: float = None) -> dict:
+    """Rejoue les signaux de plusieurs symboles sur un portefeuille commun
+
+    Événementiel: seules les bougies candidates (BUY validé) sont visitées, dans
+    l'ordre chronologique; MAX_POSITIONS et la balance libre sont respectés.
+    Les positions encore ouvertes à end_time sont clôturées au dernier prix.
+    """
+    params = params or StrategyParams()
+    max_positions = Config.MAX_POSITIONS if max_positions is None else max_positions
+    fee = (Config.BACKTEST_FEE_PERCENT if fee_pct is None else fee_pct) / 100
+
+    candidates = []
+    limits = {}
+    for order, (symbol, sym) in enumerate(prepared.items()):
+        close_time = sym['close_time']
+        lo = 0 if start_time is None else int(np.searchsorted(close_time, start_time))
+        hi = len(close_time) if end_time is None else int(np.searchsorted(close_time, end_time))
+        limits[symbol] = hi
+
+        scores = trade_scores(
+            sym['recommendation'][lo:hi], sym['action'][lo:hi], sym['confidence'][lo:hi], sym['sentiment'], params
+        )
+        mask = sym['valid'][lo:hi] & (sym['action'][lo:hi] == "BUY") & (scores >= params.trade_threshold)
+        for i in np.flatnonzero(mask) + lo:
+            candidates.append((int(close_time[i]), order, symbol, int(i)))
+    candidates.sort()
+
+    realized = 0.0
+    open_trades = []  # heap (exit_time, symbol, cost, pnl)
+    busy_until = {}
+    trades = []
+    equity = [(start_time or 0, initial_balance)]
+
+    for t, _, symbol, i in candidates:
+        while open_trades and open_trades[0][0] <= t:
+            exit_time, _, _, pnl = heapq.heappop(open_trades)
+            realized += pnl
+            equity.append((exit_time, initial_balance + realized))
+
+        if busy_until.get(symbol, -1) > t or len(open_trades) >= max_positions:
+            continue
+
+        sym = prepared[symbol]
+        confidence = float(sym['confidence'][i])
+        market_trend = str(sym['market_trend'][i])
+        balance = initial_balance + realized - sum(trade[2] for trade in open_trades)
+        size_usd = balance * risk_fraction(confidence, market_trend, params)
+        if size_usd < MIN_POSITION_USD:
+            continue
+
+        result = simulate_trade(sym, i, size_usd, fee, params, limits[symbol])
+        busy_until[symbol] = result['exit_time']
+        heapq.heappush(open_trades, (result['exit_time'], symbol, result['cost'], result['pnl']))
+        trades.append(BacktestTrade(
+            symbol=symbol,
+            entry_time=t,
+            exit_time=result['exit_time'],
+            entry_price=float(sym['close'][i]),
+            exit_price=result['exit_price'],
+            quantity=result['quantity'],
+            cost=result['cost'],
+            pnl=result['pnl'],
+            reason=result['reason'],
+            confidence=confidence,
+            market_trend=market_trend,
+            pyramids=result['pyramids']
+        ))
+
+    for exit_time, _, _, pnl in sorted(open_trades):
+        realized += pnl
+        equity.append((exit_time, initial_balance + realized))
+
+    return {'trades': trades, 'equity': equity, 'metrics': compute_metrics(trades, equity, initial_balance)}
+
+
+def compute_metrics(trades: list, equity: list, initial_balance: float) -> dict:
+    """Statistiques globales (drawdown sur l'equity réalisée)"""
+    pnl = np.array([trade.pnl for trade in trades], dtype=np.float64)
+    curve = np.array([value for _, value in equity], dtype=np.float64)
+    peaks = np.maximum.accumulate(curve)
+    gains, losses = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+
+    return {
+        'trades': len(trades),
+        'win_rate': float((pnl > 0).mean() * 100) if len(pnl) else 0.0,
+        'total_pnl': float(pnl.sum()),
+        'return_pct': float(pnl.sum() / initial_balance * 100),
+        'max_drawdown_pct': float(((peaks - curve) / peaks).max() * 100),
+        'profit_factor': float(gains / losses) if losses > 0 else float('inf') if gains > 0 else 0.0,
+        'avg_trade_pct': float((pnl / np.array([t.cost for t in trades])).mean() * 100) if len(pnl) else 0.0,
+        'pyramids': int(sum(trade.pyramids for trade in trades))
+    }
+
+
+def load_history(store: KlineStore, symbols: list) -> dict:
+    """Klines clôturées du store pour chaque symbole et timeframe (sans réseau)"""
+    data = {}
+    for symbol in symbols:
+        cols = {interval: store.load(symbol, interval) for interval in INTERVALS}
+        missing = [interval for interval, c in cols.items() if len(c['close']) == 0]
+        if missing:
+            logger.warning(f"⚠️ {symbol}: pas de klines stockées pour {', '.join(missing)}, ignoré")
+            continue
+        data[symbol] = cols
+    return data
+
+
+def sync_history(symbols: list, days: int):
+    """Télécharge l'historique nécessaire dans le store (warmup EMA200 journalière inclus)"""
+    from binance_client import BinanceClient
+
+    binance = BinanceClient()
+    start = int(time.time() * 1000) - (days + 200) * INTERVAL_MS["1d"]
+    for symbol in symbols:
+        for interval in INTERVALS:
+            binance.kline_store.backfill(symbol, interval, start)
+            binance.kline_store.get_columns(symbol, interval, 1)
+
+
+def _print_report(result: dict, elapsed: float):
+    metrics = result['metrics']
+    print(f"\n📊 Backtest: {metrics['trades']} trades en {elapsed:.2f}s")
+    for key, value in metrics.items():
+        print(f"  {key:>18}: {value:,.2f}" if isinstance(value, float) else f"  {key:>18}: {value}")
+
+    by_symbol = {}
+    for trade in result['trades']:
+        stats = by_symbol.setdefault(trade.symbol, [0, 0, 0.0])
+        stats[0] += 1
+        stats[1] += trade.pnl > 0
+        stats[2] += trade.pnl
+    for symbol, (count, wins, pnl) in sorted(by_symbol.items()):
+        print(f"  {symbol:<10} trades={count:<4} win={wins / count * 100:5.1f}%  pnl=${pnl:+,.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest du pipeline PRO sur les klines stockées")
+    parser.add_argument('--symbols', nargs='+', default=Config.SYMBOLS)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--balance', type=float, default=Config.BACKTEST_INITIAL_BALANCE)
+    parser.add_argument('--sentiment', default="NEUTRAL", help="Label Fear & Greed constant")
+    parser.add_argument('--params', help="Fichier paramètres (défaut: STRATEGY_PARAMS_FILE)")
+    parser.add_argument('--sync', action='store_true', help="Télécharge l'historique manquant avant le backtest")
+    parser.add_argument('--json', help="Écrit métriques + trades dans ce fichier")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.sync:
+        sync_history(args.symbols, args.days)
+
+    started = time.perf_counter()
+    store = KlineStore(Config.KLINE_STORE_DIR, fetch=lambda *a: [])
+    data = load_history(store, args.symbols)
+    prepared = {symbol: prepare_symbol(cols, sentiment_label=args.sentiment) for symbol, cols in data.items()}
+    start_time = int(time.time() * 1000) - args.days * INTERVAL_MS["1d"]
+    params = StrategyParams.load(args.params) if args.params else load_strategy_params()
+    result = run_backtest(prepared, args.balance, params, start_time=start_time)
+    elapsed = time.perf_counter() - started
+
+    _print_report(result, elapsed)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'metrics': result['metrics'],
+                'trades': [asdict(trade) for trade in result['trades']]
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+import argparse
+import gzip
+import json
+import logging
+import math
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import timeit
+import numpy as np
+from config import Config
+from backtester import INTERVAL_MS
+from binance_client import BinanceClient
+from kline_decoder import decode_klines
+from rate_limiter import WeightRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Intervalles nécessaires au pipeline (tendance 1d, multi-TF 4h/1h, analyse Mistral)
+FIXTURE_INTERVALS = tuple(sorted({"1h", "4h", "1d", Config.TIMEFRAME}, key=INTERVAL_MS.get))
+FIXTURE_CANDLES = 300
+
+# Nouvelles mesures d'un benchmark en régression avant de conclure (bruit de la machine)
+CONFIRM_RUNS = 2
+
+
+def synthetic_klines(symbols: list, intervals=FIXTURE_INTERVALS, candles: int = FIXTURE_CANDLES, seed: int = 42) -> dict:
+    """Klines brutes (format REST 12 champs) d'une marche aléatoire géométrique reproductible
+
+    La dernière bougie de chaque série est la bougie en cours, comme en live.
+    """
+    rng = np.random.default_rng(seed)
+    now_ms = int(time.time() * 1000)
+    fixtures = {}
+    for symbol in symbols:
+        start_price = 10 ** rng.uniform(-1, 4.5)
+        fixtures[symbol] = {}
+        for interval in intervals:
+            step = INTERVAL_MS[interval]
+            open_times = (now_ms // step * step) - step * np.arange(candles - 1, -1, -1)
+            volatility = 0.01 * math.sqrt(step / INTERVAL_MS["1h"])
+            close = start_price * np.exp(np.cumsum(rng.normal(0, volatility, candles)))
+            open_ = np.r_[start_price, close[:-1]]
+            wick = np.abs(rng.normal(0, volatility / 2, (2, candles)))
+            high = np.maximum(open_, close) * (1 + wick[0])
+            low = np.minimum(open_, close) * (1 - wick[1])
+            volume = rng.lognormal(10, 0.5, candles)
+            trades = rng.integers(1_000, 50_000, candles)
+            taker = volume * rng.uniform(0.3, 0.7, candles)
+            fixtures[symbol][interval] = [
+                [int(t), f"{o:.8f}", f"{h:.8f}", f"{l:.8f}", f"{c:.8f}", f"{v:.8f}", int(t + step - 1),
+                 f"{v * c:.8f}", int(n), f"{b:.8f}", f"{b * c:.8f}", "0"]
+                for t, o, h, l, c, v, n, b in zip(open_times, open_, high, low, close, volume, trades, taker)
+            ]
+    return fixtures
+
+
+def load_fixtures(path: str) -> dict:
+    """Fixtures enregistrées par --record-fixtures (JSON gzip)"""
+    with gzip.open(path, 'rt') as f:
+        return json.load(f)
+
+
+def record_fixtures(path: str, symbols: list, intervals=FIXTURE_INTERVALS, candles: int = FIXTURE_CANDLES):
+    """Télécharge les klines réelles des symboles et les enregistre comme fixtures"""
+    binance = BinanceClient()
+    klines = {
+        symbol: {interval: binance.get_klines(symbol, interval, candles) for interval in intervals}
+        for symbol in symbols
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with gzip.open(path, 'wt') as f:
+        json.dump({'source': 'recorded', 'recorded_at': int(time.time()), 'klines': klines}, f)
+    logger.info(f"📼 Fixtures enregistrées: {path} ({len(symbols)} symboles x {len(intervals)} intervalles)")
+
+
+def _tick(price: float) -> str:
+    decimals = min(8, max(0, 5 - int(math.floor(math.log10(price)))))
+    return f"{10 ** -decimals:.{decimals}f}" if decimals else "1"
+
+
+class FakeExchange:
+    """Client compatible python-binance servi depuis les fixtures (aucun réseau)
+
+    Prix courant = dernière clôture de l'intervalle le plus fin; les ordres sont
+    exécutés immédiatement à ce prix.
+    """
+
+    def __init__(self, klines: dict, quote_asset: str = "USDT"):
+        self.klines = klines
+        self.quote_asset = quote_asset
+        self.response = None
+        self.orders = {}
+        self._next_id = 1
+        self.prices = {
+            symbol: float(by_interval[min(by_interval, key=INTERVAL_MS.get)][-1][4])
+            for symbol, by_interval in klines.items()
+        }
+
+    def get_account(self, **params):
+        return {'balances': [{'asset': self.quote_asset, 'free': "10000.0", 'locked': "0.0"}]}
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 500, startTime: int = None):
+        rows = self.klines.get(symbol, {}).get(interval, [])
+        if startTime is not None:
+            return [row for row in rows if row[0] >= startTime][:limit]
+        return rows[-limit:]
+
+    def get_symbol_ticker(self, symbol: str = None, symbols: str = None):
+        if symbol is not None:
+            return {'symbol': symbol, 'price': str(self.prices[symbol])}
+        return [{'symbol': s, 'price': str(self.prices[s])} for s in json.loads(symbols) if s in self.prices]
+
+    def get_ticker(self, **params):
+        tickers = []
+        for symbol, by_interval in self.klines.items():
+            rows = by_interval.get("1h") or by_interval[min(by_interval, key=INTERVAL_MS.get)]
+            day = rows[-24:]
+            open_, last = float(day[0][1]), float(day[-1][4])
+            tickers.append({
+                'symbol': symbol,
+                'lastPrice': str(last),
+                'highPrice': str(max(float(row[2]) for row in day)),
+                'lowPrice': str(min(float(row[3]) for row in day)),
+                'priceChangePercent': str((last - open_) / open_ * 100),
+                'quoteVolume': str(sum(float(row[7]) for row in day))
+            })
+        return tickers
+
+    def get_symbol_info(self, symbol: str):
+        if symbol not in self.prices:
+            return None
+        return {
+            'symbol': symbol,
+            'status': 'TRADING',
+            'baseAsset': symbol[:-len(self.quote_asset)],
+            'quoteAsset': self.quote_asset,
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'tickSize': _tick(self.prices[symbol])},
+                {'filterType': 'LOT_SIZE', 'stepSize': "0.00001000", 'minQty': "0.00001000"},
+                {'filterType': 'NOTIONAL', 'minNotional': "5.00000000"}
+            ]
+        }
+
+    def get_exchange_info(self, **params):
+        return {'symbols': [self.get_symbol_info(symbol) for symbol in self.prices]}
+
+    def _order(self, symbol: str, side: str, order_type: str, quantity: str, status: str, **extra) -> dict:
+        price = self.prices[symbol]
+        executed = float(quantity) if status == 'FILLED' else 0.0
+        order = {
+            'symbol': symbol, 'orderId': self._next_id, 'side': side, 'type': order_type, 'status': status,
+            'origQty': str(quantity), 'executedQty': str(executed),
+            'cummulativeQuoteQty': str(executed * price), 'price': "0", 'stopPrice': "0",
+            'updateTime': int(time.time() * 1000), **extra
+        }
+        self._next_id += 1
+        self.orders[order['orderId']] = order
+        return order
+
+    def create_order(self, symbol: str, side: str, type: str, quantity, **params):
+        status = 'FILLED' if type == 'MARKET' else 'NEW'
+        extra = {k: str(v) for k, v in params.items() if k in ('price', 'stopPrice')}
+        return self._order(symbol, side, type, quantity, status, **extra)
+
+    def create_oco_order(self, symbol: str, side: str, quantity, price, stopPrice, **params):
+        reports = [
+            self._order(symbol, side, 'STOP_LOSS_LIMIT', quantity, 'NEW', stopPrice=str(stopPrice)),
+            self._order(symbol, side, 'LIMIT_MAKER', quantity, 'NEW', price=str(price))
+        ]
+        return {'orderListId': reports[0]['orderId'], 'orderReports': reports}
+
+    def get_open_orders(self, symbol: str = None):
+        return [o for o in self.orders.values()
+                if o['status'] == 'NEW' and (symbol is None or o['symbol'] == symbol)]
+
+    def get_order(self, symbol: str, orderId: int):
+        return self.orders[orderId]
+
+    def cancel_order(self, symbol: str, orderId: int):
+        self.orders[orderId]['status'] = 'CANCELED'
+        return self.orders[orderId]
+
+    def cancel_replace_order(self, symbol: str, cancelOrderId: int, side: str, type: str, quantity, **params):
+        return {
+            'cancelResult': 'SUCCESS', 'newOrderResult': 'SUCCESS',
+            'cancelResponse': self.cancel_order(symbol, cancelOrderId),
+            'newOrderResponse': self.create_order(symbol, side, type, quantity, **params)
+        }
+
+    def stream_get_listen_key(self):
+        return "benchmark"
+
+
+class FakeLLM:
+    """Réponses HOLD instantanées au format chat/completions (une entrée par bloc ### SYMBOLE)"""
+
+    def complete(self, payload: dict, timeout: float) -> dict:
+        prompt = payload['messages'][0]['content']
+        blocks = re.findall(r'^### (\w+)\n- Prix: \$([\d.]+)', prompt, re.M)
+        if blocks:
+            content = json.dumps([self._hold(float(price), symbol) for symbol, price in blocks])
+        else:
+            content = json.dumps(self._hold(float(re.search(r'- Prix: \$([\d.]+)', prompt).group(1))))
+        return {'choices': [{'message': {'content': content}}]}
+
+    @staticmethod
+    def _hold(price: float, symbol: str = None) -> dict:
+        entry = {
+            'action': 'HOLD', 'trend': 'NEUTRAL', 'confidence': 50, 'entry_price': price,
+            'stop_loss': price * 0.97, 'take_profit': price * 1.06, 'position_size_usd': 0,
+            'reasoning': "benchmark"
+        }
+        return {'symbol': symbol, **entry} if symbol else entry
+
+
+def isolate_config(symbols: list):
+    """Aucune écriture disque, aucun thread réseau, aucun cache entre deux mesures"""
+    Config.SYMBOLS = list(symbols)
+    Config.UNIVERSE_ENABLED = False
+    Config.KLINE_CACHE_ENABLED = False
+    Config.KLINE_STORE_ENABLED = False
+    Config.INDICATOR_ENGINE_ENABLED = False
+    Config.INDICATOR_STATE_DIR = None
+    Config.LLM_CACHE_ENABLED = False
+    Config.LLM_BATCH_ENABLED = True
+    Config.STATE_STORE_ENABLED = False
+    Config.USER_STREAM_ENABLED = False
+    Config.STREAM_MONITOR_ENABLED = False
+    Config.METRICS_PORT = 0
+    Config.METRICS_SNAPSHOT_PATH = ""
+    Config.HTTP_TAPE_MODE = ""
+
+
+def fake_binance(klines: dict) -> BinanceClient:
+    binance = BinanceClient(client=FakeExchange(klines))
+    # Budget de poids illimité: les attentes du limiteur fausseraient les mesures
+    binance.rate_limiter = WeightRateLimiter(weight_limit=10 ** 9)
+    binance.symbol_rules.refresh()
+    return binance
+
+
+def build_benchmarks(klines: dict) -> dict:
+    """{nom: callable} des chemins chauds du bot, sur un exchange simulé"""
+    from indicator_engine import IndicatorEngine
+    from market_analyzer import MarketAnalyzer
+    from mistral_agent import MistralAgent
+    from strategy_optimizer import StrategyOptimizer
+    from universe_scanner import UniverseScanner
+
+    symbols = list(klines)
+    symbol = symbols[0]
+    binance = fake_binance(klines)
+    raw = klines[symbol][Config.TIMEFRAME][-100:]
+    columns = {s: decode_klines(klines[s][Config.TIMEFRAME][-100:]) for s in symbols}
+    price = binance.client.prices[symbol]
+
+    mistral = MistralAgent()
+    mistral_engine = MistralAgent(IndicatorEngine())
+    analyzer = MarketAnalyzer(binance)
+    atr = analyzer._analyze_timeframe(symbol, "4h", 50)['atr']
+    optimizer = StrategyOptimizer()
+    universe = UniverseScanner(binance.get_24h_tickers, binance.symbol_rules.symbols)
+    tickers = binance.get_24h_tickers()
+
+    benchmarks = {
+        'decode_klines': lambda: decode_klines(raw),
+        'mistral.calculate_indicators': lambda: mistral.calculate_indicators(raw),
+        'mistral.calculate_indicators[engine]': lambda: mistral_engine.calculate_indicators(columns[symbol], symbol),
+        'mistral.calculate_indicators_many': lambda: mistral.calculate_indicators_many(columns),
+        'analyzer._analyze_timeframe': lambda: analyzer._analyze_timeframe(symbol, "4h", 50),
+        'analyzer.multi_timeframe_analysis': lambda: analyzer.multi_timeframe_analysis(symbol),
+        'analyzer.multi_timeframe_analyses': lambda: analyzer.multi_timeframe_analyses(symbols),
+        'analyzer.calculate_dynamic_tp_sl': lambda: analyzer.calculate_dynamic_tp_sl(symbol, price),
+        'analyzer.calculate_dynamic_tp_sl[atr]': lambda: analyzer.calculate_dynamic_tp_sl(symbol, price, atr=atr),
+        'binance.adjust_quantity': lambda: binance.adjust_quantity(symbol, 123.456789 / price),
+        'binance.get_symbol_rules': lambda: binance.get_symbol_rules(symbol),
+        'optimizer.should_trade': lambda: optimizer.should_trade(
+            symbol,
+            multi_tf={'signal': 'BUY'},
+            mistral={'action': 'BUY', 'confidence': 75},
+            sentiment={'value': 40, 'label': 'FEAR'},
+            market_trend='BULL'
+        ),
+        'universe.rank': lambda: universe.rank(tickers),
+    }
+
+    bot = _fake_bot(klines)
+    benchmarks['bot.run_cycle'] = bot.run_cycle
+    return benchmarks
+
+
+def _fake_bot(klines: dict):
+    """TradingBot complet branché sur l'exchange et le LLM simulés"""
+    from main import TradingBot
+
+    bot = TradingBot(binance_client=fake_binance(klines))
+    bot.discord.send_message = lambda *args, **kwargs: None
+    bot.mistral.pipeline.complete = FakeLLM().complete
+    bot.market_analyzer.get_market_sentiment = lambda: {'value': 50, 'sentiment': 'NEUTRAL', 'bias': 'NEUTRAL'}
+    return bot
+
+
+def calibration():
+    """Charge fixe Python + NumPy: vitesse de la machine au moment de la mesure"""
+    values = np.arange(256, dtype=float)
+    total = 0.0
+    for x in range(200):
+        total += x * 0.5
+    return total + float(np.cumsum(values)[-1]) + float(np.mean(values * 1.5))
+
+
+def measure(fn, rounds: int) -> dict:
+    """Temps par appel (s): un échauffement, puis `rounds` séries d'au moins 0.2 s chacune
+
+    Chaque série est précédée d'une série de calibration(): 'normalized' (médiane des
+    ratios temps de l'appel / temps de calibration) suit peu la charge de la machine.
+    """
+    fn()
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    calibration_timer = timeit.Timer(calibration)
+    calibration_number, _ = calibration_timer.autorange()
+    samples, normalized = [], []
+    for _ in range(rounds):
+        reference = calibration_timer.timeit(calibration_number) / calibration_number
+        samples.append(timer.timeit(number) / number)
+        normalized.append(samples[-1] / reference)
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'normalized': statistics.median(normalized),
+        'number': number,
+        'rounds': rounds
+    }
+
+
+def _ratio(stats: dict, reference: dict) -> float:
+    # Références antérieures à la calibration: minimum brut
+    if 'normalized' in stats and 'normalized' in reference:
+        return stats['normalized'] / reference['normalized']
+    return stats['min'] / reference['min']
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Annote chaque mesure du ratio à la référence; retourne les noms en régression
+
+    Le ratio porte sur le temps normalisé par la calibration (sinon le minimum des séries).
+    """
+    regressions = []
+    for name, stats in results['benchmarks'].items():
+        reference = baseline.get('benchmarks', {}).get(name)
+        if not reference:
+            continue
+        stats['baseline_min'] = reference['min']
+        stats['ratio'] = _ratio(stats, reference)
+        if stats['ratio'] > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def _print_report(results: dict, tolerance: float):
+    print(f"\n⏱️ Benchmark ({results['meta']['fixtures']}, {results['meta']['symbols']} symboles)")
+    for name, stats in results['benchmarks'].items():
+        line = (
+            f"  {name:<40} min {_format_seconds(stats['min']):>10}  médiane {_format_seconds(stats['median']):>10}"
+            f"  ±{stats['stdev'] / stats['median'] * 100:4.1f}%"
+        )
+        if 'ratio' in stats:
+            flag = "❌" if stats['ratio'] > 1 + tolerance else "✅"
+            line += f"  x{stats['ratio']:.2f} {flag}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des chemins chauds du bot sur un exchange simulé")
+    parser.add_argument('--fixtures', help="Fixtures enregistrées (JSON gzip), défaut: klines synthétiques")
+    parser.add_argument('--record-fixtures', metavar='PATH', help="Enregistre les klines réelles de --symbols puis quitte")
+    parser.add_argument('--symbols', nargs='+', default=Config.SYMBOLS)
+    parser.add_argument('--seed', type=int, default=42, help="Graine des klines synthétiques")
+    parser.add_argument('--only', help="N'exécute que les benchmarks dont le nom contient ce texte")
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--out', default="bench_results.json", help="Résultats JSON")
+    parser.add_argument('--baseline', help="Résultats de référence (même machine): code retour 1 si régression")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Ralentissement toléré (0.25 = +25%%)")
+    parser.add_argument('--save-baseline', metavar='PATH', help="Enregistre aussi les résultats comme référence")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.record_fixtures:
+        logging.getLogger(__name__).setLevel(logging.INFO)
+        record_fixtures(args.record_fixtures, args.symbols)
+        return
+
+    if args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+        klines, source = fixtures['klines'], f"recorded:{os.path.basename(args.fixtures)}"
+    else:
+        klines, source = synthetic_klines(args.symbols, seed=args.seed), f"synthetic:seed={args.seed}"
+
+    isolate_config(list(klines))
+    benchmarks = build_benchmarks(klines)
+
+    results = {
+        'meta': {
+            'timestamp': int(time.time()),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'fixtures': source,
+            'symbols': len(klines)
+        },
+        'benchmarks': {}
+    }
+    for name, fn in benchmarks.items():
+        if args.only and args.only not in name:
+            continue
+        results['benchmarks'][name] = measure(fn, args.rounds)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('fixtures') != source:
+            print(f"⚠️ Référence mesurée sur {baseline.get('meta', {}).get('fixtures')}, pas sur {source}")
+        regressions = compare(results, baseline, args.tolerance)
+        # Régression confirmée seulement si elle persiste sur CONFIRM_RUNS nouvelles mesures
+        for _ in range(CONFIRM_RUNS):
+            if not regressions:
+                break
+            for name in regressions:
+                retry = measure(benchmarks[name], args.rounds)
+                if _ratio(retry, baseline['benchmarks'][name]) < results['benchmarks'][name]['ratio']:
+                    results['benchmarks'][name] = retry
+            regressions = compare(results, baseline, args.tolerance)
+    results['regressions'] = regressions
+
+    _print_report(results, args.tolerance)
+
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} régression(s) > {args.tolerance * 100:.0f}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,182 +1,387 @@
-from binance.client import Client
-from binance.exceptions import BinanceAPIException
-from config import Config
-import logging
-import math
-
-logger = logging.getLogger(__name__)
-
-class BinanceClient:
-    def __init__(self):
-        self.client = Client(
-            Config.BINANCE_API_KEY,
-            Config.BINANCE_API_SECRET,
-            testnet=Config.BINANCE_TESTNET
-        )
-        if Config.BINANCE_TESTNET:
-            self.client.API_URL = Config.BINANCE_TESTNET_URL
-        
-        self.symbol_info_cache = {}
-    
-    def get_symbol_info(self, symbol: str):
-        """Cache info symbol"""
-        if symbol not in self.symbol_info_cache:
-            info = self.client.get_symbol_info(symbol)
-            self.symbol_info_cache[symbol] = info
-        return self.symbol_info_cache[symbol]
-    
-    def get_precision(self, symbol: str):
-        """Précision lot"""
-        info = self.get_symbol_info(symbol)
-        
-        lot_filter = next(f for f in info['filters'] if f['filterType'] == 'LOT_SIZE')
-        step_size = float(lot_filter['stepSize'])
-        min_qty = float(lot_filter['minQty'])
-        
-        price_filter = next(f for f in info['filters'] if f['filterType'] == 'PRICE_FILTER')
-        tick_size = float(price_filter['tickSize'])
-        
-        notional_filter = next(f for f in info['filters'] if f['filterType'] == 'NOTIONAL')
-        min_notional = float(notional_filter['minNotional'])
-        
-        qty_precision = int(round(-math.log(step_size, 10), 0))
-        price_precision = int(round(-math.log(tick_size, 10), 0))
-        
-        return {
-            'qty_precision': qty_precision,
-            'price_precision': price_precision,
-            'min_qty': min_qty,
-            'min_notional': min_notional,
-            'step_size': step_size
-        }
-    
-    def adjust_quantity(self, symbol: str, quantity: float):
-        """Ajuste quantité selon rules Binance"""
-        prec = self.get_precision(symbol)
-        
-        # Arrondi au step_size
-        qty = round(quantity, prec['qty_precision'])
-        
-        # Ajuste au step_size
-        step = prec['step_size']
-        qty = math.floor(qty / step) * step
-        qty = round(qty, prec['qty_precision'])
-        
-        return max(qty, prec['min_qty'])
-    
-    def get_account_balance(self):
-        """Balance USDT"""
-        try:
-            account = self.client.get_account()
-            usdt = next((float(b['free']) for b in account['balances'] if b['asset'] == 'USDT'), 0.0)
-            logger.info(f"Balance USDT: {usdt}")
-            return usdt
-        except BinanceAPIException as e:
-            logger.error(f"Erreur balance: {e}")
-            return 0.0
-    
-    def get_klines(self, symbol: str, interval: str, limit: int = 100):
-        """Klines"""
-        try:
-            return self.client.get_klines(symbol=symbol, interval=interval, limit=limit)
-        except BinanceAPIException as e:
-            logger.error(f"Erreur klines: {e}")
-            return []
-    
-    def get_current_price(self, symbol: str):
-        """Prix actuel"""
-        try:
-            ticker = self.client.get_symbol_ticker(symbol=symbol)
-            return float(ticker['price'])
-        except BinanceAPIException as e:
-            logger.error(f"Erreur prix: {e}")
-            return 0.0
-    
-    def place_order(self, symbol: str, side: str, quantity: float, price: float = None):
-        """Place ordre avec checks"""
-        try:
-            prec = self.get_precision(symbol)
-            current_price = price or self.get_current_price(symbol)
-            
-            # Ajuste quantité
-            quantity = self.adjust_quantity(symbol, quantity)
-            
-            # Check notional MIN
-            notional = quantity * current_price
-            if notional < prec['min_notional']:
-                logger.error(f"❌ Notional ${notional:.2f} < min ${prec['min_notional']}")
-                
-                # AUTO-ADJUST au minimum
-                quantity = (prec['min_notional'] * 1.1) / current_price  # +10% sécurité
-                quantity = self.adjust_quantity(symbol, quantity)
-                notional = quantity * current_price
-                
-                logger.info(f"✅ Ajusté → Qty: {quantity}, Notional: ${notional:.2f}")
-            
-            logger.info(f"📝 Ordre: {side} {quantity} {symbol} @ ${current_price:,.2f} (${notional:.2f})")
-            
-            if price:
-                price = round(price, prec['price_precision'])
-                order = self.client.create_order(
-                    symbol=symbol,
-                    side=side,
-                    type='LIMIT',
-                    timeInForce='GTC',
-                    quantity=quantity,
-                    price=price
-                )
-            else:
-                order = self.client.create_order(
-                    symbol=symbol,
-                    side=side,
-                    type='MARKET',
-                    quantity=quantity
-                )
-            
-            logger.info(f"✅ Ordre #{order['orderId']} placé")
-            return order
-            
-        except BinanceAPIException as e:
-            logger.error(f"❌ Erreur ordre: {e}")
-            return None
-    
-    def place_stop_loss(self, symbol: str, quantity: float, stop_price: float):
-        """Stop loss"""
-        try:
-            prec = self.get_precision(symbol)
-            quantity = self.adjust_quantity(symbol, quantity)
-            stop_price = round(stop_price, prec['price_precision'])
-            limit_price = round(stop_price * 0.995, prec['price_precision'])
-            
-            order = self.client.create_order(
-                symbol=symbol,
-                side='SELL',
-                type='STOP_LOSS_LIMIT',
-                timeInForce='GTC',
-                quantity=quantity,
-                price=limit_price,
-                stopPrice=stop_price
-            )
-            logger.info(f"✅ Stop loss: {order}")
-            return order
-        except BinanceAPIException as e:
-            logger.error(f"❌ Erreur stop: {e}")
-            return None
-    
-    def get_open_orders(self, symbol: str = None):
-        """Ordres ouverts"""
-        try:
-            return self.client.get_open_orders(symbol=symbol) if symbol else self.client.get_open_orders()
-        except BinanceAPIException as e:
-            logger.error(f"Erreur ordres: {e}")
-            return []
-    
-    def cancel_order(self, symbol: str, order_id: int):
-        """Annule ordre"""
-        try:
-            result = self.client.cancel_order(symbol=symbol, orderId=order_id)
-            logger.info(f"Annulé: {result}")
-            return result
-        except BinanceAPIException as e:
-            logger.error(f"Erreur annulation: {e}")
+from config import Config
+from kline_cache import KlineCache
+from kline_store import KlineStore
+from kline_decoder import decode_klines
+from price_snapshot import PriceSnapshot
+from rate_limiter import get_rate_limiter
+from symbol_rules import SymbolRules, SymbolRulesBook
+from lazy_imports import LazyModule
+from metrics import get_metrics
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# python-binance (~1 s d'import) chargé à la création du Client ou à la première erreur
+python_binance = LazyModule("binance.client")
+binance_exceptions = LazyModule("binance.exceptions")
+
+
+def base_asset(symbol: str, quote: str = "USDT") -> str:
+    """Actif de base d'une paire (BTCUSDT → BTC)"""
+    return symbol[:-len(quote)] if symbol.endswith(quote) else symbol
+
+
+def fill_price(order: dict, default: float) -> float:
+    """Prix moyen d'exécution d'un ordre REST (default si non exécuté / réponse ACK)"""
+    executed = float(order.get('executedQty', 0) or 0) if order else 0.0
+    if executed <= 0:
+        return default
+    return float(order['cummulativeQuoteQty']) / executed
+
+
+def build_order_params(rules: SymbolRules, symbol: str, side: str, quantity: float,
+                       current_price: float, price: float = None) -> dict:
+    """Paramètres create_order avec ajustement lot + notional minimum"""
+    # Ajuste quantité
+    quantity = rules.adjust_quantity(quantity)
+    
+    # Check notional MIN
+    notional = quantity * current_price
+    if notional < rules.min_notional:
+        logger.error(f"❌ Notional ${notional:.2f} < min ${rules.min_notional}")
+        
+        # AUTO-ADJUST au minimum
+        quantity = (rules.min_notional * 1.1) / current_price  # +10% sécurité
+        quantity = rules.adjust_quantity(quantity)
+        notional = quantity * current_price
+        
+        logger.info(f"✅ Ajusté → Qty: {quantity}, Notional: ${notional:.2f}")
+    
+    logger.info(f"📝 Ordre: {side} {quantity} {symbol} @ ${current_price:,.2f} (${notional:.2f})")
+    
+    if price:
+        return {
+            'symbol': symbol,
+            'side': side,
+            'type': 'LIMIT',
+            'timeInForce': 'GTC',
+            'quantity': quantity,
+            'price': rules.round_price(price)
+        }
+    return {
+        'symbol': symbol,
+        'side': side,
+        'type': 'MARKET',
+        'quantity': quantity
+    }
+
+
+def build_stop_loss_params(rules: SymbolRules, symbol: str, quantity: float, stop_price: float) -> dict:
+    """Paramètres create_order STOP_LOSS_LIMIT (limite 0.5% sous le stop)"""
+    stop_price = rules.round_price(stop_price)
+    return {
+        'symbol': symbol,
+        'side': 'SELL',
+        'type': 'STOP_LOSS_LIMIT',
+        'timeInForce': 'GTC',
+        'quantity': rules.adjust_quantity(quantity),
+        'price': rules.round_price(stop_price * 0.995),
+        'stopPrice': stop_price
+    }
+
+
+def build_cancel_replace_params(rules: SymbolRules, symbol: str, cancel_order_id: int,
+                                quantity: float, stop_price: float) -> dict:
+    """Paramètres order/cancelReplace: annule `cancel_order_id` et pose un nouveau stop (atomique)"""
+    return {
+        **build_stop_loss_params(rules, symbol, quantity, stop_price),
+        'cancelReplaceMode': 'STOP_ON_FAILURE',
+        'cancelOrderId': cancel_order_id
+    }
+
+
+def build_oco_exit_params(rules: SymbolRules, symbol: str, quantity: float,
+                          take_profit: float, stop_price: float) -> dict:
+    """Paramètres OCO de sortie: LIMIT_MAKER au take profit + STOP_LOSS_LIMIT (limite 0.5% sous le stop)"""
+    stop_price = rules.round_price(stop_price)
+    return {
+        'symbol': symbol,
+        'side': 'SELL',
+        'quantity': rules.adjust_quantity(quantity),
+        'price': rules.round_price(take_profit),
+        'stopPrice': stop_price,
+        'stopLimitPrice': rules.round_price(stop_price * 0.995),
+        'stopLimitTimeInForce': 'GTC'
+    }
+
+
+class BinanceClient:
+    def __init__(self, client=None):
+        # `client` permet d'injecter un transport compatible python-binance (ex: bridge async),
+        # sinon le Client python-binance (import + ping) est créé au premier appel REST
+        self._client = client
+        self._client_lock = threading.Lock()
+        
+        self.rate_limiter = get_rate_limiter()
+        # Règles de tous les symboles depuis un seul exchangeInfo (rafraîchi en arrière-plan)
+        self.symbol_rules = SymbolRulesBook(
+            self._fetch_exchange_info, self._fetch_symbol_info, Config.SYMBOL_RULES_REFRESH_SECONDS
+        )
+        self.kline_cache = KlineCache() if Config.KLINE_CACHE_ENABLED else None
+        self.kline_store = (
+            KlineStore(Config.KLINE_STORE_DIR, self._fetch_klines_since, Config.KLINE_STORE_MIN_HISTORY)
+            if Config.KLINE_STORE_ENABLED else None
+        )
+        self.price_snapshot = PriceSnapshot(self._fetch_prices, Config.PRICE_SNAPSHOT_MAX_AGE_SECONDS)
+    
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+    
+    def _create_client(self):
+        started = time.perf_counter()
+        client = python_binance.Client(
+            Config.BINANCE_API_KEY,
+            Config.BINANCE_API_SECRET,
+            testnet=Config.BINANCE_TESTNET
+        )
+        if Config.BINANCE_TESTNET:
+            client.API_URL = Config.BINANCE_TESTNET_URL
+        elapsed = time.perf_counter() - started
+        get_metrics().observe('startup_seconds', elapsed, stage='binance_client')
+        logger.info(f"🔌 Client Binance initialisé en {elapsed * 1000:.0f} ms")
+        return client
+    
+    def _call(self, method: str, **params):
+        """Appel python-binance via le rate limiter (poids + retry)"""
+        return self.rate_limiter.call(
+            method, getattr(self.client, method), self._last_response_headers, **params
+        )
+    
+    def _last_response_headers(self):
+        return getattr(getattr(self.client, 'response', None), 'headers', None)
+    
+    def _fetch_exchange_info(self):
+        """exchangeInfo complet, tous symboles (None si erreur)"""
+        try:
+            return self._call('get_exchange_info')
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur exchangeInfo: {e}")
+            return None
+    
+    def _fetch_symbol_info(self, symbol: str):
+        """Info d'un symbole absent du dernier exchangeInfo (nouveau listing)"""
+        try:
+            return self._call('get_symbol_info', symbol=symbol)
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur info {symbol}: {e}")
+            return None
+    
+    def load_symbol_rules(self):
+        """Charge les règles de tous les symboles et démarre leur rafraîchissement"""
+        self.symbol_rules.refresh()
+        self.symbol_rules.start()
+    
+    def get_symbol_rules(self, symbol: str) -> SymbolRules:
+        """Règles précompilées (step, tick, notional min, précisions)"""
+        return self.symbol_rules.get(symbol)
+    
+    def adjust_quantity(self, symbol: str, quantity: float):
+        """Ajuste quantité selon rules Binance"""
+        return self.get_symbol_rules(symbol).adjust_quantity(quantity)
+    
+    def get_account_balance(self):
+        """Balance USDT"""
+        try:
+            account = self._call('get_account')
+            usdt = next((float(b['free']) for b in account['balances'] if b['asset'] == 'USDT'), 0.0)
+            logger.info(f"Balance USDT: {usdt}")
+            return usdt
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur balance: {e}")
+            return 0.0
+    
+    def get_balances(self):
+        """Soldes free + locked de tous les actifs en un appel (None si erreur)"""
+        try:
+            account = self._call('get_account')
+            return {b['asset']: float(b['free']) + float(b['locked']) for b in account['balances']}
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur balances: {e}")
+            return None
+    
+    def get_klines(self, symbol: str, interval: str, limit: int = 100):
+        """Klines (servies depuis le cache tant que la bougie en cours n'est pas clôturée)"""
+        if self.kline_cache is not None:
+            cached = self.kline_cache.get(symbol, interval, limit)
+            if cached is not None:
+                return cached
+        
+        try:
+            if self.kline_cache is None:
+                return self._call('get_klines', symbol=symbol, interval=interval, limit=limit)
+            
+            # Récupère au moins KLINE_CACHE_MIN_LIMIT bougies pour servir les appels suivants
+            fetch_limit = min(max(limit, Config.KLINE_CACHE_MIN_LIMIT), 1000)
+            klines = self._call('get_klines', symbol=symbol, interval=interval, limit=fetch_limit)
+            self.kline_cache.put(symbol, interval, klines, fetch_limit)
+            return klines[-limit:]
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur klines: {e}")
+            return []
+    
+    def _fetch_klines_since(self, symbol: str, interval: str, start_time: int, limit: int):
+        """Klines REST à partir de start_time (ms), utilisé par le store"""
+        try:
+            if start_time is None:
+                return self._call('get_klines', symbol=symbol, interval=interval, limit=limit)
+            return self._call('get_klines', symbol=symbol, interval=interval, startTime=start_time, limit=limit)
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur klines: {e}")
+            return []
+    
+    def get_kline_columns(self, symbol: str, interval: str, limit: int = 100):
+        """Klines en colonnes NumPy (tranches memmap du store si activé)"""
+        if self.kline_store is not None:
+            try:
+                return self.kline_store.get_columns(symbol, interval, limit)
+            except OSError as e:
+                logger.error(f"Erreur store klines {symbol} {interval}: {e}")
+        
+        return decode_klines(self.get_klines(symbol, interval, limit))
+    
+    def _fetch_prices(self, symbols: list) -> dict:
+        """Prix de plusieurs symboles en une requête ticker"""
+        try:
+            tickers = self._call('get_symbol_ticker', symbols=json.dumps(symbols, separators=(',', ':')))
+            return {t['symbol']: float(t['price']) for t in tickers}
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur snapshot prix: {e}")
+            return {}
+    
+    def get_24h_tickers(self):
+        """Stats 24h de tous les symboles en une requête (poids 80), [] si erreur"""
+        try:
+            return self._call('get_ticker')
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur tickers 24h: {e}")
+            return []
+    
+    def refresh_prices(self, symbols) -> dict:
+        """Snapshot des prix des symboles suivis (servi ensuite par get_current_price)"""
+        return self.price_snapshot.refresh(symbols)
+    
+    def get_current_price(self, symbol: str):
+        """Prix actuel (snapshot si assez récent)"""
+        price = self.price_snapshot.get(symbol)
+        if price is not None:
+            return price
+        
+        try:
+            ticker = self._call('get_symbol_ticker', symbol=symbol)
+            return float(ticker['price'])
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur prix: {e}")
+            return 0.0
+    
+    def place_order(self, symbol: str, side: str, quantity: float, price: float = None):
+        """Place ordre avec checks"""
+        try:
+            rules = self.get_symbol_rules(symbol)
+            current_price = price or self.get_current_price(symbol)
+            
+            params = build_order_params(rules, symbol, side, quantity, current_price, price)
+            order = self._call('create_order', **params)
+            
+            logger.info(f"✅ Ordre #{order['orderId']} placé")
+            return order
+            
+        except (binance_exceptions.BinanceAPIException, KeyError) as e:
+            logger.error(f"❌ Erreur ordre: {e}")
+            return None
+    
+    def place_stop_loss(self, symbol: str, quantity: float, stop_price: float):
+        """Stop loss"""
+        try:
+            rules = self.get_symbol_rules(symbol)
+            params = build_stop_loss_params(rules, symbol, quantity, stop_price)
+            order = self._call('create_order', **params)
+            logger.info(f"✅ Stop loss: {order}")
+            return order
+        except (binance_exceptions.BinanceAPIException, KeyError) as e:
+            logger.error(f"❌ Erreur stop: {e}")
+            return None
+    
+    def place_oco_exit(self, symbol: str, quantity: float, take_profit: float, stop_price: float):
+        """TP + SL tenus par l'exchange dans un OCO (None si refusé)"""
+        try:
+            rules = self.get_symbol_rules(symbol)
+            params = build_oco_exit_params(rules, symbol, quantity, take_profit, stop_price)
+            order_list = self._call('create_oco_order', **params)
+            logger.info(f"✅ OCO #{order_list['orderListId']}: TP {params['price']} / SL {params['stopPrice']}")
+            return order_list
+        except (binance_exceptions.BinanceAPIException, KeyError) as e:
+            logger.error(f"❌ Erreur OCO: {e}")
+            return None
+    
+    def replace_stop_loss(self, symbol: str, cancel_order_id: int, quantity: float, stop_price: float):
+        """Remplace un ordre (stop ou jambe d'OCO) par un nouveau stop en une requête atomique
+
+        Retourne la réponse cancelReplace (cancelResponse/newOrderResponse), None si échec:
+        en STOP_ON_FAILURE l'ancien ordre reste en place si l'annulation échoue.
+        """
+        try:
+            rules = self.get_symbol_rules(symbol)
+            params = build_cancel_replace_params(rules, symbol, cancel_order_id, quantity, stop_price)
+            result = self.rate_limiter.call(
+                'cancel_replace_order', self._cancel_replace, self._last_response_headers, **params
+            )
+            logger.info(f"✅ Stop remplacé #{cancel_order_id} → #{result['newOrderResponse']['orderId']} @ {params['stopPrice']}")
+            return result
+        except (binance_exceptions.BinanceAPIException, KeyError) as e:
+            logger.error(f"❌ Erreur cancel-replace: {e}")
+            return None
+    
+    def _cancel_replace(self, **params):
+        # python-binance 1.0.19 n'expose pas order/cancelReplace
+        cancel_replace_order = getattr(self.client, 'cancel_replace_order', None)
+        if cancel_replace_order is None:
+            return self.client._post('order/cancelReplace', True, data=params)
+        return cancel_replace_order(**params)
+    
+    def get_open_orders(self, symbol: str = None):
+        """Ordres ouverts (None si erreur: à distinguer d'une liste vide)"""
+        try:
+            return self._call('get_open_orders', symbol=symbol) if symbol else self._call('get_open_orders')
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur ordres: {e}")
+            return None
+    
+    def get_order(self, symbol: str, order_id: int):
+        """Statut d'un ordre (None si erreur)"""
+        try:
+            return self._call('get_order', symbol=symbol, orderId=order_id)
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur ordre #{order_id}: {e}")
+            return None
+    
+    def get_listen_key(self):
+        """listenKey du user data stream (None si erreur)"""
+        try:
+            return self._call('stream_get_listen_key')
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur listenKey: {e}")
+            return None
+    
+    def keepalive_listen_key(self, listen_key: str):
+        try:
+            self._call('stream_keepalive', listenKey=listen_key)
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur keepalive listenKey: {e}")
+    
+    def cancel_order(self, symbol: str, order_id: int):
+        """Annule ordre"""
+        try:
+            result = self._call('cancel_order', symbol=symbol, orderId=order_id)
+            logger.info(f"Annulé: {result}")
+            return result
+        except binance_exceptions.BinanceAPIException as e:
+            logger.error(f"Erreur annulation: {e}")
             return None
\ No newline at end of file
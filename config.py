@@ -1,34 +1,141 @@
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-class Config:
-    # Binance
-    BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
-    BINANCE_API_SECRET = os.getenv("BINANCE_API_SECRET")
-    BINANCE_TESTNET = os.getenv("BINANCE_TESTNET", "true").lower() == "true"
-    
-    # Claude
-    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-    
-    # Mistral
-    MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
-    
-    # Discord
-    DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
-    
-    # Telegram
-    TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-    TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-    
-    # Trading
-    SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
-    TIMEFRAME = "1h"
-    MAX_RISK_PERCENT = float(os.getenv("MAX_RISK_PERCENT", "2.0"))
-    MAX_POSITIONS = int(os.getenv("MAX_POSITIONS", "2"))
-    STOP_LOSS_PERCENT = float(os.getenv("STOP_LOSS_PERCENT", "3.0"))
-    CHECK_INTERVAL_HOURS = int(os.getenv("CHECK_INTERVAL_HOURS", "1"))
-    
-    # URLs
-    BINANCE_TESTNET_URL = "https://testnet.binance.vision"
\ No newline at end of file
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Config:
+    # Binance
+    BINANCE_API_KEY = os.getenv("BINANCE_API_KEY")
+    BINANCE_API_SECRET = os.getenv("BINANCE_API_SECRET")
+    BINANCE_TESTNET = os.getenv("BINANCE_TESTNET", "true").lower() == "true"
+    
+    # Claude
+    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+    
+    # Mistral
+    MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
+    
+    # Discord
+    DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
+    DISCORD_QUEUE_MAX = int(os.getenv("DISCORD_QUEUE_MAX", "100"))
+    DISCORD_TIMEOUT_SECONDS = float(os.getenv("DISCORD_TIMEOUT_SECONDS", "10"))
+    DISCORD_BATCH_DELAY_SECONDS = float(os.getenv("DISCORD_BATCH_DELAY_SECONDS", "1"))
+    DISCORD_FLUSH_TIMEOUT_SECONDS = float(os.getenv("DISCORD_FLUSH_TIMEOUT_SECONDS", "15"))
+    DISCORD_MAX_RETRIES = int(os.getenv("DISCORD_MAX_RETRIES", "3"))
+    
+    # Telegram
+    TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+    TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+    
+    # Trading
+    SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+    TIMEFRAME = "1h"
+    MAX_RISK_PERCENT = float(os.getenv("MAX_RISK_PERCENT", "2.0"))
+    MAX_POSITIONS = int(os.getenv("MAX_POSITIONS", "2"))
+    STOP_LOSS_PERCENT = float(os.getenv("STOP_LOSS_PERCENT", "3.0"))
+    CHECK_INTERVAL_HOURS = int(os.getenv("CHECK_INTERVAL_HOURS", "1"))
+    CYCLE_WORKERS = int(os.getenv("CYCLE_WORKERS", "4"))
+    PRICE_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("PRICE_SNAPSHOT_MAX_AGE_SECONDS", "60"))
+    # Univers dynamique: top N des paires du quote asset (ticker 24h) au lieu de SYMBOLS
+    UNIVERSE_ENABLED = os.getenv("UNIVERSE_ENABLED", "false").lower() == "true"
+    UNIVERSE_QUOTE_ASSET = os.getenv("UNIVERSE_QUOTE_ASSET", "USDT")
+    UNIVERSE_TOP_N = int(os.getenv("UNIVERSE_TOP_N", "10"))
+    UNIVERSE_MIN_QUOTE_VOLUME = float(os.getenv("UNIVERSE_MIN_QUOTE_VOLUME", "10000000"))
+    UNIVERSE_MIN_RANGE_PCT = float(os.getenv("UNIVERSE_MIN_RANGE_PCT", "2.0"))
+    UNIVERSE_MAX_RANGE_PCT = float(os.getenv("UNIVERSE_MAX_RANGE_PCT", "25.0"))
+    UNIVERSE_MIN_CHANGE_PCT = float(os.getenv("UNIVERSE_MIN_CHANGE_PCT", "-5.0"))
+    # Règles symboles (exchangeInfo complet): rafraîchissement en arrière-plan, 0 = jamais
+    SYMBOL_RULES_REFRESH_SECONDS = float(os.getenv("SYMBOL_RULES_REFRESH_SECONDS", "3600"))
+    
+    # Cache klines
+    KLINE_CACHE_ENABLED = os.getenv("KLINE_CACHE_ENABLED", "true").lower() == "true"
+    KLINE_CACHE_MIN_LIMIT = int(os.getenv("KLINE_CACHE_MIN_LIMIT", "200"))
+    
+    # Store klines persistant (memmap)
+    KLINE_STORE_ENABLED = os.getenv("KLINE_STORE_ENABLED", "true").lower() == "true"
+    KLINE_STORE_DIR = os.getenv("KLINE_STORE_DIR", "data/klines")
+    KLINE_STORE_MIN_HISTORY = int(os.getenv("KLINE_STORE_MIN_HISTORY", "500"))
+    
+    # Indicateurs incrémentaux
+    INDICATOR_ENGINE_ENABLED = os.getenv("INDICATOR_ENGINE_ENABLED", "true").lower() == "true"
+    INDICATOR_STATE_DIR = os.getenv("INDICATOR_STATE_DIR", "data/indicators")
+    
+    # URLs
+    BINANCE_TESTNET_URL = "https://testnet.binance.vision"
+    BINANCE_BASE_URL = os.getenv(
+        "BINANCE_BASE_URL",
+        BINANCE_TESTNET_URL if BINANCE_TESTNET else "https://api.binance.com"
+    )
+    
+    BINANCE_WS_URL = os.getenv(
+        "BINANCE_WS_URL",
+        "wss://testnet.binance.vision" if BINANCE_TESTNET else "wss://stream.binance.com:9443"
+    )
+    
+    # Stream temps réel des positions (trailing + TP/SL à chaque tick)
+    STREAM_MONITOR_ENABLED = os.getenv("STREAM_MONITOR_ENABLED", "false").lower() == "true"
+    STREAM_TYPE = os.getenv("STREAM_TYPE", "bookTicker")
+    STREAM_DEBOUNCE_SECONDS = float(os.getenv("STREAM_DEBOUNCE_SECONDS", "5"))
+    STREAM_MIN_STOP_STEP_PCT = float(os.getenv("STREAM_MIN_STOP_STEP_PCT", "0.2"))
+    # Ordres de sortie: "oco" (TP + SL sur l'exchange) ou "stop" (SL seul, TP logiciel)
+    EXIT_ORDER_MODE = os.getenv("EXIT_ORDER_MODE", "oco")
+    # User data stream (executionReport) → index local des ordres
+    USER_STREAM_ENABLED = os.getenv("USER_STREAM_ENABLED", "true").lower() == "true"
+    USER_STREAM_KEEPALIVE_SECONDS = float(os.getenv("USER_STREAM_KEEPALIVE_SECONDS", "1800"))
+    
+    # Backtest
+    BACKTEST_INITIAL_BALANCE = float(os.getenv("BACKTEST_INITIAL_BALANCE", "1000"))
+    BACKTEST_FEE_PERCENT = float(os.getenv("BACKTEST_FEE_PERCENT", "0.1"))
+    
+    # Paramètres stratégie optimisés (fichier produit par parameter_sweep.py, vide = défauts)
+    STRATEGY_PARAMS_FILE = os.getenv("STRATEGY_PARAMS_FILE", "")
+    
+    # Cache des réponses Mistral (clé = empreinte quantifiée des indicateurs)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.json")
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    LLM_CACHE_PRICE_STEP_PCT = float(os.getenv("LLM_CACHE_PRICE_STEP_PCT", "0.25"))
+    
+    # Analyse Mistral groupée (une requête pour plusieurs symboles par cycle)
+    LLM_BATCH_ENABLED = os.getenv("LLM_BATCH_ENABLED", "true").lower() == "true"
+    LLM_BATCH_MAX_SYMBOLS = int(os.getenv("LLM_BATCH_MAX_SYMBOLS", "8"))
+    LLM_BATCH_TIMEOUT_SECONDS = float(os.getenv("LLM_BATCH_TIMEOUT_SECONDS", "60"))
+    
+    # Budget de latence LLM par cycle + requête de couverture (hedge) + repli
+    LLM_CYCLE_BUDGET_SECONDS = float(os.getenv("LLM_CYCLE_BUDGET_SECONDS", "120"))  # 0 = illimité
+    LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "30"))
+    LLM_HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL", "")  # vide = pas de hedge (ex: open-mistral-nemo)
+    LLM_HEDGE_BASE_URL = os.getenv("LLM_HEDGE_BASE_URL", "")  # vide = API Mistral
+    LLM_HEDGE_API_KEY = os.getenv("LLM_HEDGE_API_KEY", "")  # vide = MISTRAL_API_KEY
+    LLM_HEDGE_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DELAY_SECONDS", "8"))
+    LLM_FALLBACK = os.getenv("LLM_FALLBACK", "hold")  # "hold" ou "rules"
+    LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "500"))
+    
+    # Enregistrement / rejeu du trafic HTTP (bench et profiling hors ligne)
+    HTTP_TAPE_MODE = os.getenv("HTTP_TAPE_MODE", "")  # "record", "replay" ou vide
+    HTTP_TAPE_PATH = os.getenv("HTTP_TAPE_PATH", "data/http_tape.jsonl.gz")
+    HTTP_REPLAY_LATENCY_SCALE = float(os.getenv("HTTP_REPLAY_LATENCY_SCALE", "0"))  # 1 = latence enregistrée
+    
+    # État persistant (positions, stats, marqueurs de rapport) en SQLite WAL
+    STATE_STORE_ENABLED = os.getenv("STATE_STORE_ENABLED", "true").lower() == "true"
+    STATE_DB_PATH = os.getenv("STATE_DB_PATH", "data/state.db")
+    
+    # Métriques: endpoint Prometheus (localhost, port 0 = désactivé) + snapshot JSON périodique
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+    METRICS_SNAPSHOT_PATH = os.getenv("METRICS_SNAPSHOT_PATH", "data/metrics.json")
+    METRICS_SNAPSHOT_SECONDS = float(os.getenv("METRICS_SNAPSHOT_SECONDS", "60"))
+    
+    # Rate limit Binance (REQUEST_WEIGHT / minute) + retry
+    BINANCE_WEIGHT_LIMIT = int(os.getenv("BINANCE_WEIGHT_LIMIT", "6000"))
+    BINANCE_WEIGHT_HEADROOM = float(os.getenv("BINANCE_WEIGHT_HEADROOM", "0.9"))
+    BINANCE_MAX_RETRIES = int(os.getenv("BINANCE_MAX_RETRIES", "4"))
+    BINANCE_RETRY_BASE_SECONDS = float(os.getenv("BINANCE_RETRY_BASE_SECONDS", "0.5"))
+    BINANCE_RETRY_MAX_SECONDS = float(os.getenv("BINANCE_RETRY_MAX_SECONDS", "30"))
+    
+    # Client exchange: "sync" (python-binance) ou "async" (aiohttp keep-alive)
+    EXCHANGE_CLIENT = os.getenv("EXCHANGE_CLIENT", "sync").lower()
+    EXCHANGE_POOL_SIZE = int(os.getenv("EXCHANGE_POOL_SIZE", "20"))
+    EXCHANGE_TIMEOUT_SECONDS = float(os.getenv("EXCHANGE_TIMEOUT_SECONDS", "10"))
\ No newline at end of file
@@ -1,81 +1,234 @@
-import requests
-from config import Config
-import logging
-from datetime import datetime
-
-logger = logging.getLogger(__name__)
-
-class DiscordNotifier:
-    def __init__(self):
-        self.webhook_url = Config.DISCORD_WEBHOOK_URL
-
-    def send_message(self, message: str, color: int = 3447003):
-        """Envoie message Discord avec embed"""
-        try:
-            data = {
-                "embeds": [{
-                    "description": message,
-                    "color": color,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "footer": {
-                        "text": "🤖 Binance Trading Bot"
-                    }
-                }]
-            }
-
-            response = requests.post(self.webhook_url, json=data)
-
-            if response.status_code == 204:
-                logger.info("✅ Discord notification envoyée")
-            else:
-                logger.error(f"❌ Erreur Discord: {response.status_code} - {response.text}")
-
-        except Exception as e:
-            logger.error(f"❌ Erreur Discord: {e}")
-
-    def notify_trade(self, action: str, symbol: str, price: float, quantity: float, reasoning: str):
-        """Notification d'achat/vente"""
-        color = 3066993 if action == "BUY" else 15158332  # Vert ou Rouge
-        emoji = "🟢" if action == "BUY" else "🔴"
-
-        notional = price * quantity
-
-        msg = f"""
-{emoji} **{action} {symbol}**
-
-💰 **Prix:** ${price:,.2f}
-📊 **Quantité:** {quantity:.6f}
-💵 **Montant:** ${notional:,.2f}
-💡 **Analyse IA:** {reasoning}
-        """
-        self.send_message(msg.strip(), color)
-
-    def notify_stop_loss(self, symbol: str, entry: float, exit: float, loss: float):
-        """Notification stop loss"""
-        pct = ((exit - entry) / entry * 100)
-
-        msg = f"""
-⛔ **STOP LOSS DÉCLENCHÉ - {symbol}**
-
-📉 **Prix entrée:** ${entry:,.2f}
-📉 **Prix sortie:** ${exit:,.2f}
-💸 **Perte:** ${abs(loss):,.2f} ({pct:.2f}%)
-        """
-        self.send_message(msg.strip(), 15158332)  # Rouge
-
-    def notify_take_profit(self, symbol: str, entry: float, exit: float, profit: float):
-        """Notification take profit"""
-        pct = ((exit - entry) / entry * 100)
-
-        msg = f"""
-🎯 **TAKE PROFIT ATTEINT - {symbol}**
-
-📈 **Prix entrée:** ${entry:,.2f}
-📈 **Prix sortie:** ${exit:,.2f}
-💰 **Profit:** ${profit:,.2f} (+{pct:.2f}%)
-        """
-        self.send_message(msg.strip(), 3066993)  # Vert
-
-    def notify(self, message: str):
-        """Message simple"""
-        self.send_message(message, 3447003)  # Bleu
\ No newline at end of file
+import threading
+import time
+import requests
+from collections import deque
+from config import Config
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Priorités des notifications: LOW fusionnable/supprimable sous charge, HIGH jamais perdue
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+# Limites webhook Discord
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_DESCRIPTION = 4096
+MAX_MESSAGE_CHARS = 6000
+
+
+class DiscordDispatcher:
+    """File d'envoi webhook en arrière-plan
+
+    Regroupe jusqu'à 10 embeds par appel, respecte `retry_after` sur les 429 et,
+    quand la file est pleine, fusionne ou supprime les messages LOW.
+    """
+
+    def __init__(self, webhook_url: str, max_queue: int = None, timeout: float = None, batch_delay: float = None):
+        self.webhook_url = webhook_url
+        self.max_queue = max_queue if max_queue is not None else Config.DISCORD_QUEUE_MAX
+        self.timeout = timeout if timeout is not None else Config.DISCORD_TIMEOUT_SECONDS
+        self.batch_delay = batch_delay if batch_delay is not None else Config.DISCORD_BATCH_DELAY_SECONDS
+        self._queue = deque()  # (priority, embed)
+        self._cond = threading.Condition()
+        self._closing = False
+        self.sent = 0
+        self.dropped = 0
+        self.merged = 0
+        self._thread = threading.Thread(target=self._run, name="discord-dispatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, embed: dict, priority: int = PRIORITY_NORMAL):
+        """Met un embed en file (ne bloque jamais)"""
+        with self._cond:
+            if self._closing:
+                logger.warning("Discord: dispatcher arrêté, message ignoré")
+                return
+            if len(self._queue) >= self.max_queue and not self._make_room(embed, priority):
+                return
+            self._queue.append((priority, embed))
+            self._cond.notify()
+
+    def _make_room(self, embed: dict, priority: int) -> bool:
+        """File pleine (sous verrou): True si l'embed doit quand même être ajouté"""
+        if priority == PRIORITY_LOW:
+            # Fusion dans le dernier message LOW en attente si la taille le permet
+            for queued_priority, queued in reversed(self._queue):
+                if queued_priority != PRIORITY_LOW:
+                    continue
+                merged = f"{queued['description']}\n\n{embed['description']}"
+                if len(merged) <= MAX_EMBED_DESCRIPTION:
+                    queued['description'] = merged
+                    self.merged += 1
+                    return False
+                break
+            self.dropped += 1
+            return False
+
+        # Place prise au plus ancien message LOW; sinon NORMAL perdu, HIGH ajouté quand même
+        for i, (queued_priority, _) in enumerate(self._queue):
+            if queued_priority == PRIORITY_LOW:
+                del self._queue[i]
+                self.dropped += 1
+                return True
+        if priority == PRIORITY_HIGH:
+            return True
+        self.dropped += 1
+        logger.warning("Discord: file pleine, notification supprimée")
+        return False
+
+    def close(self, timeout: float = None):
+        """Vide la file puis arrête le thread (attente max `timeout` s)"""
+        timeout = timeout if timeout is not None else Config.DISCORD_FLUSH_TIMEOUT_SECONDS
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Discord: {len(self._queue)} notifications non envoyées à l'arrêt")
+
+    def stats(self) -> dict:
+        return {'sent': self.sent, 'dropped': self.dropped, 'merged': self.merged, 'queued': len(self._queue)}
+
+    def _next_batch(self) -> list:
+        """Attend puis retire jusqu'à 10 embeds (None si arrêt et file vide)"""
+        with self._cond:
+            while not self._queue and not self._closing:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            if not self._closing and self.batch_delay > 0:
+                # Laisse les notifications du même instant se regrouper
+                self._cond.wait_for(lambda: self._closing or len(self._queue) >= MAX_EMBEDS_PER_MESSAGE,
+                                    self.batch_delay)
+
+            batch, chars = [], 0
+            while self._queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+                embed = self._queue[0][1]
+                size = len(embed['description']) + len(embed['footer']['text'])
+                if batch and chars + size > MAX_MESSAGE_CHARS:
+                    break
+                batch.append(self._queue.popleft())
+                chars += size
+            return batch
+
+    def _requeue(self, batch: list):
+        with self._cond:
+            self._queue.extendleft(reversed(batch))
+
+    def _run(self):
+        failures = 0
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            try:
+                response = requests.post(
+                    self.webhook_url,
+                    json={"embeds": [embed for _, embed in batch]},
+                    timeout=self.timeout
+                )
+            except Exception as e:
+                response = None
+                logger.error(f"❌ Erreur Discord: {e}")
+
+            if response is not None and response.status_code in (200, 204):
+                logger.info(f"✅ Discord: {len(batch)} notification(s) envoyée(s)")
+                self.sent += len(batch)
+                failures = 0
+                continue
+
+            if response is not None and response.status_code == 429:
+                try:
+                    retry_after = float(response.json().get('retry_after', 1))
+                except ValueError:
+                    retry_after = float(response.headers.get('Retry-After', 1))
+                logger.warning(f"⏳ Discord rate limit, reprise dans {retry_after:.1f}s")
+                self._requeue(batch)
+                time.sleep(retry_after)
+                continue
+
+            if response is not None and response.status_code < 500:
+                logger.error(f"❌ Erreur Discord: {response.status_code} - {response.text}")
+                self.dropped += len(batch)
+                continue
+
+            # Erreur réseau / 5xx: quelques tentatives espacées, abandon à l'arrêt
+            failures += 1
+            if failures > Config.DISCORD_MAX_RETRIES or self._closing:
+                self.dropped += len(batch)
+                failures = 0
+                continue
+            self._requeue(batch)
+            time.sleep(min(2 ** failures, 30))
+
+
+class DiscordNotifier:
+    def __init__(self):
+        self.webhook_url = Config.DISCORD_WEBHOOK_URL
+        self.dispatcher = DiscordDispatcher(self.webhook_url)
+
+    def send_message(self, message: str, color: int = 3447003, priority: int = PRIORITY_NORMAL):
+        """Met en file un message Discord avec embed (envoi en arrière-plan)"""
+        self.dispatcher.submit({
+            "description": message[:MAX_EMBED_DESCRIPTION],
+            "color": color,
+            "timestamp": datetime.utcnow().isoformat(),
+            "footer": {
+                "text": "🤖 Binance Trading Bot"
+            }
+        }, priority)
+
+    def close(self):
+        """Envoie les notifications en attente (à l'arrêt)"""
+        self.dispatcher.close()
+
+    def notify_trade(self, action: str, symbol: str, price: float, quantity: float, reasoning: str):
+        """Notification d'achat/vente"""
+        color = 3066993 if action == "BUY" else 15158332  # Vert ou Rouge
+        emoji = "🟢" if action == "BUY" else "🔴"
+
+        notional = price * quantity
+
+        msg = f"""
+{emoji} **{action} {symbol}**
+
+💰 **Prix:** ${price:,.2f}
+📊 **Quantité:** {quantity:.6f}
+💵 **Montant:** ${notional:,.2f}
+💡 **Analyse IA:** {reasoning}
+        """
+        self.send_message(msg.strip(), color, PRIORITY_HIGH)
+
+    def notify_stop_loss(self, symbol: str, entry: float, exit: float, loss: float):
+        """Notification stop loss"""
+        pct = ((exit - entry) / entry * 100)
+
+        msg = f"""
+⛔ **STOP LOSS DÉCLENCHÉ - {symbol}**
+
+📉 **Prix entrée:** ${entry:,.2f}
+📉 **Prix sortie:** ${exit:,.2f}
+💸 **Perte:** ${abs(loss):,.2f} ({pct:.2f}%)
+        """
+        self.send_message(msg.strip(), 15158332, PRIORITY_HIGH)  # Rouge
+
+    def notify_take_profit(self, symbol: str, entry: float, exit: float, profit: float):
+        """Notification take profit"""
+        pct = ((exit - entry) / entry * 100)
+
+        msg = f"""
+🎯 **TAKE PROFIT ATTEINT - {symbol}**
+
+📈 **Prix entrée:** ${entry:,.2f}
+📈 **Prix sortie:** ${exit:,.2f}
+💰 **Profit:** ${profit:,.2f} (+{pct:.2f}%)
+        """
+        self.send_message(msg.strip(), 3066993, PRIORITY_HIGH)  # Vert
+
+    def notify(self, message: str, priority: int = PRIORITY_NORMAL):
+        """Message simple"""
+        self.send_message(message, 3447003, priority)  # Bleu
@@ -0,0 +1,244 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import aiohttp
+import requests
+from multidict import CIMultiDict, CIMultiDictProxy
+from requests.structures import CaseInsensitiveDict
+from yarl import URL
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Paramètres qui changent à chaque appel (signature Binance): exclus de la clé
+VOLATILE_PARAMS = {'timestamp', 'signature'}
+
+# Headers de réponse conservés (rate limit Binance, retry)
+KEPT_HEADERS = ('content-type', 'retry-after', 'x-mbx-')
+
+# Secrets portés par le chemin de l'URL (token du webhook Discord): jamais écrits dans la tape
+SECRET_PATHS = re.compile(r'(/api/webhooks/[^/]+/)[^/?#]+')
+
+
+class TapeMiss(Exception):
+    """Aucune réponse enregistrée pour cette requête"""
+
+
+def _normalize_query(query: str) -> str:
+    return urlencode(sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in VOLATILE_PARAMS))
+
+
+def request_key(method: str, url: str, body=None) -> tuple:
+    """(méthode, URL normalisée, hash du corps) — stable d'une exécution à l'autre"""
+    parts = urlsplit(str(url))
+    path = SECRET_PATHS.sub(r'\1<redacted>', parts.path)
+    normalized_url = urlunsplit((parts.scheme, parts.netloc, path, _normalize_query(parts.query), ''))
+
+    if body is None or body == b'' or body == '':
+        return method.upper(), normalized_url, ''
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    if not isinstance(body, str):
+        body = json.dumps(body, sort_keys=True)
+    else:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True)
+        except ValueError:
+            body = _normalize_query(body)
+    return method.upper(), normalized_url, hashlib.sha1(body.encode()).hexdigest()[:16]
+
+
+class TapeResponse:
+    """Réponse HTTP minimale commune au live aiohttp et au replay"""
+
+    def __init__(self, status: int, headers, text: str, method: str, url: str):
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.text = text
+        self.request_info = aiohttp.RequestInfo(URL(url), method, CIMultiDictProxy(CIMultiDict()), URL(url))
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(self.request_info, (), status=self.status, message=self.text[:200])
+
+
+class HttpTape:
+    """Enregistrement / rejeu des échanges HTTP sortants (JSON lines gzip)
+
+    record: nouveau fichier, chaque échange y est écrit dès sa réception.
+    replay: les réponses sont servies dans l'ordre d'enregistrement, par clé exacte
+    (méthode + URL + corps) puis par méthode + URL; une clé épuisée rejoue sa dernière
+    réponse. latency_scale > 0 rejoue la latence enregistrée (multipliée).
+    """
+
+    def __init__(self, path: str, mode: str, latency_scale: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Mode tape inconnu: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._file = None
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+        self._entries = []
+        self._by_key = defaultdict(deque)
+        self._by_url = defaultdict(deque)
+        self._last_by_key = {}
+        self._last_by_url = {}
+        self._consumed = set()
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    self._entries.append(json.loads(line))
+        for index, entry in enumerate(self._entries):
+            self._by_key[(entry['m'], entry['u'], entry['b'])].append(index)
+            self._by_url[(entry['m'], entry['u'])].append(index)
+        logger.info(f"📼 Replay HTTP: {len(self._entries)} échanges chargés depuis {self.path}")
+
+    def _next(self, queue: deque):
+        while queue and queue[0] in self._consumed:
+            queue.popleft()
+        return queue.popleft() if queue else None
+
+    def lookup(self, method: str, url: str, body=None) -> dict:
+        """Entrée enregistrée pour cette requête (TapeMiss si aucune)"""
+        key = request_key(method, url, body)
+        with self._lock:
+            index = self._next(self._by_key[key])
+            if index is None:
+                index = self._next(self._by_url[key[:2]])
+            if index is None:
+                index = self._last_by_key.get(key, self._last_by_url.get(key[:2]))
+            if index is None:
+                self.misses += 1
+                raise TapeMiss(f"{key[0]} {key[1]}")
+
+            self._consumed.add(index)
+            self._last_by_key[key] = index
+            self._last_by_url[key[:2]] = index
+            self.replayed += 1
+            return self._entries[index]
+
+    def record(self, method: str, url: str, body, status: int, headers, text: str, latency: float):
+        m, u, b = request_key(method, url, body)
+        entry = {
+            'm': m, 'u': u, 'b': b, 's': status,
+            'h': {k: v for k, v in headers.items() if k.lower().startswith(KEPT_HEADERS)},
+            't': text, 'l': round(latency, 4)
+        }
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+            self._file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            self._file.flush()
+            self.recorded += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def replay_delay(self, entry: dict) -> float:
+        return entry['l'] * self.latency_scale
+
+    def stats(self) -> dict:
+        return {'mode': self.mode, 'recorded': self.recorded, 'replayed': self.replayed, 'misses': self.misses}
+
+
+_active_tape = None
+_original_send = requests.Session.send
+
+
+def get_tape():
+    return _active_tape
+
+
+def _tape_send(session, request, **kwargs):
+    """requests.Session.send via la tape (python-binance, Discord, sentiment)"""
+    tape = _active_tape
+    if tape is None:
+        return _original_send(session, request, **kwargs)
+
+    if tape.mode == "record":
+        started = time.monotonic()
+        response = _original_send(session, request, **kwargs)
+        tape.record(request.method, request.url, request.body, response.status_code,
+                    response.headers, response.text, time.monotonic() - started)
+        return response
+
+    try:
+        entry = tape.lookup(request.method, request.url, request.body)
+    except TapeMiss as e:
+        raise requests.exceptions.ConnectionError(f"Replay HTTP: pas d'enregistrement pour {e}", request=request)
+    time.sleep(tape.replay_delay(entry))
+
+    response = requests.Response()
+    response.status_code = entry['s']
+    response.headers = CaseInsensitiveDict(entry['h'])
+    response._content = entry['t'].encode('utf-8')
+    response.encoding = 'utf-8'
+    response.url = request.url
+    response.request = request
+    response.reason = "REPLAY"
+    return response
+
+
+async def aiohttp_request(session: aiohttp.ClientSession, method: str, url: str, **kwargs) -> TapeResponse:
+    """Requête aiohttp (live, enregistrée ou rejouée) → TapeResponse"""
+    tape = _active_tape
+    body = kwargs.get('json', kwargs.get('data'))
+
+    if tape is not None and tape.mode == "replay":
+        try:
+            entry = tape.lookup(method, url, body)
+        except TapeMiss as e:
+            raise aiohttp.ClientConnectionError(f"Replay HTTP: pas d'enregistrement pour {e}")
+        await asyncio.sleep(tape.replay_delay(entry))
+        return TapeResponse(entry['s'], entry['h'], entry['t'], method, url)
+
+    started = time.monotonic()
+    async with session.request(method, url, **kwargs) as response:
+        text = await response.text()
+        result = TapeResponse(response.status, response.headers, text, method, url)
+    if tape is not None:
+        tape.record(method, url, body, result.status, result.headers, text, time.monotonic() - started)
+    return result
+
+
+def install(tape: HttpTape = None):
+    """Active la tape pour tout le process (None = désactive)"""
+    global _active_tape
+    _active_tape = tape
+    requests.Session.send = _tape_send if tape is not None else _original_send
+
+
+def install_from_config():
+    """Tape selon HTTP_TAPE_MODE ("record" / "replay", vide = réseau direct)"""
+    if not Config.HTTP_TAPE_MODE:
+        return None
+    tape = HttpTape(Config.HTTP_TAPE_PATH, Config.HTTP_TAPE_MODE, Config.HTTP_REPLAY_LATENCY_SCALE)
+    install(tape)
+    logger.info(f"📼 Tape HTTP active: {Config.HTTP_TAPE_MODE} ({Config.HTTP_TAPE_PATH})")
+    return tape
@@ -0,0 +1,509 @@
+import json
+import math
+import os
+import threading
+import time
+import logging
+from collections import deque
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+# Indicateurs calculés par l'engine (mêmes paramètres que `ta`)
+ALL_INDICATORS = (
+    'ema_20', 'ema_50', 'ema_200', 'rsi', 'macd', 'macd_signal',
+    'bb_high', 'bb_low', 'atr'
+)
+
+
+class _Ema:
+    """EMA `ta` (ewm span=window, adjust=False, min_periods=window)"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.value = None
+        self.count = 0
+
+    def _next(self, x: float) -> float:
+        if self.value is None:
+            return x
+        alpha = 2.0 / (self.window + 1)
+        return (1 - alpha) * self.value + alpha * x
+
+    def update(self, x: float):
+        self.value = self._next(x)
+        self.count += 1
+
+    def current(self) -> float:
+        return self.value if self.count >= self.window else NAN
+
+    def peek(self, x: float) -> float:
+        return self._next(x) if self.count + 1 >= self.window else NAN
+
+
+class _Rsi:
+    """RSI `ta` (moyennes de Wilder, alpha=1/window)"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.prev_close = None
+        self.up = None
+        self.down = None
+        self.count = 0
+
+    def _next(self, x: float):
+        if self.prev_close is None:
+            gain = loss = 0.0
+        else:
+            diff = x - self.prev_close
+            gain = diff if diff > 0 else 0.0
+            loss = -diff if diff < 0 else 0.0
+        if self.up is None:
+            return gain, loss
+        alpha = 1.0 / self.window
+        return (1 - alpha) * self.up + alpha * gain, (1 - alpha) * self.down + alpha * loss
+
+    def _value(self, up: float, down: float, count: int) -> float:
+        if count < self.window:
+            return NAN
+        if down == 0:
+            return 100.0
+        return 100 - (100 / (1 + up / down))
+
+    def update(self, x: float):
+        self.up, self.down = self._next(x)
+        self.prev_close = x
+        self.count += 1
+
+    def current(self) -> float:
+        return self._value(self.up, self.down, self.count)
+
+    def peek(self, x: float) -> float:
+        up, down = self._next(x)
+        return self._value(up, down, self.count + 1)
+
+
+class _Macd:
+    """MACD `ta` (12/26/9), le signal démarre à la première valeur MACD valide"""
+
+    def __init__(self):
+        self.fast = _Ema(12)
+        self.slow = _Ema(26)
+        self.signal = _Ema(9)
+
+    def update(self, x: float):
+        self.fast.update(x)
+        self.slow.update(x)
+        if self.slow.count >= self.slow.window:
+            self.signal.update(self.fast.value - self.slow.value)
+
+    def current(self):
+        if self.slow.count < self.slow.window:
+            return NAN, NAN
+        return self.fast.value - self.slow.value, self.signal.current()
+
+    def peek(self, x: float):
+        if self.slow.count + 1 < self.slow.window:
+            return NAN, NAN
+        line = self.fast._next(x) - self.slow._next(x)
+        return line, self.signal.peek(line)
+
+
+class _Bollinger:
+    """Bandes de Bollinger `ta` (20, 2 écarts-types, ddof=0)"""
+
+    def __init__(self, window: int = 20, window_dev: int = 2):
+        self.window = window
+        self.window_dev = window_dev
+        self.values = deque(maxlen=window)
+
+    def _bands(self, values) -> tuple:
+        if len(values) < self.window:
+            return NAN, NAN
+        mean = math.fsum(values) / self.window
+        std = math.sqrt(math.fsum((v - mean) ** 2 for v in values) / self.window)
+        return mean + self.window_dev * std, mean - self.window_dev * std
+
+    def update(self, x: float):
+        self.values.append(x)
+
+    def current(self) -> tuple:
+        return self._bands(self.values)
+
+    def peek(self, x: float) -> tuple:
+        values = list(self.values)[-(self.window - 1):] + [x]
+        return self._bands(values)
+
+
+class _Atr:
+    """ATR `ta` (moyenne simple des `window` premiers TR puis lissage de Wilder)"""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.prev_close = None
+        self.tr_sum = 0.0
+        self.value = 0.0
+        self.count = 0
+
+    def _next(self, high: float, low: float):
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        count = self.count + 1
+        if count < self.window:
+            return self.tr_sum + tr, 0.0
+        if count == self.window:
+            return self.tr_sum + tr, (self.tr_sum + tr) / self.window
+        return self.tr_sum, (self.value * (self.window - 1) + tr) / self.window
+
+    def update(self, high: float, low: float, close: float):
+        self.tr_sum, self.value = self._next(high, low)
+        self.prev_close = close
+        self.count += 1
+
+    def current(self) -> float:
+        return self.value
+
+    def peek(self, high: float, low: float) -> float:
+        return self._next(high, low)[1]
+
+
+class _SeriesState:
+    """État streaming de tous les indicateurs d'une paire (symbol, interval)"""
+
+    def __init__(self):
+        self.first_open_time = None
+        self.last_open_time = None
+        self.ema = {20: _Ema(20), 50: _Ema(50), 200: _Ema(200)}
+        self.rsi = _Rsi(14)
+        self.macd = _Macd()
+        self.bb = _Bollinger(20, 2)
+        self.atr = _Atr(14)
+
+    def update(self, high: float, low: float, close: float):
+        for ema in self.ema.values():
+            ema.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.bb.update(close)
+        self.atr.update(high, low, close)
+
+    def current(self) -> dict:
+        macd, macd_signal = self.macd.current()
+        bb_high, bb_low = self.bb.current()
+        return {
+            'ema_20': self.ema[20].current(),
+            'ema_50': self.ema[50].current(),
+            'ema_200': self.ema[200].current(),
+            'rsi': self.rsi.current(),
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'bb_high': bb_high,
+            'bb_low': bb_low,
+            'atr': self.atr.current()
+        }
+
+    def peek(self, high: float, low: float, close: float) -> dict:
+        """Valeurs si la bougie en cours clôturait maintenant (état inchangé)"""
+        macd, macd_signal = self.macd.peek(close)
+        bb_high, bb_low = self.bb.peek(close)
+        return {
+            'ema_20': self.ema[20].peek(close),
+            'ema_50': self.ema[50].peek(close),
+            'ema_200': self.ema[200].peek(close),
+            'rsi': self.rsi.peek(close),
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'bb_high': bb_high,
+            'bb_low': bb_low,
+            'atr': self.atr.peek(high, low)
+        }
+
+    def to_dict(self) -> dict:
+        def dump(obj):
+            return {k: (list(v) if isinstance(v, deque) else v) for k, v in vars(obj).items()}
+
+        return {
+            'first_open_time': self.first_open_time,
+            'last_open_time': self.last_open_time,
+            'ema': {str(w): dump(e) for w, e in self.ema.items()},
+            'rsi': dump(self.rsi),
+            'macd': {name: dump(getattr(self.macd, name)) for name in ('fast', 'slow', 'signal')},
+            'bb': dump(self.bb),
+            'atr': dump(self.atr)
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> '_SeriesState':
+        state = cls()
+        state.first_open_time = data['first_open_time']
+        state.last_open_time = data['last_open_time']
+        for w, values in data['ema'].items():
+            vars(state.ema[int(w)]).update(values)
+        vars(state.rsi).update(data['rsi'])
+        for name, values in data['macd'].items():
+            vars(getattr(state.macd, name)).update(values)
+        vars(state.bb).update(data['bb'])
+        state.bb.values = deque(data['bb']['values'], maxlen=state.bb.window)
+        vars(state.atr).update(data['atr'])
+        return state
+
+
+class IndicatorEngine:
+    """Indicateurs incrémentaux O(1) par bougie clôturée, état par (symbol, interval, indicateur)
+
+    Sur une même série, les valeurs sont celles de `ta`. L'état continue ensuite
+    bougie par bougie au lieu de recalculer sur une fenêtre tronquée.
+    """
+
+    def __init__(self, state_dir: str = None):
+        self.state_dir = state_dir
+        self._states = {}
+        self._lock = threading.Lock()
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+
+    def snapshot(self, symbol: str, interval: str, klines: dict) -> dict:
+        """Dernières valeurs (bougie en cours incluse) à partir des klines en colonnes"""
+        open_time = klines['open_time']
+        if len(open_time) == 0:
+            return {}
+
+        high, low, close = klines['high'], klines['low'], klines['close']
+        is_open = int(klines['close_time'][-1]) >= int(time.time() * 1000)
+        closed = len(open_time) - 1 if is_open else len(open_time)
+
+        with self._lock:
+            state = self._get_state(symbol, interval)
+            start = self._resume_index(state, open_time, closed)
+            if start is None:
+                # Premier passage, trou dans la série ou historique plus long dispo
+                state = _SeriesState()
+                self._states[(symbol, interval)] = state
+                start = 0
+
+            for i in range(start, closed):
+                state.update(float(high[i]), float(low[i]), float(close[i]))
+
+            if start < closed:
+                if state.first_open_time is None:
+                    state.first_open_time = int(open_time[0])
+                state.last_open_time = int(open_time[closed - 1])
+                self._checkpoint(symbol, interval, state)
+
+            if is_open:
+                values = state.peek(float(high[-1]), float(low[-1]), float(close[-1]))
+            else:
+                values = state.current()
+
+        values['close'] = float(close[-1])
+        return values
+
+    def _resume_index(self, state: _SeriesState, open_time, closed: int):
+        """Index de la première bougie clôturée pas encore ingérée (None = réinitialiser)"""
+        if state is None or state.last_open_time is None:
+            return None
+        if closed == 0:
+            return 0
+        if int(open_time[0]) < state.first_open_time:
+            return None
+        if state.last_open_time >= int(open_time[closed - 1]):
+            return closed
+        idx = int(np.searchsorted(open_time[:closed], state.last_open_time))
+        if idx < closed and int(open_time[idx]) == state.last_open_time:
+            return idx + 1
+        return None
+
+    def _get_state(self, symbol: str, interval: str):
+        key = (symbol, interval)
+        if key not in self._states:
+            self._states[key] = self._load(symbol, interval)
+        return self._states[key]
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.state_dir, f"{symbol}_{interval}.json")
+
+    def _load(self, symbol: str, interval: str):
+        if not self.state_dir:
+            return None
+        try:
+            with open(self._path(symbol, interval)) as f:
+                return _SeriesState.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Checkpoint indicateurs {symbol} {interval} illisible: {e}")
+            return None
+
+    def _checkpoint(self, symbol: str, interval: str, state: _SeriesState):
+        if not self.state_dir:
+            return
+        try:
+            path = self._path(symbol, interval)
+            with open(path + '.tmp', 'w') as f:
+                json.dump(state.to_dict(), f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logger.error(f"Erreur checkpoint indicateurs {symbol} {interval}: {e}")
+
+
+def ewm(values, alpha: float, min_periods: int = 1):
+    """EWM `ta` (adjust=False) sur le dernier axe, sans boucle par bougie
+
+    Récurrence résolue par blocs: y_k = d^(k+1) * (y_p + alpha * cumsum(x_j * d^-(j+1))),
+    bloc borné pour que d^-B reste loin de l'overflow. Accepte une série ou une
+    matrice (symboles × bougies), chaque ligne étant lissée indépendamment.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    out = np.full(x.shape, NAN)
+    n = x.shape[-1]
+    if n == 0:
+        return out
+
+    decay = 1.0 - alpha
+    block = max(1, int(23 / -math.log(decay)))
+    out[..., 0] = x[..., 0]
+    prev = out[..., :1]
+    for start in range(1, n, block):
+        chunk = x[..., start:start + block]
+        powers = decay ** np.arange(1, chunk.shape[-1] + 1)
+        out[..., start:start + chunk.shape[-1]] = powers * (prev + alpha * np.cumsum(chunk / powers, axis=-1))
+        prev = out[..., start + chunk.shape[-1] - 1:start + chunk.shape[-1]]
+
+    out[..., :min_periods - 1] = NAN
+    return out
+
+
+def indicator_series(klines: dict) -> dict:
+    """Séries complètes des indicateurs (mêmes valeurs que `ta`), en opérations NumPy vectorisées
+
+    Les colonnes peuvent être des séries ou des matrices (symboles × bougies): tous les
+    calculs portent sur le dernier axe.
+    """
+    close = np.asarray(klines['close'], dtype=np.float64)
+    high = np.asarray(klines['high'], dtype=np.float64)
+    low = np.asarray(klines['low'], dtype=np.float64)
+    n = close.shape[-1]
+    series = {'close': close}
+
+    for window in (20, 50, 200):
+        series[f'ema_{window}'] = ewm(close, 2.0 / (window + 1), window)
+
+    # RSI: moyennes de Wilder des hausses/baisses (premier écart = 0 comme `ta`)
+    diff = np.diff(close, axis=-1, prepend=close[..., :1])
+    up = ewm(np.maximum(diff, 0.0), 1.0 / 14, 14)
+    down = ewm(np.maximum(-diff, 0.0), 1.0 / 14, 14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        series['rsi'] = np.where(down == 0, np.where(np.isnan(up), NAN, 100.0), 100 - 100 / (1 + up / down))
+
+    # MACD 12/26/9, signal démarré à la première valeur MACD valide
+    macd = ewm(close, 2.0 / 13, 26) - ewm(close, 2.0 / 27, 26)
+    macd_signal = np.full(close.shape, NAN)
+    if n >= 26:
+        macd_signal[..., 25:] = ewm(macd[..., 25:], 2.0 / 10, 9)
+    series['macd'] = macd
+    series['macd_signal'] = macd_signal
+
+    # Bollinger 20, 2 écarts-types (ddof=0)
+    bb_high = np.full(close.shape, NAN)
+    bb_low = np.full(close.shape, NAN)
+    if n >= 20:
+        windows = np.lib.stride_tricks.sliding_window_view(close, 20, axis=-1)
+        mean = windows.mean(axis=-1)
+        std = windows.std(axis=-1)
+        bb_high[..., 19:] = mean + 2 * std
+        bb_low[..., 19:] = mean - 2 * std
+    series['bb_high'] = bb_high
+    series['bb_low'] = bb_low
+
+    # ATR 14: moyenne simple des 14 premiers TR puis lissage de Wilder (0 avant, comme `ta`)
+    prev_close = np.concatenate((close[..., :1], close[..., :-1]), axis=-1)
+    tr = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    if n:
+        tr[..., 0] = high[..., 0] - low[..., 0]
+    atr = np.zeros(close.shape)
+    if n >= 14:
+        seed = tr[..., :14].mean(axis=-1, keepdims=True)
+        atr[..., 13:] = ewm(np.concatenate((seed, tr[..., 14:]), axis=-1), 1.0 / 14)
+    series['atr'] = atr
+
+    return series
+
+
+def batch_snapshots(klines_by_symbol: dict) -> dict:
+    """Dernières valeurs des indicateurs de plusieurs symboles en un passage vectorisé
+
+    klines_by_symbol: {symbol: klines en colonnes}. Les séries de même longueur sont
+    empilées en une matrice (symboles × bougies); une longueur différente (listing
+    récent) forme son propre groupe. Mêmes valeurs que `ta_snapshot` sur chaque série.
+    """
+    groups = {}
+    for symbol, klines in klines_by_symbol.items():
+        if len(klines['close']):
+            groups.setdefault(len(klines['close']), []).append(symbol)
+
+    snapshots = {}
+    for symbols in groups.values():
+        series = indicator_series({
+            column: np.stack([np.asarray(klines_by_symbol[s][column], dtype=np.float64) for s in symbols])
+            for column in ('close', 'high', 'low')
+        })
+        last = {name: values[:, -1] for name, values in series.items()}
+        for row, symbol in enumerate(symbols):
+            snapshots[symbol] = {name: float(values[row]) for name, values in last.items()}
+    return snapshots
+
+
+def ta_snapshot(klines: dict, names=ALL_INDICATORS) -> dict:
+    """Calcul de référence avec `ta` sur toute la série (dernières valeurs)"""
+    import pandas as pd
+    import ta
+
+    close = pd.Series(klines['close'])
+    values = {'close': float(close.iloc[-1])}
+
+    for window in (20, 50, 200):
+        if f'ema_{window}' in names:
+            values[f'ema_{window}'] = ta.trend.EMAIndicator(close, window=window).ema_indicator().iloc[-1]
+
+    if 'rsi' in names:
+        values['rsi'] = ta.momentum.RSIIndicator(close, window=14).rsi().iloc[-1]
+
+    if 'macd' in names or 'macd_signal' in names:
+        macd = ta.trend.MACD(close)
+        values['macd'] = macd.macd().iloc[-1]
+        values['macd_signal'] = macd.macd_signal().iloc[-1]
+
+    if 'bb_high' in names or 'bb_low' in names:
+        bb = ta.volatility.BollingerBands(close)
+        values['bb_high'] = bb.bollinger_hband().iloc[-1]
+        values['bb_low'] = bb.bollinger_lband().iloc[-1]
+
+    if 'atr' in names:
+        values['atr'] = ta.volatility.AverageTrueRange(
+            pd.Series(klines['high']), pd.Series(klines['low']), close, window=14
+        ).average_true_range().iloc[-1]
+
+    return values
+
+
+def max_deviation_from_ta(klines: dict) -> dict:
+    """Écart relatif max engine vs `ta` sur la même série (vérification de tolérance)"""
+    engine = IndicatorEngine()
+    closed = dict(klines)
+    # Force toutes les bougies comme clôturées pour comparer sur la même série
+    closed['close_time'] = np.zeros(len(klines['close']), dtype=np.int64)
+    streamed = engine.snapshot('CHECK', 'check', closed)
+    reference = ta_snapshot(klines)
+
+    deviations = {}
+    for name in ALL_INDICATORS:
+        a, b = streamed[name], float(reference[name])
+        if math.isnan(a) or math.isnan(b):
+            deviations[name] = 0.0 if math.isnan(a) and math.isnan(b) else float('inf')
+        else:
+            deviations[name] = abs(a - b) / max(abs(b), 1e-12)
+    return deviations
@@ -0,0 +1,78 @@
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Index de close_time dans une kline Binance
+CLOSE_TIME_INDEX = 6
+
+
+class KlineCache:
+    """Cache klines par (symbol, interval), invalidé à la clôture de la bougie en cours"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol: str, interval: str, limit: int):
+        """Retourne les `limit` dernières klines si la série en cache suffit et n'a pas expiré"""
+        with self._lock:
+            entry = self._entries.get((symbol, interval))
+            if entry is None:
+                self.misses += 1
+                return None
+
+            klines, expires_at, complete = entry
+            if self._now_ms() >= expires_at:
+                # La bougie en cours est clôturée → série périmée
+                del self._entries[(symbol, interval)]
+                self.misses += 1
+                return None
+
+            # Historique complet (symbole récent) → on sert quand même
+            if limit > len(klines) and not complete:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return klines[-limit:]
+
+    def put(self, symbol: str, interval: str, klines: list, requested: int = None):
+        """Stocke la série (garde la plus longue tant qu'elle est valide)"""
+        if not klines:
+            return
+
+        expires_at = int(klines[-1][CLOSE_TIME_INDEX]) + 1
+        complete = requested is not None and len(klines) < requested
+
+        with self._lock:
+            current = self._entries.get((symbol, interval))
+            if current is not None and current[1] == expires_at and len(current[0]) >= len(klines):
+                return
+            self._entries[(symbol, interval)] = (klines, expires_at, complete)
+
+    def invalidate(self, symbol: str = None):
+        """Vide le cache (un symbole ou tout)"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == symbol]:
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        """Hits/misses depuis le démarrage"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total * 100) if total else 0.0,
+            'entries': len(self._entries)
+        }
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
@@ -0,0 +1,40 @@
+import numpy as np
+
+# Colonnes d'une kline Binance (la 12e, "ignore", n'est pas décodée)
+COLUMNS = (
+    ('open_time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+    ('close_time', np.int64),
+    ('quote_volume', np.float64),
+    ('trades', np.int64),
+    ('taker_buy_base', np.float64),
+    ('taker_buy_quote', np.float64),
+)
+
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+
+
+def empty_columns() -> dict:
+    """Colonnes vides (même schéma que decode_klines)"""
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+
+def decode_klines(klines) -> dict:
+    """Décode un payload klines REST en colonnes NumPy contiguës, sans pandas
+
+    Une seule conversion str -> float64 pour toute la matrice transposée:
+    chaque colonne float est une vue contiguë d'un unique buffer (N x 11).
+    """
+    if not klines:
+        return empty_columns()
+
+    matrix = np.array(list(zip(*klines))[:len(COLUMNS)], dtype=np.float64)
+
+    columns = {}
+    for row, (name, dtype) in zip(matrix, COLUMNS):
+        columns[name] = row if dtype is np.float64 else row.astype(dtype)
+    return columns
@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+import logging
+import numpy as np
+from kline_decoder import COLUMNS, decode_klines
+
+logger = logging.getLogger(__name__)
+
+# Croissance des fichiers par blocs de N bougies
+GROW_ROWS = 4096
+
+# Max bougies par requête REST klines
+MAX_FETCH = 1000
+
+
+class _Series:
+    """Fichiers colonnes memmap d'une paire (symbol, interval)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        meta = self._read_meta()
+        self.count = meta.get('count', 0)
+        self.capacity = max(meta.get('capacity', 0), GROW_ROWS)
+        # Bougie en cours (non clôturée) stockée juste après les bougies clôturées
+        self.has_open = False
+        self.columns = {}
+        self._map(self.capacity)
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(os.path.join(self.path, 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self):
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'count': self.count, 'capacity': self.capacity}, f)
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))
+
+    def _map(self, capacity: int):
+        """(Re)mappe les fichiers colonnes à la capacité donnée"""
+        for name, dtype in COLUMNS:
+            file_path = os.path.join(self.path, f"{name}.bin")
+            size = capacity * np.dtype(dtype).itemsize
+            with open(file_path, 'ab') as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            # Les anciennes vues restent valides: elles gardent leur propre mmap
+            self.columns[name] = np.memmap(file_path, dtype=dtype, mode='r+', shape=(capacity,))
+        self.capacity = capacity
+
+    def _ensure_capacity(self, rows: int):
+        if rows > self.capacity:
+            self._map(((rows // GROW_ROWS) + 1) * GROW_ROWS)
+
+    @property
+    def last_close_time(self):
+        if self.count == 0:
+            return None
+        return int(self.columns['close_time'][self.count - 1])
+
+    @property
+    def open_close_time(self):
+        """close_time de la bougie en cours (None si absente)"""
+        if not self.has_open:
+            return None
+        return int(self.columns['close_time'][self.count])
+
+    def append(self, cols: dict, closed: int):
+        """Ajoute les `closed` premières bougies et garde la suivante comme bougie en cours"""
+        total = len(cols['open_time'])
+        self._ensure_capacity(self.count + total + 1)
+
+        for name, _ in COLUMNS:
+            self.columns[name][self.count:self.count + total] = cols[name]
+
+        if closed:
+            for name, _ in COLUMNS:
+                self.columns[name].flush()
+            self.count += closed
+            self._write_meta()
+
+        self.has_open = total > closed
+
+    def prepend(self, cols: dict):
+        """Insère des bougies clôturées plus anciennes avant la série existante"""
+        added = len(cols['open_time'])
+        end = self.count + (1 if self.has_open else 0)
+        self._ensure_capacity(added + end + 1)
+
+        for name, _ in COLUMNS:
+            column = self.columns[name]
+            column[added:added + end] = column[:end].copy()
+            column[:added] = cols[name]
+            column.flush()
+        self.count += added
+        self._write_meta()
+
+    def view(self, limit: int = None) -> dict:
+        """Tranches zero-copy des dernières bougies (bougie en cours incluse)"""
+        end = self.count + (1 if self.has_open else 0)
+        start = 0 if limit is None else max(0, end - limit)
+        return {name: self.columns[name][start:end] for name, _ in COLUMNS}
+
+
+class KlineStore:
+    """Store klines persistant et incrémental (une colonne memmap par champ)"""
+
+    def __init__(self, base_dir: str, fetch, min_history: int = 500):
+        # fetch(symbol, interval, start_time, limit) -> payload klines REST
+        self.base_dir = base_dir
+        self.fetch = fetch
+        self.min_history = min_history
+        self._series = {}
+        self._lock = threading.Lock()
+        os.makedirs(base_dir, exist_ok=True)
+
+    def _get_series(self, symbol: str, interval: str) -> _Series:
+        with self._lock:
+            key = (symbol, interval)
+            if key not in self._series:
+                self._series[key] = _Series(os.path.join(self.base_dir, f"{symbol}_{interval}"))
+            return self._series[key]
+
+    def get_columns(self, symbol: str, interval: str, limit: int) -> dict:
+        """Synchronise puis retourne les `limit` dernières bougies en colonnes"""
+        series = self._get_series(symbol, interval)
+        with series.lock:
+            self._sync(symbol, interval, series, limit)
+            return series.view(limit)
+
+    def load(self, symbol: str, interval: str, limit: int = None) -> dict:
+        """Lecture seule des bougies clôturées (sans appel réseau)"""
+        series = self._get_series(symbol, interval)
+        with series.lock:
+            cols = series.view(None)
+            closed = {name: col[:series.count] for name, col in cols.items()}
+            if limit is not None:
+                closed = {name: col[-limit:] for name, col in closed.items()}
+            return closed
+
+    def backfill(self, symbol: str, interval: str, start_time: int) -> int:
+        """Complète l'historique clôturé depuis start_time (ms), avant la première bougie stockée"""
+        series = self._get_series(symbol, interval)
+        with series.lock:
+            first_open = int(series.columns['open_time'][0]) if series.count else None
+            if first_open is not None and first_open <= start_time:
+                return 0
+
+            now_ms = int(time.time() * 1000)
+            pages = []
+            cursor = start_time
+            while True:
+                payload = self.fetch(symbol, interval, cursor, MAX_FETCH)
+                if not payload:
+                    break
+                cols = decode_klines(payload)
+                if first_open is None:
+                    keep = cols['close_time'] < now_ms
+                else:
+                    keep = cols['open_time'] < first_open
+                pages.append({name: col[keep] for name, col in cols.items()})
+
+                if len(payload) < MAX_FETCH or not keep.all():
+                    break
+                cursor = int(cols['close_time'][-1]) + 1
+
+            older = {name: np.concatenate([page[name] for page in pages]) for name, _ in COLUMNS} if pages else None
+            if older is None or len(older['open_time']) == 0:
+                return 0
+
+            added = len(older['open_time'])
+            if first_open is None:
+                series.append(older, added)
+            else:
+                series.prepend(older)
+
+        logger.info(f"💾 Backfill {symbol} {interval}: +{added} bougies ({series.count} au total)")
+        return added
+
+    def _sync(self, symbol: str, interval: str, series: _Series, limit: int):
+        """Ne récupère que les bougies postérieures au dernier close_time stocké"""
+        now_ms = int(time.time() * 1000)
+
+        # Bougie en cours toujours ouverte → rien à récupérer
+        open_close = series.open_close_time
+        if open_close is not None and now_ms <= open_close:
+            return
+
+        last_close = series.last_close_time
+        if last_close is None:
+            # Premier chargement: historique initial
+            fetch_limit = min(max(limit, self.min_history), MAX_FETCH)
+            payload = self.fetch(symbol, interval, None, fetch_limit)
+        else:
+            payload = self.fetch(symbol, interval, last_close + 1, MAX_FETCH)
+
+        while payload:
+            cols = decode_klines(payload)
+            closed = int(np.count_nonzero(cols['close_time'] < now_ms))
+            series.append(cols, closed)
+
+            # Rattrapage d'un long arrêt: on boucle tant que les pages sont pleines
+            if len(payload) < MAX_FETCH or closed < len(payload):
+                break
+            payload = self.fetch(symbol, interval, series.last_close_time + 1, MAX_FETCH)
+
+        if last_close is None:
+            logger.info(f"💾 Store klines {symbol} {interval}: {series.count} bougies")
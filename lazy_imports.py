@@ -0,0 +1,39 @@
+import importlib
+import sys
+import threading
+import time
+import logging
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModule:
+    """Module importé au premier accès à un attribut (durée mesurée dans lazy_import_seconds)
+
+    `from binance.exceptions import ...` charge tout le package python-binance (~1 s,
+    dateparser compris): le coût est payé au premier appel REST, pas au démarrage.
+    Utilisable dans un `except`: l'attribut n'est résolu que si une exception arrive.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    cached = self._name in sys.modules
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    if not cached:
+                        elapsed = time.perf_counter() - started
+                        get_metrics().observe('lazy_import_seconds', elapsed, module=self._name)
+                        logger.info(f"📦 Import différé {self._name}: {elapsed * 1000:.0f} ms")
+                    self._module = module
+        return self._module
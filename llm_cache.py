@@ -0,0 +1,144 @@
+import json
+import math
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def indicator_fingerprint(current_price: float, indicators: dict, price_step_pct: float) -> str:
+    """Empreinte quantifiée des entrées du prompt
+
+    Prix en paliers log de price_step_pct, RSI par 2 points, niveaux (EMA, BB,
+    MACD) en écart relatif au prix par pas de price_step_pct.
+    """
+    step = math.log1p(price_step_pct / 100)
+
+    def bucket(value, reference=0.0):
+        # Écart relatif au prix, en nombre de pas
+        if value is None or math.isnan(value):
+            return "nan"
+        return str(round((value - reference) / current_price * 100 / price_step_pct))
+
+    rsi = indicators.get('rsi', float('nan'))
+    parts = [
+        str(round(math.log(current_price) / step)),
+        "nan" if math.isnan(rsi) else str(round(rsi / 2)),
+        bucket(indicators['macd']),
+        bucket(indicators['macd_signal']),
+        bucket(indicators['bb_high'], current_price),
+        bucket(indicators['bb_low'], current_price),
+        bucket(indicators['ema_20'], current_price),
+        bucket(indicators['ema_50'], current_price),
+    ]
+    return ":".join(parts)
+
+
+class LLMResponseCache:
+    """Cache LRU + TTL des réponses LLM, persisté sur disque
+
+    Clé: modèle + version du prompt + symbole + empreinte des indicateurs.
+    Les put() restent en mémoire jusqu'à flush() (fin de cycle, arrêt du bot).
+    """
+
+    def __init__(self, path: str = None, max_entries: int = 512, ttl_seconds: float = 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def make_key(model: str, prompt_version: str, symbol: str, fingerprint: str) -> str:
+        return f"{model}|{prompt_version}|{symbol}|{fingerprint}"
+
+    def get(self, key: str):
+        """Valeur en cache (None si absente ou expirée)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: dict):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def flush(self):
+        """Écrit le fichier si des entrées ont été ajoutées depuis la dernière écriture"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+                self._dirty = False
+
+    def stats(self) -> dict:
+        """Hits/misses depuis le démarrage"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total * 100) if total else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'entries': len(self._entries)
+        }
+
+    def _load(self):
+        if not self.path:
+            return
+        now = time.time()
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+            for key, stored_at, value in entries:
+                if now - stored_at <= self.ttl_seconds:
+                    self._entries[key] = (stored_at, value)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError) as e:
+            # Fichier tronqué ou de forme inattendue: cache vide
+            logger.warning(f"Cache LLM illisible ({self.path}): {e}")
+            self._entries.clear()
+            return
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        """Écriture atomique (appelé sous verrou)"""
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump([[key, stored_at, value] for key, (stored_at, value) in self._entries.items()], f)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError as e:
+            logger.error(f"Erreur sauvegarde cache LLM: {e}")
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import logging
+from collections import deque
+import aiohttp
+import numpy as np
+from http_tape import aiohttp_request
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBudgetExceeded(Exception):
+    """Budget de latence épuisé avant toute réponse"""
+
+
+def rule_based_signals(ind: dict):
+    """Signal déterministe depuis les indicateurs du prompt (scalaires ou tableaux)
+
+    BUY si tendance courte haussière (close > EMA20 > EMA50, MACD > signal, RSI < 70,
+    close sous la bande haute), confiance 55-85 selon la force du mouvement.
+    Sert de remplaçant à Mistral dans le backtest et de repli quand le LLM ne répond pas.
+    """
+    close, ema_20, ema_50 = ind['close'], ind['ema_20'], ind['ema_50']
+    macd, macd_signal, rsi = ind['macd'], ind['macd_signal'], ind['rsi']
+
+    buy = (close > ema_20) & (ema_20 > ema_50) & (macd > macd_signal) & (rsi < 70) & (close < ind['bb_high'])
+    sell = (close < ema_20) & (ema_20 < ema_50) & (macd < macd_signal) & (rsi > 30)
+    actions = np.select([buy, sell], ["BUY", "SELL"], "HOLD")
+
+    confidence = (
+        55.0
+        + 10 * (ema_20 > ema_50 * 1.005)
+        + 10 * (macd > 0)
+        + 10 * (rsi < 60)
+    )
+    confidence = np.where(actions == "HOLD", 0.0, np.where(actions == "SELL", 60.0, confidence))
+    return actions, confidence
+
+
+class LatencyTracker:
+    """Latences des appels LLM sur une fenêtre glissante + compteurs d'issue"""
+
+    def __init__(self, window: int = 500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.outcomes = {'primary': 0, 'hedge': 0, 'error': 0, 'timeout': 0}
+        self.hedges_sent = 0
+
+    def record(self, seconds: float, outcome: str, hedged: bool = False):
+        get_metrics().observe('llm_request_seconds', seconds, outcome=outcome)
+        with self._lock:
+            self._samples.append(seconds)
+            self.outcomes[outcome] += 1
+            self.hedges_sent += int(hedged)
+
+    def summary(self) -> dict:
+        """p50/p90/p99/max (secondes) et compteurs"""
+        with self._lock:
+            samples = np.array(self._samples, dtype=np.float64)
+            outcomes = dict(self.outcomes)
+            hedges_sent = self.hedges_sent
+
+        summary = {'count': len(samples), 'hedges_sent': hedges_sent, **outcomes}
+        if len(samples):
+            p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+            summary.update(p50=float(p50), p90=float(p90), p99=float(p99), max=float(samples.max()))
+        return summary
+
+
+class HedgedLLMClient:
+    """Appels chat/completions sur une boucle asyncio dédiée, avec requête de couverture
+
+    Si l'endpoint principal n'a pas répondu après `hedge_delay` secondes (ou a échoué),
+    la même requête part vers l'endpoint de secours; la première réponse valide gagne
+    et les requêtes restantes sont annulées, y compris à l'expiration du budget.
+    """
+
+    def __init__(self, endpoints: list, hedge_delay: float, tracker: LatencyTracker = None):
+        # endpoints: [{'name', 'url', 'api_key', 'model'}], le premier est le principal
+        self.endpoints = endpoints
+        self.hedge_delay = hedge_delay
+        self.tracker = tracker or LatencyTracker()
+        self._session = None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="llm-pipeline", daemon=True)
+        self._thread.start()
+
+    def complete(self, payload: dict, timeout: float) -> dict:
+        """Réponse JSON du premier endpoint à répondre (LLMBudgetExceeded après `timeout` s)"""
+        if timeout <= 0:
+            self.tracker.record(0.0, 'timeout')
+            raise LLMBudgetExceeded("budget LLM déjà épuisé")
+        return asyncio.run_coroutine_threadsafe(self._complete(payload, timeout), self.loop).result()
+
+    def close(self):
+        async def _close():
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+        asyncio.run_coroutine_threadsafe(_close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(keepalive_timeout=60))
+        return self._session
+
+    async def _post(self, endpoint: dict, payload: dict) -> dict:
+        session = await self._get_session()
+        headers = {
+            "Authorization": f"Bearer {endpoint['api_key']}",
+            "Content-Type": "application/json"
+        }
+        response = await aiohttp_request(session, 'POST', endpoint['url'], headers=headers,
+                                         json={**payload, 'model': endpoint['model']})
+        response.raise_for_status()
+        result = response.json()
+        usage = result.get('usage') or {}
+        metrics = get_metrics()
+        for kind in ('prompt_tokens', 'completion_tokens'):
+            if usage.get(kind):
+                metrics.inc('llm_tokens_total', usage[kind], model=endpoint['model'], kind=kind.split('_')[0])
+        return result
+
+    async def _complete(self, payload: dict, timeout: float) -> dict:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + timeout
+        hedge_at = started + self.hedge_delay
+        can_hedge = len(self.endpoints) > 1
+
+        tasks = {asyncio.ensure_future(self._post(self.endpoints[0], payload)): 'primary'}
+        hedged = False
+        last_error = None
+        try:
+            while True:
+                now = loop.time()
+                if now >= deadline:
+                    self.tracker.record(now - started, 'timeout', hedged)
+                    raise LLMBudgetExceeded(f"pas de réponse LLM en {timeout:.1f}s")
+
+                if can_hedge and not hedged and (now >= hedge_at or not tasks):
+                    # Principal lent ou en échec → même requête vers l'endpoint de secours
+                    logger.info(f"⏩ Requête LLM de couverture → {self.endpoints[1]['name']}")
+                    tasks[asyncio.ensure_future(self._post(self.endpoints[1], payload))] = 'hedge'
+                    hedged = True
+                elif not tasks:
+                    self.tracker.record(now - started, 'error', hedged)
+                    raise last_error
+
+                wait = deadline - now
+                if can_hedge and not hedged:
+                    wait = min(wait, hedge_at - now)
+                done, _ = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    origin = tasks.pop(task)
+                    if task.exception() is None:
+                        self.tracker.record(loop.time() - started, origin, hedged)
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"Endpoint LLM {origin} en échec: {last_error!r}")
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -1,512 +1,1077 @@
-import time
-import logging
-from datetime import datetime
-import importlib
-from config import Config
-from binance_client import BinanceClient
-from mistral_agent import MistralAgent
-from discord_bot import DiscordNotifier
-from models import TradeSignal
-
-# Import nouvelles classes PRO
-try:
-    _market_mod = importlib.import_module("market_analyzer")
-    _pos_mod = importlib.import_module("position_manager")
-    _strat_mod = importlib.import_module("strategy_optimizer")
-    MarketAnalyzer = getattr(_market_mod, "MarketAnalyzer")
-    PositionManager = getattr(_pos_mod, "PositionManager")
-    StrategyOptimizer = getattr(_strat_mod, "StrategyOptimizer")
-    PRO_MODE = True
-    logger_name = "TradingBotPRO"
-except Exception:
-    PRO_MODE = False
-    logger_name = "TradingBot"
-    print("⚠️ Mode Standard: market_analyzer, position_manager ou strategy_optimizer non trouvés")
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(logger_name)
-
-class TradingBot:
-    def __init__(self):
-        self.binance = BinanceClient()
-        self.mistral = MistralAgent()
-        self.discord = DiscordNotifier()
-        self.active_positions = {}
-        self.daily_stats = {
-            'trades': 0,
-            'wins': 0,
-            'losses': 0,
-            'profit': 0.0
-        }
-        self.last_daily_report = datetime.now().day
-        
-        # Activation mode PRO si modules disponibles
-        if PRO_MODE:
-            self.market_analyzer = MarketAnalyzer(self.binance)
-            self.position_manager = PositionManager(self.binance)
-            logger.info("🚀 MODE PRO ACTIVÉ: Multi-TF + Trailing SL + Pyramiding")
-        else:
-            logger.info("📊 MODE STANDARD")
-        
-    def check_stop_loss_hit(self, symbol: str):
-        """Vérifie si stop loss/take profit touché"""
-        if symbol not in self.active_positions:
-            return False
-        
-        position = self.active_positions[symbol]
-        current_price = self.binance.get_current_price(symbol)
-        
-        # Check si les ordres stop-loss existent encore
-        open_orders = self.binance.get_open_orders(symbol)
-        
-        # Si plus d'ordres stop-loss = position fermée automatiquement
-        if not open_orders:
-            # Position vendue automatiquement par Binance
-            pnl = (current_price - position['entry']) * position['quantity']
-            
-            # Détermine si c'était stop-loss ou take-profit
-            if current_price <= position['stop_loss']:
-                logger.warning(f"⛔ Stop loss auto-exécuté {symbol}")
-                self.discord.notify_stop_loss(
-                    symbol, position['entry'], current_price, abs(pnl)
-                )
-                reason = "STOP_LOSS"
-            else:
-                logger.info(f"🎯 Take profit auto-exécuté {symbol}")
-                self.discord.notify_take_profit(
-                    symbol, position['entry'], current_price, pnl
-                )
-                reason = "TAKE_PROFIT"
-            
-            # Stats
-            self.daily_stats['trades'] += 1
-            if pnl > 0:
-                self.daily_stats['wins'] += 1
-            else:
-                self.daily_stats['losses'] += 1
-            self.daily_stats['profit'] += pnl
-            
-            del self.active_positions[symbol]
-            logger.info(f"Position auto-fermée {symbol}: PnL ${pnl:.2f}")
-            return True
-        
-        # Check manuel si prix atteint les seuils
-        if current_price <= position['stop_loss']:
-            logger.warning(f"Stop loss HIT {symbol}: {current_price}")
-            self.close_position(symbol, "STOP_LOSS")
-            return True
-        
-        if current_price >= position['take_profit']:
-            logger.info(f"Take profit HIT {symbol}: {current_price}")
-            self.close_position(symbol, "TAKE_PROFIT")
-            return True
-        
-        return False
-    
-    def close_position(self, symbol: str, reason: str):
-        """Ferme position manuellement"""
-        if symbol not in self.active_positions:
-            return
-        
-        position = self.active_positions[symbol]
-        current_price = self.binance.get_current_price(symbol)
-        
-        order = self.binance.place_order(
-            symbol=symbol,
-            side='SELL',
-            quantity=position['quantity']
-        )
-        
-        if order:
-            pnl = (current_price - position['entry']) * position['quantity']
-            
-            # Stats
-            self.daily_stats['trades'] += 1
-            if pnl > 0:
-                self.daily_stats['wins'] += 1
-            else:
-                self.daily_stats['losses'] += 1
-            self.daily_stats['profit'] += pnl
-            
-            if reason == "STOP_LOSS":
-                self.discord.notify_stop_loss(
-                    symbol, position['entry'], current_price, abs(pnl)
-                )
-            elif reason == "TAKE_PROFIT":
-                self.discord.notify_take_profit(
-                    symbol, position['entry'], current_price, pnl
-                )
-            
-            del self.active_positions[symbol]
-            logger.info(f"Position fermée {symbol}: PnL ${pnl:.2f}")
-    
-    def update_trailing_stops_pro(self):
-        """Met à jour trailing stops (MODE PRO)"""
-        if not PRO_MODE:
-            return
-        
-        for symbol in list(self.active_positions.keys()):
-            position = self.active_positions[symbol]
-            current_price = self.binance.get_current_price(symbol)
-            
-            # Trailing stop
-            trailing_result = self.position_manager.update_trailing_stop(
-                symbol, position, current_price
-            )
-            
-            if trailing_result['updated']:
-                position['stop_loss'] = trailing_result['stop_loss']
-                
-                # Annule ancien stop + place nouveau
-                open_orders = self.binance.get_open_orders(symbol)
-                for order in open_orders:
-                    if order['type'] == 'STOP_LOSS_LIMIT':
-                        self.binance.cancel_order(symbol, order['orderId'])
-                
-                new_stop_order = self.binance.place_stop_loss(
-                    symbol,
-                    position['quantity'],
-                    position['stop_loss']
-                )
-                
-                if new_stop_order:
-                    self.discord.notify(
-                        f"🔄 **Trailing Stop {symbol}**\n"
-                        f"Nouveau stop: ${position['stop_loss']:.2f}\n"
-                        f"Profit sécurisé: {trailing_result['profit_locked']:.2f}%"
-                    )
-    
-    def check_pyramiding_pro(self):
-        """Vérifie possibilité pyramiding (MODE PRO)"""
-        if not PRO_MODE:
-            return
-        
-        for symbol in list(self.active_positions.keys()):
-            position = self.active_positions[symbol]
-            current_price = self.binance.get_current_price(symbol)
-            
-            if self.position_manager.should_add_to_position(position, current_price):
-                self.add_to_position_pro(symbol, position, current_price)
-    
-    def add_to_position_pro(self, symbol: str, position: dict, current_price: float):
-        """Ajoute à position (pyramiding)"""
-        pyramid_count = position.get('pyramid_count', 0)
-        original_size_usd = position['entry'] * position.get('original_quantity', position['quantity'])
-        
-        pyramid_size_usd = self.position_manager.calculate_pyramid_size(
-            original_size_usd, pyramid_count
-        )
-        
-        if pyramid_size_usd > 0:
-            pyramid_quantity = pyramid_size_usd / current_price
-            
-            order = self.binance.place_order(
-                symbol=symbol,
-                side='BUY',
-                quantity=pyramid_quantity
-            )
-            
-            if order:
-                # Mise à jour position
-                if 'original_quantity' not in position:
-                    position['original_quantity'] = position['quantity']
-                
-                total_qty = position['quantity'] + pyramid_quantity
-                avg_entry = (
-                    (position['entry'] * position['quantity'] + current_price * pyramid_quantity)
-                    / total_qty
-                )
-                
-                position['quantity'] = total_qty
-                position['entry'] = avg_entry
-                position['pyramid_count'] = pyramid_count + 1
-                
-                # Recalcule TP/SL
-                tp_sl = self.market_analyzer.calculate_dynamic_tp_sl(symbol, avg_entry)
-                position['take_profit'] = tp_sl['take_profit']
-                position['stop_loss'] = tp_sl['stop_loss']
-                
-                self.discord.notify(
-                    f"🔺 **Pyramiding {symbol}**\n"
-                    f"Ajouté: {pyramid_quantity:.6f} @ ${current_price:,.2f}\n"
-                    f"Nouvelle moyenne: ${avg_entry:,.2f}\n"
-                    f"Pyramide #{pyramid_count + 1}"
-                )
-                
-                logger.info(f"Pyramiding {symbol}: +{pyramid_quantity:.6f} @ ${current_price:.2f}")
-    
-    def execute_signal(self, signal: TradeSignal, market_context: dict = None):
-        """Exécute signal trading"""
-        
-        if len(self.active_positions) >= Config.MAX_POSITIONS:
-            logger.info(f"Max positions atteint ({Config.MAX_POSITIONS})")
-            self.discord.notify(f"⚠️ Max {Config.MAX_POSITIONS} positions atteint - Signal {signal.action} {signal.symbol} ignoré")
-            return
-        
-        if signal.action == "HOLD":
-            return
-        
-        if signal.action == "BUY":
-            analysis = signal.analysis
-            balance = self.binance.get_account_balance()
-            
-            # MODE PRO: Filtre stratégique
-            if PRO_MODE and market_context:
-                decision = StrategyOptimizer.should_trade(
-                    market_trend=market_context['market_trend'],
-                    multi_tf=market_context['multi_tf'],
-                    sentiment=market_context['sentiment'],
-                    confidence=analysis.confidence
-                )
-                
-                if not decision['should_trade']:
-                    logger.info(f"Trade refusé {signal.symbol}: {decision['reason']}")
-                    self.discord.notify(
-                        f"🚫 **Trade refusé {signal.symbol}**\n"
-                        f"Raison: {decision['reason']}\n"
-                        f"Score: {decision['score']}/10"
-                    )
-                    return
-            
-            # Calcul taille position
-            if PRO_MODE and market_context:
-                position_size_usd = self.position_manager.calculate_position_size(
-                    balance,
-                    analysis.confidence,
-                    market_context['market_trend']
-                )
-            else:
-                # Mode standard: 2% fixe
-                position_size_usd = balance * (Config.MAX_RISK_PERCENT / 100)
-            
-            if position_size_usd < 10:
-                logger.warning(f"Position size trop petite: ${position_size_usd:.2f}")
-                return
-            
-            # TP/SL dynamiques (PRO) ou fixes (Standard)
-            if PRO_MODE:
-                tp_sl = self.market_analyzer.calculate_dynamic_tp_sl(
-                    signal.symbol,
-                    analysis.entry_price
-                )
-            else:
-                tp_sl = {
-                    'take_profit': analysis.take_profit,
-                    'stop_loss': analysis.stop_loss,
-                    'tp_pct': 6.0,
-                    'sl_pct': 3.0
-                }
-            
-            quantity = position_size_usd / analysis.entry_price
-            
-            order = self.binance.place_order(
-                symbol=signal.symbol,
-                side='BUY',
-                quantity=round(quantity, 6)
-            )
-            
-            if order:
-                self.active_positions[signal.symbol] = {
-                    'symbol': signal.symbol,
-                    'entry': analysis.entry_price,
-                    'quantity': quantity,
-                    'original_quantity': quantity,
-                    'stop_loss': tp_sl['stop_loss'],
-                    'take_profit': tp_sl['take_profit'],
-                    'pyramid_count': 0
-                }
-                
-                if PRO_MODE and market_context:
-                    self.active_positions[signal.symbol]['market_context'] = market_context
-                
-                self.binance.place_stop_loss(
-                    signal.symbol,
-                    round(quantity, 6),
-                    tp_sl['stop_loss']
-                )
-                
-                # Notification
-                notif_text = (
-                    f"🟢 **BUY {signal.symbol}**\n\n"
-                    f"💰 **Prix:** ${analysis.entry_price:,.2f}\n"
-                    f"📊 **Quantité:** {quantity:.6f}\n"
-                    f"💵 **Montant:** ${position_size_usd:,.2f}\n\n"
-                    f"🎯 **Take-Profit:** ${tp_sl['take_profit']:,.2f} (+{tp_sl['tp_pct']:.1f}%)\n"
-                    f"⛔ **Stop-Loss:** ${tp_sl['stop_loss']:,.2f} (-{tp_sl['sl_pct']:.1f}%)\n"
-                )
-                
-                if PRO_MODE and market_context:
-                    notif_text += (
-                        f"\n📈 **Contexte PRO:**\n"
-                        f"• Tendance: {market_context['market_trend']}\n"
-                        f"• Multi-TF: {market_context['multi_tf']['recommendation']}\n"
-                        f"• Sentiment: {market_context['sentiment']['sentiment']}\n"
-                        f"• Confiance IA: {analysis.confidence}%\n"
-                    )
-                
-                notif_text += f"\n💡 **Raison:** {analysis.reasoning}"
-                
-                self.discord.notify(notif_text)
-                
-                logger.info(f"Position ouverte {signal.symbol}: {quantity:.6f} @ ${analysis.entry_price:.2f}")
-    
-    def send_cycle_summary(self, balance: float):
-        """Envoie résumé après chaque cycle"""
-        
-        positions_text = []
-        for symbol in Config.SYMBOLS:
-            if symbol in self.active_positions:
-                pos = self.active_positions[symbol]
-                current_price = self.binance.get_current_price(symbol)
-                pnl_pct = ((current_price - pos['entry']) / pos['entry']) * 100
-                emoji = "🟢" if pnl_pct > 0 else "🔴"
-                positions_text.append(f"{emoji} **{symbol}**: {pnl_pct:+.2f}%")
-            else:
-                positions_text.append(f"⏸️ **{symbol}**: Pas de position")
-        
-        mode_label = "PRO" if PRO_MODE else "Standard"
-        
-        self.discord.notify(
-            f"📊 **Résumé Cycle ({mode_label})** - {datetime.now().strftime('%H:%M')}\n\n"
-            f"{chr(10).join(positions_text)}\n\n"
-            f"💰 **Balance**: ${balance:,.2f} USDT\n"
-            f"📈 **Positions**: {len(self.active_positions)}/{Config.MAX_POSITIONS}\n"
-            f"⏰ **Prochain cycle**: {Config.CHECK_INTERVAL_HOURS}h"
-        )
-    
-    def send_daily_report(self, balance: float):
-        """Rapport quotidien 7h"""
-        
-        win_rate = (self.daily_stats['wins'] / self.daily_stats['trades'] * 100) if self.daily_stats['trades'] > 0 else 0
-        
-        positions_summary = []
-        total_unrealized = 0
-        for symbol, pos in self.active_positions.items():
-            current_price = self.binance.get_current_price(symbol)
-            unrealized = (current_price - pos['entry']) * pos['quantity']
-            total_unrealized += unrealized
-            pnl_pct = ((current_price - pos['entry']) / pos['entry']) * 100
-            emoji = "🟢" if unrealized > 0 else "🔴"
-            positions_summary.append(f"{emoji} {symbol}: {pnl_pct:+.2f}% (${unrealized:+.2f})")
-        
-        mode_label = "PRO" if PRO_MODE else "Standard"
-        
-        self.discord.notify(
-            f"📊 **RAPPORT QUOTIDIEN ({mode_label})** - {datetime.now().strftime('%d/%m/%Y 07:00')}\n\n"
-            f"💰 **Balance**: ${balance:,.2f} USDT\n"
-            f"📈 **Positions actives**: {len(self.active_positions)}/{Config.MAX_POSITIONS}\n\n"
-            f"{chr(10).join(positions_summary) if positions_summary else 'Aucune position active'}\n\n"
-            f"📊 **Stats 24h**:\n"
-            f"• Trades: {self.daily_stats['trades']}\n"
-            f"• Wins: {self.daily_stats['wins']} | Losses: {self.daily_stats['losses']}\n"
-            f"• Win Rate: {win_rate:.1f}%\n"
-            f"• P&L Réalisé: ${self.daily_stats['profit']:+.2f}\n"
-            f"• P&L Non réalisé: ${total_unrealized:+.2f}\n\n"
-            f"🎯 **Total**: ${self.daily_stats['profit'] + total_unrealized:+.2f}"
-        )
-        
-        # Reset stats
-        self.daily_stats = {'trades': 0, 'wins': 0, 'losses': 0, 'profit': 0.0}
-    
-    def run_cycle(self):
-        """Cycle d'analyse"""
-        mode_label = "PRO" if PRO_MODE else "STANDARD"
-        logger.info(f"=== NOUVEAU CYCLE ({mode_label}) ===")
-        
-        balance = self.binance.get_account_balance()
-        logger.info(f"Balance: ${balance:.2f}")
-        
-        # Contexte marché global (MODE PRO)
-        market_context = None
-        if PRO_MODE:
-            sentiment = self.market_analyzer.get_market_sentiment()
-        
-        # Check positions actives
-        for symbol in list(self.active_positions.keys()):
-            self.check_stop_loss_hit(symbol)
-        
-        # Update trailing stops (PRO)
-        if PRO_MODE:
-            self.update_trailing_stops_pro()
-            self.check_pyramiding_pro()
-        
-        # Analyse chaque symbole
-        for symbol in Config.SYMBOLS:
-            if symbol in self.active_positions:
-                logger.info(f"{symbol}: Position active, skip")
-                continue
-            
-            # Contexte marché (PRO)
-            if PRO_MODE:
-                market_trend = self.market_analyzer.get_market_trend(symbol)
-                multi_tf = self.market_analyzer.multi_timeframe_analysis(symbol)
-                
-                market_context = {
-                    'market_trend': market_trend,
-                    'multi_tf': multi_tf,
-                    'sentiment': sentiment
-                }
-            
-            klines = self.binance.get_klines(symbol, Config.TIMEFRAME)
-            if not klines:
-                continue
-            
-            current_price = self.binance.get_current_price(symbol)
-            if current_price == 0:
-                continue
-            
-            signal = self.mistral.analyze_market(symbol, klines, current_price, balance)
-            
-            # Notification pour chaque analyse
-            if signal.action == "HOLD":
-                hold_text = f"⏸️ **{symbol}**: HOLD (confiance {signal.analysis.confidence if signal.analysis else 0}%)"
-                if PRO_MODE and market_context:
-                    hold_text += f"\nTendance: {market_context['market_trend']}, Multi-TF: {market_context['multi_tf']['recommendation']}"
-                self.discord.notify(hold_text)
-            
-            self.execute_signal(signal, market_context)
-            
-            time.sleep(2)
-        
-        # Résumé fin de cycle
-        self.send_cycle_summary(balance)
-    
-    def run(self):
-        """Boucle principale"""
-        mode_label = "PRO 🚀" if PRO_MODE else "Standard 📊"
-        self.discord.notify(f"🤖 **Bot Trading {mode_label} démarré**")
-        
-        while True:
-            try:
-                # Check si 7h pour rapport quotidien
-                now = datetime.now()
-                if now.hour == 7 and now.day != self.last_daily_report:
-                    balance = self.binance.get_account_balance()
-                    self.send_daily_report(balance)
-                    self.last_daily_report = now.day
-                
-                self.run_cycle()
-                
-                sleep_seconds = Config.CHECK_INTERVAL_HOURS * 3600
-                logger.info(f"Sleep {Config.CHECK_INTERVAL_HOURS}h...")
-                time.sleep(sleep_seconds)
-                
-            except KeyboardInterrupt:
-                logger.info("Arrêt bot...")
-                self.discord.notify("⛔ Bot arrêté manuellement")
-                break
-            except Exception as e:
-                logger.error(f"ERREUR CRITIQUE: {e}", exc_info=True)
-                self.discord.notify(f"❌ Erreur: {str(e)}")
-                time.sleep(60)
-
-if __name__ == "__main__":
-    bot = TradingBot()
+import time
+
+# Durée des imports du démarrage (rapportée avec le temps d'init du bot)
+_IMPORT_STARTED = time.perf_counter()
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from importlib.util import find_spec
+from config import Config
+from binance_client import BinanceClient, base_asset, fill_price
+from async_binance_client import AsyncClientBridge
+from mistral_agent import MistralAgent
+from discord_bot import DiscordNotifier, PRIORITY_LOW, PRIORITY_HIGH
+from models import TradeSignal
+from indicator_engine import IndicatorEngine
+from stream_monitor import StreamMonitor
+from state_store import StateStore
+from order_index import OrderIndex, UserDataStream
+from universe_scanner import UniverseScanner
+from metrics import MetricsExporter, StageTimer, get_metrics
+from http_tape import install_from_config as install_http_tape
+
+# Mode PRO si les modules sont présents (détection sans les importer, import à l'init du bot)
+PRO_MODULES = ("market_analyzer", "position_manager", "strategy_optimizer")
+if all(find_spec(name) is not None for name in PRO_MODULES):
+    PRO_MODE = True
+    logger_name = "TradingBotPRO"
+else:
+    PRO_MODE = False
+    logger_name = "TradingBot"
+    print("⚠️ Mode Standard: market_analyzer, position_manager ou strategy_optimizer non trouvés")
+
+logger = logging.getLogger(logger_name)
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+class TradingBot:
+    def __init__(self, binance_client: BinanceClient = None):
+        # Temps d'init par composant (aucun appel réseau ici: clients créés au premier usage)
+        self.metrics = get_metrics()
+        startup = StageTimer(self.metrics, 'startup_seconds')
+        
+        # Enregistrement / rejeu HTTP (HTTP_TAPE_MODE), avant la création des clients
+        self.http_tape = install_http_tape()
+        if binance_client is not None:
+            # Exchange injecté (benchmark, exchange simulé)
+            self.binance = binance_client
+        elif Config.EXCHANGE_CLIENT == "async":
+            # Transport aiohttp keep-alive partagé par tous les workers du cycle
+            self.binance = BinanceClient(client=AsyncClientBridge())
+        else:
+            self.binance = BinanceClient()
+        # Règles de tous les symboles en un exchangeInfo au premier ordre/scan, puis rafraîchies
+        self.binance.symbol_rules.start()
+        startup.lap('binance')
+        self.indicator_engine = (
+            IndicatorEngine(Config.INDICATOR_STATE_DIR) if Config.INDICATOR_ENGINE_ENABLED else None
+        )
+        self.mistral = MistralAgent(self.indicator_engine)
+        self.discord = DiscordNotifier()
+        startup.lap('agents')
+        self.active_positions = {}
+        self.daily_stats = {
+            'trades': 0,
+            'wins': 0,
+            'losses': 0,
+            'profit': 0.0
+        }
+        self.last_daily_report = datetime.now().day
+        # Sérialise ouverture/modification des positions (check MAX_POSITIONS inclus)
+        self.execution_lock = threading.RLock()
+        
+        # Symboles analysés: Config.SYMBOLS, ou top N de l'univers recalculé à chaque cycle
+        self.watchlist = list(Config.SYMBOLS)
+        self.universe = None
+        if Config.UNIVERSE_ENABLED:
+            self.universe = UniverseScanner(
+                self.binance.get_24h_tickers,
+                self.binance.symbol_rules.symbols,
+                quote_asset=Config.UNIVERSE_QUOTE_ASSET,
+                top_n=Config.UNIVERSE_TOP_N,
+                min_quote_volume=Config.UNIVERSE_MIN_QUOTE_VOLUME,
+                min_range_pct=Config.UNIVERSE_MIN_RANGE_PCT,
+                max_range_pct=Config.UNIVERSE_MAX_RANGE_PCT,
+                min_change_pct=Config.UNIVERSE_MIN_CHANGE_PCT
+            )
+        
+        # Index local des ordres (user data stream, sinon un get_open_orders() par cycle)
+        self.order_index = OrderIndex(on_update=self.on_order_update)
+        # Positions restaurées sans ordres ouverts connus: aucune clôture déduite avant vérification
+        self.orders_unverified = set()
+        self.user_stream = (
+            UserDataStream(self.binance, self.order_index) if Config.USER_STREAM_ENABLED else None
+        )
+        
+        # Surveillance temps réel des positions (WebSocket)
+        self._stream_last_action = {}
+        self.stream_monitor = None
+        if Config.STREAM_MONITOR_ENABLED:
+            self.stream_monitor = StreamMonitor(
+                self.on_stream_price,
+                lambda: list(self.active_positions.keys())
+            )
+        startup.lap('streams')
+        
+        # Activation mode PRO si modules disponibles (find_spec ne garantit pas que l'import réussit)
+        self.pro_mode = PRO_MODE
+        if self.pro_mode:
+            try:
+                from market_analyzer import MarketAnalyzer
+                from position_manager import PositionManager
+                from strategy_optimizer import StrategyOptimizer, load_strategy_params
+            except Exception as e:
+                self.pro_mode = False
+                logger.warning(f"⚠️ Mode Standard: import des modules PRO impossible ({e})")
+        
+        if self.pro_mode:
+            self.market_analyzer = MarketAnalyzer(self.binance, self.indicator_engine)
+            strategy_params = load_strategy_params()
+            self.position_manager = PositionManager(self.binance, strategy_params)
+            self.strategy_optimizer = StrategyOptimizer(strategy_params)
+            logger.info("🚀 MODE PRO ACTIVÉ: Multi-TF + Trailing SL + Pyramiding")
+        else:
+            logger.info("📊 MODE STANDARD")
+        startup.lap('strategy')
+        
+        # Métriques (Prometheus localhost + snapshot JSON)
+        self.metrics_exporter = None
+        if Config.METRICS_ENABLED:
+            self._register_gauges()
+            self.metrics_exporter = MetricsExporter(
+                self.metrics, Config.METRICS_HOST, Config.METRICS_PORT,
+                Config.METRICS_SNAPSHOT_PATH, Config.METRICS_SNAPSHOT_SECONDS
+            )
+        
+        # Positions/stats persistées: reprise après redémarrage sans racheter
+        self.state_store = StateStore(Config.STATE_DB_PATH) if Config.STATE_STORE_ENABLED else None
+        if self.state_store is not None:
+            self.restore_state()
+        startup.lap('state')
+        
+        self.metrics.observe('startup_seconds', IMPORT_SECONDS, stage='imports')
+        logger.info(
+            f"🚀 Démarrage: imports {IMPORT_SECONDS * 1000:.0f} ms, init {startup.elapsed() * 1000:.0f} ms ("
+            + ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in startup.laps.items()) + ")"
+        )
+        
+    def _register_gauges(self):
+        """Jauges lues à chaque export (aucun coût entre deux scrapes)"""
+        self.metrics.gauge_callback('discord_queue_depth', lambda: self.discord.dispatcher.stats()['queued'])
+        self.metrics.gauge_callback('discord_notifications', lambda: {
+            k: v for k, v in self.discord.dispatcher.stats().items() if k != 'queued'
+        })
+        self.metrics.gauge_callback('active_positions', lambda: len(self.active_positions))
+        self.metrics.gauge_callback('watchlist_size', lambda: len(self.watchlist))
+        self.metrics.gauge_callback('rate_limit_tokens', lambda: self.binance.rate_limiter.tokens)
+        if self.mistral.response_cache is not None:
+            self.metrics.gauge_callback('llm_cache', lambda: {
+                k: v for k, v in self.mistral.response_cache.stats().items() if k in ('hits', 'misses', 'entries')
+            })
+    
+    def check_stop_loss_hit(self, symbol: str, orders_synced: bool = True):
+        """Vérifie si stop loss/take profit touché
+
+        orders_synced=False (réconciliation de l'index en échec): un index vide ne
+        prouve pas que l'exchange a vendu, aucune clôture n'en est déduite.
+        """
+        if symbol not in self.active_positions:
+            return False
+        
+        position = self.active_positions[symbol]
+        orders_synced = self._verify_exit_orders(symbol, position) and orders_synced
+        if symbol not in self.active_positions:
+            # Fill découvert à la vérification: déjà clôturé par on_order_update
+            return True
+        
+        # Stop ou take profit exécuté sur l'exchange: clôture au prix réel du fill
+        for key in ('stop_order_id', 'tp_order_id'):
+            exit_order = self.order_index.get(position.get(key))
+            if exit_order is not None and exit_order['status'] == 'FILLED':
+                self._close_on_fill(symbol, exit_order)
+                return True
+        
+        current_price = self.binance.get_current_price(symbol)
+        if current_price <= 0:
+            logger.warning(f"⚠️ {symbol}: prix indisponible, vérification reportée")
+            return False
+        
+        # Check si les ordres stop-loss existent encore (index local, pas d'appel REST)
+        open_orders = self.order_index.open_orders(symbol)
+        
+        if not open_orders and not orders_synced:
+            logger.warning(f"⚠️ {symbol}: index des ordres non réconcilié, vérification reportée")
+            return False
+        
+        # Si plus d'ordres stop-loss = position fermée automatiquement (fill inconnu: prix ticker)
+        if not open_orders:
+            # Position vendue automatiquement par Binance
+            pnl = (current_price - position['entry']) * position['quantity']
+            
+            # Détermine si c'était stop-loss ou take-profit
+            if current_price <= position['stop_loss']:
+                logger.warning(f"⛔ Stop loss auto-exécuté {symbol}")
+                self.discord.notify_stop_loss(
+                    symbol, position['entry'], current_price, abs(pnl)
+                )
+                reason = "STOP_LOSS"
+            else:
+                logger.info(f"🎯 Take profit auto-exécuté {symbol}")
+                self.discord.notify_take_profit(
+                    symbol, position['entry'], current_price, pnl
+                )
+                reason = "TAKE_PROFIT"
+            
+            self._register_close(symbol, reason, current_price, pnl)
+            logger.info(f"Position auto-fermée {symbol}: PnL ${pnl:.2f}")
+            return True
+        
+        # Check manuel si prix atteint les seuils
+        if current_price <= position['stop_loss']:
+            logger.warning(f"Stop loss HIT {symbol}: {current_price}")
+            self.close_position(symbol, "STOP_LOSS")
+            return True
+        
+        # TP tenu par l'exchange (OCO): rien à faire côté logiciel
+        if position.get('tp_order_id') is None and current_price >= position['take_profit']:
+            logger.info(f"Take profit HIT {symbol}: {current_price}")
+            self.close_position(symbol, "TAKE_PROFIT")
+            return True
+        
+        return False
+    
+    def close_position(self, symbol: str, reason: str, exit_price: float = None):
+        """Ferme position manuellement"""
+        if symbol not in self.active_positions:
+            return
+        
+        position = self.active_positions[symbol]
+        current_price = exit_price or self.binance.get_current_price(symbol)
+        
+        # Libère la quantité bloquée par les ordres de sortie avant la vente market
+        had_take_profit = position.get('tp_order_id') is not None
+        if not self._cancel_exit_orders(symbol):
+            return
+        
+        order = self.binance.place_order(
+            symbol=symbol,
+            side='SELL',
+            quantity=position['quantity']
+        )
+        
+        if not order:
+            # Vente refusée: ordres de sortie replacés seulement si l'actif est bien encore détenu
+            balances = self.binance.get_balances()
+            held = balances.get(base_asset(symbol), 0.0) if balances is not None else None
+            if held is None or held < position['quantity'] * 0.5:
+                logger.error(f"❌ Clôture {symbol} échouée, détention non confirmée: ordres de sortie non replacés")
+                return
+            logger.error(f"❌ Clôture {symbol} échouée, ordres de sortie replacés")
+            position.pop('stop_order_id', None)
+            position.pop('tp_order_id', None)
+            self._place_exit_orders(
+                symbol, position['quantity'], position['stop_loss'],
+                position['take_profit'] if had_take_profit else None
+            )
+            return
+        
+        current_price = fill_price(order, current_price)
+        pnl = (current_price - position['entry']) * position['quantity']
+        
+        if reason == "STOP_LOSS":
+            self.discord.notify_stop_loss(
+                symbol, position['entry'], current_price, abs(pnl)
+            )
+        elif reason == "TAKE_PROFIT":
+            self.discord.notify_take_profit(
+                symbol, position['entry'], current_price, pnl
+            )
+        
+        self._register_close(symbol, reason, current_price, pnl)
+        logger.info(f"Position fermée {symbol}: PnL ${pnl:.2f}")
+    
+    def _register_close(self, symbol: str, reason: str, exit_price: float, pnl: float):
+        """Stats + retrait de la position (persistés)"""
+        position = self.active_positions.pop(symbol)
+        
+        # Stats
+        self.daily_stats['trades'] += 1
+        if pnl > 0:
+            self.daily_stats['wins'] += 1
+        else:
+            self.daily_stats['losses'] += 1
+        self.daily_stats['profit'] += pnl
+        
+        if self.state_store is not None:
+            self.state_store.record_trade(
+                symbol, reason, position['entry'], exit_price, position['quantity'], pnl
+            )
+            self.state_store.set_marker('daily_stats', self.daily_stats)
+    
+    def _close_on_fill(self, symbol: str, order: dict):
+        """Position clôturée par l'exécution d'un ordre de sortie (prix moyen réel)"""
+        position = self.active_positions[symbol]
+        
+        if order['orderId'] == position.get('tp_order_id'):
+            exit_price = order['avg_price'] or position['take_profit']
+            pnl = (exit_price - position['entry']) * position['quantity']
+            logger.info(f"🎯 Take profit exécuté {symbol} @ ${exit_price:.2f}")
+            self.discord.notify_take_profit(symbol, position['entry'], exit_price, pnl)
+            self._register_close(symbol, "TAKE_PROFIT", exit_price, pnl)
+            logger.info(f"Position auto-fermée {symbol}: PnL ${pnl:.2f}")
+            return
+        
+        exit_price = order['avg_price'] or order['stop_price'] or position['stop_loss']
+        pnl = (exit_price - position['entry']) * position['quantity']
+        
+        if pnl < 0:
+            logger.warning(f"⛔ Stop loss exécuté {symbol} @ ${exit_price:.2f}")
+            self.discord.notify_stop_loss(symbol, position['entry'], exit_price, abs(pnl))
+            reason = "STOP_LOSS"
+        else:
+            logger.info(f"🎯 Trailing stop exécuté {symbol} @ ${exit_price:.2f}")
+            self.discord.notify_take_profit(symbol, position['entry'], exit_price, pnl)
+            reason = "TRAILING_STOP"
+        
+        self._register_close(symbol, reason, exit_price, pnl)
+        logger.info(f"Position auto-fermée {symbol}: PnL ${pnl:.2f}")
+    
+    def on_order_update(self, order: dict):
+        """Changement de statut d'un ordre (user stream ou réconciliation REST)"""
+        if order['status'] != 'FILLED' or order['type'] not in ('STOP_LOSS_LIMIT', 'LIMIT_MAKER'):
+            return
+        with self.execution_lock:
+            position = self.active_positions.get(order['symbol'])
+            if position is not None and order['orderId'] in (position.get('stop_order_id'), position.get('tp_order_id')):
+                self._close_on_fill(order['symbol'], order)
+    
+    def refresh_order_index(self) -> bool:
+        """Un get_open_orders() tous symboles si le user stream n'alimente pas l'index
+
+        False si la réconciliation a échoué: l'index peut être périmé pour ce cycle.
+        """
+        if self.user_stream is not None and self.user_stream.connected:
+            return True
+        synced = self.order_index.sync(self.binance.get_open_orders(), self.binance.get_order)
+        if synced:
+            self.orders_unverified.clear()
+        return synced
+    
+    def _verify_exit_orders(self, symbol: str, position: dict) -> bool:
+        """Résout via get_order les ordres de sortie d'une position restaurée sans index fiable"""
+        if symbol not in self.orders_unverified:
+            return True
+        order_ids = [position.get(key) for key in ('stop_order_id', 'tp_order_id') if position.get(key) is not None]
+        if not order_ids:
+            return False
+        for order_id in order_ids:
+            order = self.binance.get_order(symbol, order_id)
+            if order is None:
+                return False
+            self.order_index.track(order)
+        self.orders_unverified.discard(symbol)
+        return True
+    
+    def _place_exit_orders(self, symbol: str, quantity: float, stop_price: float, take_profit: float = None):
+        """TP + SL en OCO sur l'exchange (EXIT_ORDER_MODE=oco), sinon stop seul; enregistrés dans l'index"""
+        position = self.active_positions.get(symbol)
+        
+        if Config.EXIT_ORDER_MODE == "oco" and take_profit:
+            order_list = self.binance.place_oco_exit(symbol, quantity, take_profit, stop_price)
+            if order_list:
+                self.order_index.track(order_list)
+                if position is not None:
+                    for report in order_list['orderReports']:
+                        key = 'stop_order_id' if report['type'] == 'STOP_LOSS_LIMIT' else 'tp_order_id'
+                        position[key] = report['orderId']
+                    self._save_position(symbol)
+                return order_list
+            logger.warning(f"{symbol}: OCO refusé, stop loss seul")
+        
+        order = self.binance.place_stop_loss(symbol, quantity, stop_price)
+        if order:
+            self.order_index.track(order)
+            if position is not None:
+                position['stop_order_id'] = order['orderId']
+                position.pop('tp_order_id', None)
+                self._save_position(symbol)
+        return order
+    
+    def _replace_stop(self, symbol: str, position: dict):
+        """Nouveau niveau de stop en une requête cancelReplace (ancien stop ou jambe d'OCO)
+
+        Remplacer la jambe stop d'un OCO annule aussi son take profit: le TP repasse
+        en surveillance logicielle pendant le trailing.
+        """
+        current = self.order_index.get(position.get('stop_order_id'))
+        if current is not None and current['status'] in ('NEW', 'PARTIALLY_FILLED'):
+            result = self.binance.replace_stop_loss(
+                symbol, current['orderId'], position['quantity'], position['stop_loss']
+            )
+            if result:
+                self.order_index.track(result['cancelResponse'])
+                self.order_index.track(result['newOrderResponse'])
+                position['stop_order_id'] = result['newOrderResponse']['orderId']
+                position.pop('tp_order_id', None)
+                self._save_position(symbol)
+                return result['newOrderResponse']
+        
+        # Pas de stop connu ou remplacement refusé: annulation puis nouveau stop
+        if not self._cancel_exit_orders(symbol):
+            return None
+        return self._place_exit_orders(symbol, position['quantity'], position['stop_loss'])
+    
+    def _save_position(self, symbol: str):
+        if self.state_store is not None:
+            self.state_store.save_position(symbol, self.active_positions[symbol])
+    
+    def restore_state(self):
+        """Recharge positions/stats et les réconcilie avec l'exchange (2 appels au total)"""
+        started = time.perf_counter()
+        self.daily_stats = self.state_store.get_marker('daily_stats', self.daily_stats)
+        self.last_daily_report = self.state_store.get_marker('last_daily_report', self.last_daily_report)
+        stored = self.state_store.load_positions()
+        
+        if stored:
+            balances = self.binance.get_balances()
+            # Ordres ouverts inconnus (erreur REST): aucun stop replacé, sinon doublons sur l'exchange
+            orders_known = self.order_index.sync(self.binance.get_open_orders())
+            stops = {o['symbol']: o['orderId'] for o in self.order_index.open_orders(order_type='STOP_LOSS_LIMIT')}
+            take_profits = {o['symbol']: o['orderId'] for o in self.order_index.open_orders(order_type='LIMIT_MAKER')}
+            
+            for symbol, position in stored.items():
+                held = balances.get(base_asset(symbol), 0.0) if balances is not None else None
+                # Frais et arrondi au lot: la moitié de la quantité suffit à dire que la position existe
+                if held is not None and held < position['quantity'] * 0.5:
+                    logger.warning(f"♻️ {symbol}: position enregistrée mais plus détenue, supprimée")
+                    self.state_store.delete_position(symbol)
+                    continue
+                
+                self.active_positions[symbol] = position
+                if symbol in stops:
+                    position['stop_order_id'] = stops[symbol]
+                    if symbol in take_profits:
+                        position['tp_order_id'] = take_profits[symbol]
+                    else:
+                        position.pop('tp_order_id', None)
+                elif not orders_known:
+                    logger.warning(f"♻️ {symbol}: ordres ouverts indisponibles, stop loss enregistré conservé")
+                    self.orders_unverified.add(symbol)
+                elif balances is not None:
+                    logger.warning(f"♻️ {symbol}: stop loss absent, replacé à ${position['stop_loss']:.2f}")
+                    self._place_exit_orders(symbol, position['quantity'], position['stop_loss'], position['take_profit'])
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"♻️ État restauré: {len(self.active_positions)} position(s) en {elapsed_ms:.0f} ms")
+    
+    def update_trailing_stops_pro(self):
+        """Met à jour trailing stops (MODE PRO)"""
+        if not self.pro_mode:
+            return
+        
+        for symbol in list(self.active_positions.keys()):
+            position = self.active_positions[symbol]
+            current_price = self.binance.get_current_price(symbol)
+            
+            self.apply_trailing_stop(symbol, position, current_price)
+    
+    def apply_trailing_stop(self, symbol: str, position: dict, current_price: float,
+                            min_step_pct: float = 0.0) -> bool:
+        """Trailing stop sur un prix: remplace l'ordre stop si le nouveau niveau avance d'au moins min_step_pct"""
+        trailing_result = self.position_manager.update_trailing_stop(
+            symbol, position, current_price
+        )
+        
+        if not trailing_result['updated']:
+            return False
+        
+        step_pct = (trailing_result['stop_loss'] - position['stop_loss']) / position['stop_loss'] * 100
+        if step_pct < min_step_pct:
+            return False
+        
+        position['stop_loss'] = trailing_result['stop_loss']
+        self._save_position(symbol)
+        
+        # Remplace l'ancien stop en une requête atomique
+        new_stop_order = self._replace_stop(symbol, position)
+        
+        if new_stop_order:
+            self.discord.notify(
+                f"🔄 **Trailing Stop {symbol}**\n"
+                f"Nouveau stop: ${position['stop_loss']:.2f}\n"
+                f"Profit sécurisé: {trailing_result['profit_locked']:.2f}%"
+            )
+        return True
+    
+    def _cancel_exit_orders(self, symbol: str) -> bool:
+        """Annule les ordres de sortie ouverts d'un symbole (stop, jambes d'OCO)
+
+        Retourne False si la position a été clôturée entre-temps (ordre déjà exécuté).
+        """
+        for order in self.order_index.open_orders(symbol):
+            # Une jambe d'OCO déjà annulée avec sa liste n'est plus ouverte dans l'index
+            current = self.order_index.get(order['orderId'])
+            if order['type'] in ('STOP_LOSS_LIMIT', 'LIMIT_MAKER') and current['status'] in ('NEW', 'PARTIALLY_FILLED'):
+                result = self.binance.cancel_order(symbol, order['orderId'])
+                if result is None:
+                    # Annulation refusée: index périmé, l'ordre a pu être exécuté (clôture via on_order_update)
+                    result = self.binance.get_order(symbol, order['orderId'])
+                self.order_index.track(result)
+        return symbol in self.active_positions
+    
+    def on_stream_price(self, symbol: str, price: float):
+        """Tick temps réel: take-profit, stop-loss et trailing stop (debouncés)"""
+        with self.execution_lock:
+            position = self.active_positions.get(symbol)
+            if position is None:
+                return
+            
+            if position.get('tp_order_id') is None and price >= position['take_profit']:
+                # Vente tentée au plus une fois par fenêtre (si elle échoue, pas un ordre par tick)
+                if self._stream_debounce(symbol, 'close'):
+                    logger.info(f"Take profit HIT (stream) {symbol}: {price}")
+                    self.close_position(symbol, "TAKE_PROFIT", exit_price=price)
+                return
+            
+            if price <= position['stop_loss']:
+                # L'ordre stop est sur l'exchange: on vérifie au plus une fois par fenêtre
+                if self._stream_debounce(symbol, 'stop'):
+                    self.check_stop_loss_hit(symbol)
+                return
+            
+            if self.pro_mode and self._stream_debounce(symbol, 'trailing'):
+                self.apply_trailing_stop(
+                    symbol, position, price, min_step_pct=Config.STREAM_MIN_STOP_STEP_PCT
+                )
+    
+    def _stream_debounce(self, symbol: str, action: str) -> bool:
+        """True si `action` n'a pas été faite pour `symbol` depuis STREAM_DEBOUNCE_SECONDS"""
+        now = time.time()
+        key = (symbol, action)
+        if now - self._stream_last_action.get(key, 0) < Config.STREAM_DEBOUNCE_SECONDS:
+            return False
+        self._stream_last_action[key] = now
+        return True
+    
+    def check_pyramiding_pro(self):
+        """Vérifie possibilité pyramiding (MODE PRO)"""
+        if not self.pro_mode:
+            return
+        
+        for symbol in list(self.active_positions.keys()):
+            position = self.active_positions[symbol]
+            current_price = self.binance.get_current_price(symbol)
+            
+            if self.position_manager.should_add_to_position(position, current_price):
+                self.add_to_position_pro(symbol, position, current_price)
+    
+    def add_to_position_pro(self, symbol: str, position: dict, current_price: float):
+        """Ajoute à position (pyramiding)"""
+        pyramid_count = position.get('pyramid_count', 0)
+        original_size_usd = position['entry'] * position.get('original_quantity', position['quantity'])
+        
+        pyramid_size_usd = self.position_manager.calculate_pyramid_size(
+            original_size_usd, pyramid_count
+        )
+        
+        if pyramid_size_usd > 0:
+            pyramid_quantity = pyramid_size_usd / current_price
+            
+            order = self.binance.place_order(
+                symbol=symbol,
+                side='BUY',
+                quantity=pyramid_quantity
+            )
+            
+            if order:
+                current_price = fill_price(order, current_price)
+                
+                # Mise à jour position
+                if 'original_quantity' not in position:
+                    position['original_quantity'] = position['quantity']
+                
+                total_qty = position['quantity'] + pyramid_quantity
+                avg_entry = (
+                    (position['entry'] * position['quantity'] + current_price * pyramid_quantity)
+                    / total_qty
+                )
+                
+                position['quantity'] = total_qty
+                position['entry'] = avg_entry
+                position['pyramid_count'] = pyramid_count + 1
+                
+                # Recalcule TP/SL
+                tp_sl = self.market_analyzer.calculate_dynamic_tp_sl(symbol, avg_entry)
+                position['take_profit'] = tp_sl['take_profit']
+                position['stop_loss'] = tp_sl['stop_loss']
+                self._save_position(symbol)
+                
+                # Ordres de sortie recalés sur la nouvelle quantité et les nouveaux TP/SL
+                if self._cancel_exit_orders(symbol):
+                    self._place_exit_orders(symbol, total_qty, position['stop_loss'], position['take_profit'])
+                
+                self.discord.notify(
+                    f"🔺 **Pyramiding {symbol}**\n"
+                    f"Ajouté: {pyramid_quantity:.6f} @ ${current_price:,.2f}\n"
+                    f"Nouvelle moyenne: ${avg_entry:,.2f}\n"
+                    f"Pyramide #{pyramid_count + 1}"
+                )
+                
+                logger.info(f"Pyramiding {symbol}: +{pyramid_quantity:.6f} @ ${current_price:.2f}")
+    
+    def execute_signal(self, signal: TradeSignal, market_context: dict = None):
+        """Exécute signal trading"""
+        with self.execution_lock:
+            self._execute_signal(signal, market_context)
+    
+    def _execute_signal(self, signal: TradeSignal, market_context: dict = None):
+        """Exécute signal trading (appelé sous execution_lock)"""
+        
+        if len(self.active_positions) >= Config.MAX_POSITIONS:
+            logger.info(f"Max positions atteint ({Config.MAX_POSITIONS})")
+            self.discord.notify(f"⚠️ Max {Config.MAX_POSITIONS} positions atteint - Signal {signal.action} {signal.symbol} ignoré", PRIORITY_LOW)
+            return
+        
+        if signal.action == "HOLD":
+            return
+        
+        if signal.action == "BUY":
+            analysis = signal.analysis
+            balance = self.binance.get_account_balance()
+            
+            # MODE PRO: Filtre stratégique
+            if self.pro_mode and market_context:
+                sentiment = market_context['sentiment'] or {}
+                decision = self.strategy_optimizer.should_trade(
+                    signal.symbol,
+                    multi_tf={'signal': market_context['multi_tf']['recommendation']},
+                    mistral={'action': signal.action, 'confidence': analysis.confidence},
+                    sentiment={'value': sentiment.get('value', 50), 'label': sentiment.get('sentiment', 'NEUTRAL')},
+                    market_trend=market_context['market_trend']
+                )
+                
+                if not decision['should_trade']:
+                    reason = ", ".join(decision['reasons'])
+                    logger.info(f"Trade refusé {signal.symbol}: {reason}")
+                    self.discord.notify(
+                        f"🚫 **Trade refusé {signal.symbol}**\n"
+                        f"Raison: {reason}\n"
+                        f"Score: {decision['score']}/10",
+                        PRIORITY_LOW
+                    )
+                    return
+            
+            # Calcul taille position
+            if self.pro_mode and market_context:
+                position_size_usd = self.position_manager.calculate_position_size(
+                    balance,
+                    analysis.confidence,
+                    market_context['market_trend']
+                )
+            else:
+                # Mode standard: 2% fixe
+                position_size_usd = balance * (Config.MAX_RISK_PERCENT / 100)
+            
+            if position_size_usd < 10:
+                logger.warning(f"Position size trop petite: ${position_size_usd:.2f}")
+                return
+            
+            # TP/SL dynamiques (PRO) ou fixes (Standard)
+            if self.pro_mode:
+                # ATR 4h déjà calculé par l'analyse multi-timeframe du cycle
+                h4 = (market_context or {}).get('multi_tf', {}).get('h4', {})
+                tp_sl = self.market_analyzer.calculate_dynamic_tp_sl(
+                    signal.symbol,
+                    analysis.entry_price,
+                    atr=h4.get('atr')
+                )
+            else:
+                tp_sl = {
+                    'take_profit': analysis.take_profit,
+                    'stop_loss': analysis.stop_loss,
+                    'tp_pct': 6.0,
+                    'sl_pct': 3.0
+                }
+            
+            quantity = position_size_usd / analysis.entry_price
+            
+            order = self.binance.place_order(
+                symbol=signal.symbol,
+                side='BUY',
+                quantity=round(quantity, 6)
+            )
+            
+            if order:
+                self.active_positions[signal.symbol] = {
+                    'symbol': signal.symbol,
+                    'entry': fill_price(order, analysis.entry_price),
+                    'quantity': quantity,
+                    'original_quantity': quantity,
+                    'stop_loss': tp_sl['stop_loss'],
+                    'take_profit': tp_sl['take_profit'],
+                    'pyramid_count': 0
+                }
+                
+                if self.pro_mode and market_context:
+                    self.active_positions[signal.symbol]['market_context'] = market_context
+                self._save_position(signal.symbol)
+                
+                self._place_exit_orders(
+                    signal.symbol,
+                    round(quantity, 6),
+                    tp_sl['stop_loss'],
+                    tp_sl['take_profit']
+                )
+                
+                # Notification
+                notif_text = (
+                    f"🟢 **BUY {signal.symbol}**\n\n"
+                    f"💰 **Prix:** ${analysis.entry_price:,.2f}\n"
+                    f"📊 **Quantité:** {quantity:.6f}\n"
+                    f"💵 **Montant:** ${position_size_usd:,.2f}\n\n"
+                    f"🎯 **Take-Profit:** ${tp_sl['take_profit']:,.2f} (+{tp_sl['tp_pct']:.1f}%)\n"
+                    f"⛔ **Stop-Loss:** ${tp_sl['stop_loss']:,.2f} (-{tp_sl['sl_pct']:.1f}%)\n"
+                )
+                
+                if self.pro_mode and market_context:
+                    notif_text += (
+                        f"\n📈 **Contexte PRO:**\n"
+                        f"• Tendance: {market_context['market_trend']}\n"
+                        f"• Multi-TF: {market_context['multi_tf']['recommendation']}\n"
+                        f"• Sentiment: {market_context['sentiment']['sentiment']}\n"
+                        f"• Confiance IA: {analysis.confidence}%\n"
+                    )
+                
+                notif_text += f"\n💡 **Raison:** {analysis.reasoning}"
+                
+                self.discord.notify(notif_text, PRIORITY_HIGH)
+                
+                logger.info(f"Position ouverte {signal.symbol}: {quantity:.6f} @ ${analysis.entry_price:.2f}")
+    
+    def tracked_symbols(self) -> set:
+        """Symboles analysés + symboles en position"""
+        return set(self.watchlist) | set(self.active_positions.keys())
+    
+    def send_cycle_summary(self, balance: float):
+        """Envoie résumé après chaque cycle"""
+        
+        # Un seul snapshot pour que tous les PnL soient calculés au même instant
+        if self.active_positions:
+            self.binance.refresh_prices(self.active_positions.keys())
+        
+        positions_text = []
+        held_elsewhere = [symbol for symbol in self.active_positions if symbol not in self.watchlist]
+        for symbol in self.watchlist + held_elsewhere:
+            if symbol in self.active_positions:
+                pos = self.active_positions[symbol]
+                current_price = self.binance.get_current_price(symbol)
+                pnl_pct = ((current_price - pos['entry']) / pos['entry']) * 100
+                emoji = "🟢" if pnl_pct > 0 else "🔴"
+                positions_text.append(f"{emoji} **{symbol}**: {pnl_pct:+.2f}%")
+            else:
+                positions_text.append(f"⏸️ **{symbol}**: Pas de position")
+        
+        mode_label = "PRO" if self.pro_mode else "Standard"
+        
+        self.discord.notify(
+            f"📊 **Résumé Cycle ({mode_label})** - {datetime.now().strftime('%H:%M')}\n\n"
+            f"{chr(10).join(positions_text)}\n\n"
+            f"💰 **Balance**: ${balance:,.2f} USDT\n"
+            f"📈 **Positions**: {len(self.active_positions)}/{Config.MAX_POSITIONS}\n"
+            f"🕒 **Prix au**: {self.binance.price_snapshot.timestamp_label()}\n"
+            f"⏰ **Prochain cycle**: {Config.CHECK_INTERVAL_HOURS}h"
+        )
+    
+    def send_daily_report(self, balance: float):
+        """Rapport quotidien 7h"""
+        
+        win_rate = (self.daily_stats['wins'] / self.daily_stats['trades'] * 100) if self.daily_stats['trades'] > 0 else 0
+        
+        if self.active_positions:
+            self.binance.refresh_prices(self.active_positions.keys())
+        
+        positions_summary = []
+        total_unrealized = 0
+        for symbol, pos in list(self.active_positions.items()):
+            current_price = self.binance.get_current_price(symbol)
+            unrealized = (current_price - pos['entry']) * pos['quantity']
+            total_unrealized += unrealized
+            pnl_pct = ((current_price - pos['entry']) / pos['entry']) * 100
+            emoji = "🟢" if unrealized > 0 else "🔴"
+            positions_summary.append(f"{emoji} {symbol}: {pnl_pct:+.2f}% (${unrealized:+.2f})")
+        
+        mode_label = "PRO" if self.pro_mode else "Standard"
+        
+        self.discord.notify(
+            f"📊 **RAPPORT QUOTIDIEN ({mode_label})** - {datetime.now().strftime('%d/%m/%Y 07:00')}\n\n"
+            f"💰 **Balance**: ${balance:,.2f} USDT\n"
+            f"📈 **Positions actives**: {len(self.active_positions)}/{Config.MAX_POSITIONS}\n"
+            f"🕒 **Prix au**: {self.binance.price_snapshot.timestamp_label()}\n\n"
+            f"{chr(10).join(positions_summary) if positions_summary else 'Aucune position active'}\n\n"
+            f"📊 **Stats 24h**:\n"
+            f"• Trades: {self.daily_stats['trades']}\n"
+            f"• Wins: {self.daily_stats['wins']} | Losses: {self.daily_stats['losses']}\n"
+            f"• Win Rate: {win_rate:.1f}%\n"
+            f"• P&L Réalisé: ${self.daily_stats['profit']:+.2f}\n"
+            f"• P&L Non réalisé: ${total_unrealized:+.2f}\n\n"
+            f"🎯 **Total**: ${self.daily_stats['profit'] + total_unrealized:+.2f}"
+        )
+        
+        # Reset stats
+        self.daily_stats = {'trades': 0, 'wins': 0, 'losses': 0, 'profit': 0.0}
+        if self.state_store is not None:
+            self.state_store.set_marker('daily_stats', self.daily_stats)
+    
+    def analyze_symbol(self, symbol: str, balance: float, sentiment: dict = None):
+        """Analyse un symbole (thread-safe, sans exécution d'ordre)"""
+        prepared = self.prepare_symbol(symbol, sentiment)
+        if prepared is None:
+            return None
+        
+        klines, current_price, market_context = prepared
+        signal = self.mistral.analyze_market(symbol, klines, current_price, balance)
+        self.notify_hold(signal, market_context)
+        return signal, market_context
+    
+    def prepare_symbol(self, symbol: str, sentiment: dict = None):
+        """Contexte marché + klines + prix d'un symbole, None si données indisponibles"""
+        market_context = None
+        
+        # Contexte marché (PRO)
+        if self.pro_mode:
+            market_trend = self.market_analyzer.get_market_trend(symbol)
+            multi_tf = self.market_analyzer.multi_timeframe_analysis(symbol)
+            
+            market_context = {
+                'market_trend': market_trend,
+                'multi_tf': multi_tf,
+                'sentiment': sentiment
+            }
+        
+        klines = self.binance.get_kline_columns(symbol, Config.TIMEFRAME)
+        if len(klines['close']) == 0:
+            return None
+        
+        current_price = self.binance.get_current_price(symbol)
+        if current_price == 0:
+            return None
+        
+        return klines, current_price, market_context
+    
+    def notify_hold(self, signal, market_context: dict = None):
+        """Notification pour chaque analyse HOLD"""
+        if signal.action == "HOLD":
+            hold_text = f"⏸️ **{signal.symbol}**: HOLD (confiance {signal.analysis.confidence if signal.analysis else 0}%)"
+            if self.pro_mode and market_context:
+                hold_text += f"\nTendance: {market_context['market_trend']}, Multi-TF: {market_context['multi_tf']['recommendation']}"
+            self.discord.notify(hold_text, PRIORITY_LOW)
+    
+    def prepare_symbols(self, symbols: list, sentiment: dict = None) -> dict:
+        """prepare_symbol pour plusieurs symboles: klines en parallèle, indicateurs groupés"""
+        contexts = {}
+        if self.pro_mode:
+            trends = self.market_analyzer.get_market_trends(symbols)
+            multi_tf = self.market_analyzer.multi_timeframe_analyses(symbols)
+            contexts = {
+                symbol: {'market_trend': trends[symbol], 'multi_tf': multi_tf[symbol], 'sentiment': sentiment}
+                for symbol in symbols
+            }
+        
+        def fetch(symbol):
+            return self.binance.get_kline_columns(symbol, Config.TIMEFRAME)
+        
+        prepared = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(Config.CYCLE_WORKERS, len(symbols)))) as pool:
+            futures = {pool.submit(fetch, symbol): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    klines = future.result()
+                except Exception as e:
+                    logger.error(f"Erreur analyse {symbol}: {e}", exc_info=True)
+                    continue
+                if len(klines['close']) == 0:
+                    continue
+                current_price = self.binance.get_current_price(symbol)
+                if current_price == 0:
+                    continue
+                prepared[symbol] = (klines, current_price, contexts.get(symbol))
+        return prepared
+    
+    def analyze_symbols_batched(self, symbols: list, balance: float, sentiment: dict = None) -> list:
+        """Préparation groupée puis une seule requête Mistral pour tous les symboles"""
+        prepared = self.prepare_symbols(symbols, sentiment)
+        
+        # Ordre de la watchlist (classement de l'univers) conservé pour l'exécution
+        ordered = [symbol for symbol in symbols if symbol in prepared]
+        signals = self.mistral.analyze_markets(
+            [(symbol, prepared[symbol][0], prepared[symbol][1]) for symbol in ordered], balance
+        )
+        
+        results = []
+        for symbol in ordered:
+            market_context = prepared[symbol][2]
+            self.notify_hold(signals[symbol], market_context)
+            results.append((signals[symbol], market_context))
+        return results
+    
+    def run_cycle(self):
+        """Cycle d'analyse"""
+        mode_label = "PRO" if self.pro_mode else "STANDARD"
+        logger.info(f"=== NOUVEAU CYCLE ({mode_label}) ===")
+        stages = StageTimer(self.metrics, 'cycle_stage_seconds')
+        
+        balance = self.binance.get_account_balance()
+        logger.info(f"Balance: ${balance:.2f}")
+        stages.lap('balance')
+        
+        # Budget de latence Mistral pour l'ensemble du cycle
+        self.mistral.begin_cycle()
+        
+        # Sélection de l'univers du cycle (une requête ticker 24h pour toutes les paires)
+        if self.universe is not None:
+            self.watchlist = self.universe.scan() or self.watchlist
+            stages.lap('universe')
+        
+        # Snapshot prix du cycle (une requête ticker pour tous les symboles)
+        self.binance.refresh_prices(self.tracked_symbols())
+        stages.lap('prices')
+        
+        # Contexte marché global (MODE PRO)
+        sentiment = None
+        if self.pro_mode:
+            sentiment = self.market_analyzer.get_market_sentiment()
+            stages.lap('sentiment')
+        
+        # Positions partagées avec le stream monitor → sous execution_lock
+        with self.execution_lock:
+            orders_synced = self.refresh_order_index() if self.active_positions else True
+            
+            # Check positions actives
+            for symbol in list(self.active_positions.keys()):
+                self.check_stop_loss_hit(symbol, orders_synced)
+            
+            # Update trailing stops (PRO)
+            if self.pro_mode:
+                self.update_trailing_stops_pro()
+                self.check_pyramiding_pro()
+        stages.lap('positions')
+        
+        # Analyse chaque symbole
+        symbols = []
+        for symbol in self.watchlist:
+            if symbol in self.active_positions:
+                logger.info(f"{symbol}: Position active, skip")
+                continue
+            symbols.append(symbol)
+        
+        if Config.LLM_BATCH_ENABLED and len(symbols) > 1:
+            # Une requête Mistral pour tout le cycle au lieu d'une par symbole
+            for result in self.analyze_symbols_batched(symbols, balance, sentiment):
+                self.execute_signal(*result)
+            stages.lap('analysis')
+        elif Config.CYCLE_WORKERS > 1 and len(symbols) > 1:
+            # Analyses en parallèle, exécution des ordres sérialisée dans ce thread
+            with ThreadPoolExecutor(max_workers=min(Config.CYCLE_WORKERS, len(symbols))) as pool:
+                futures = {
+                    pool.submit(self.analyze_symbol, symbol, balance, sentiment): symbol
+                    for symbol in symbols
+                }
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Erreur analyse {futures[future]}: {e}", exc_info=True)
+                        continue
+                    if result:
+                        self.execute_signal(*result)
+            stages.lap('analysis')
+        else:
+            for symbol in symbols:
+                result = self.analyze_symbol(symbol, balance, sentiment)
+                if result:
+                    self.execute_signal(*result)
+                stages.lap('analysis')
+                
+                time.sleep(2)
+                stages.lap('sleep')
+        
+        latency = self.mistral.pipeline.tracker.summary()
+        if latency['count']:
+            logger.info(
+                f"⏱️ Latence Mistral: p50 {latency['p50']:.1f}s, p90 {latency['p90']:.1f}s, "
+                f"p99 {latency['p99']:.1f}s, max {latency['max']:.1f}s "
+                f"(hedges {latency['hedges_sent']}, gagnés {latency['hedge']}, timeouts {latency['timeout']})"
+            )
+        
+        if self.mistral.response_cache is not None:
+            self.mistral.response_cache.flush()
+            stats = self.mistral.response_cache.stats()
+            logger.info(
+                f"🧠 Cache Mistral: {stats['hits']} hits / {stats['misses']} misses "
+                f"({stats['hit_rate']:.0f}%), {stats['entries']} entrées"
+            )
+        
+        # Résumé fin de cycle
+        self.send_cycle_summary(balance)
+        stages.lap('summary')
+        
+        self.metrics.observe('cycle_seconds', stages.elapsed())
+        self.metrics.inc('cycles_total')
+        logger.info(f"⏱️ Cycle terminé en {stages.elapsed():.1f}s")
+    
+    def run(self):
+        """Boucle principale"""
+        mode_label = "PRO 🚀" if self.pro_mode else "Standard 📊"
+        self.discord.notify(f"🤖 **Bot Trading {mode_label} démarré**", PRIORITY_HIGH)
+        
+        if self.stream_monitor is not None:
+            self.stream_monitor.start()
+        if self.user_stream is not None:
+            self.user_stream.start()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.start()
+        
+        while True:
+            try:
+                # Check si 7h pour rapport quotidien
+                now = datetime.now()
+                if now.hour == 7 and now.day != self.last_daily_report:
+                    balance = self.binance.get_account_balance()
+                    self.send_daily_report(balance)
+                    self.last_daily_report = now.day
+                    if self.state_store is not None:
+                        self.state_store.set_marker('last_daily_report', self.last_daily_report)
+                
+                self.run_cycle()
+                
+                sleep_seconds = Config.CHECK_INTERVAL_HOURS * 3600
+                logger.info(f"Sleep {Config.CHECK_INTERVAL_HOURS}h...")
+                time.sleep(sleep_seconds)
+                
+            except KeyboardInterrupt:
+                logger.info("Arrêt bot...")
+                if self.stream_monitor is not None:
+                    self.stream_monitor.stop()
+                if self.user_stream is not None:
+                    self.user_stream.stop()
+                self.discord.notify("⛔ Bot arrêté manuellement", PRIORITY_HIGH)
+                self.discord.close()
+                if self.mistral.response_cache is not None:
+                    self.mistral.response_cache.flush()
+                if self.metrics_exporter is not None:
+                    self.metrics_exporter.stop()
+                if self.http_tape is not None:
+                    self.http_tape.close()
+                    logger.info(f"📼 Tape HTTP: {self.http_tape.stats()}")
+                break
+            except Exception as e:
+                logger.error(f"ERREUR CRITIQUE: {e}", exc_info=True)
+                self.metrics.inc('cycle_errors_total')
+                self.discord.notify(f"❌ Erreur: {str(e)}", PRIORITY_HIGH)
+                time.sleep(60)
+
+if __name__ == "__main__":
+    # Configuré au lancement seulement: importer main (benchmark, tests) ne crée pas bot.log
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('bot.log'),
+            logging.StreamHandler()
+        ]
+    )
+    bot = TradingBot()
     bot.run()
\ No newline at end of file
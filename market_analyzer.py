@@ -1,224 +1,254 @@
-import pandas as pd
-import ta
-from binance_client import BinanceClient
-import logging
-
-logger = logging.getLogger(__name__)
-
-class MarketAnalyzer:
-    def __init__(self, binance_client: BinanceClient):
-        self.binance = binance_client
-    
-    def get_market_trend(self, symbol: str) -> str:
-        """Détermine tendance globale: BULL, BEAR, SIDEWAYS"""
-        try:
-            # Analyse sur timeframe journalier
-            klines = self.binance.get_klines(symbol, "1d", 200)
-            if not klines:
-                return "NEUTRAL"
-            
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            
-            df['close'] = pd.to_numeric(df['close'])
-            
-            # EMA 50 et 200
-            ema_50 = ta.trend.EMAIndicator(df['close'], window=50).ema_indicator().iloc[-1]
-            ema_200 = ta.trend.EMAIndicator(df['close'], window=200).ema_indicator().iloc[-1]
-            
-            # Détermination tendance
-            if ema_50 > ema_200 * 1.02:
-                trend = "BULL"
-            elif ema_50 < ema_200 * 0.98:
-                trend = "BEAR"
-            else:
-                trend = "SIDEWAYS"
-            
-            logger.info(f"{symbol} Tendance globale: {trend} (EMA50: {ema_50:.2f}, EMA200: {ema_200:.2f})")
-            return trend
-            
-        except Exception as e:
-            logger.error(f"Erreur get_market_trend: {e}")
-            return "NEUTRAL"
-    
-    def multi_timeframe_analysis(self, symbol: str) -> dict:
-        """Analyse sur 3 timeframes"""
-        try:
-            # 1 jour - Tendance long terme
-            daily = self._analyze_timeframe(symbol, "1d", 50)
-            
-            # 4 heures - Tendance moyen terme
-            h4 = self._analyze_timeframe(symbol, "4h", 50)
-            
-            # 1 heure - Signal court terme
-            h1 = self._analyze_timeframe(symbol, "1h", 50)
-            
-            # Score d'alignement
-            alignment_score = 0
-            if daily['trend'] == "BULL":
-                alignment_score += 3
-            if h4['trend'] == "BULL":
-                alignment_score += 2
-            if h1['trend'] == "BULL":
-                alignment_score += 1
-            
-            return {
-                'daily': daily,
-                'h4': h4,
-                'h1': h1,
-                'alignment_score': alignment_score,  # 0-6
-                'recommendation': self._get_recommendation(alignment_score)
-            }
-            
-        except Exception as e:
-            logger.error(f"Erreur multi_timeframe_analysis: {e}")
-            return {'recommendation': 'HOLD', 'alignment_score': 0}
-    
-    def _analyze_timeframe(self, symbol: str, timeframe: str, limit: int) -> dict:
-        """Analyse un timeframe spécifique"""
-        try:
-            klines = self.binance.get_klines(symbol, timeframe, limit)
-            
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            
-            df['close'] = pd.to_numeric(df['close'])
-            df['high'] = pd.to_numeric(df['high'])
-            df['low'] = pd.to_numeric(df['low'])
-            
-            # RSI
-            rsi = ta.momentum.RSIIndicator(df['close'], window=14).rsi().iloc[-1]
-            
-            # MACD
-            macd = ta.trend.MACD(df['close'])
-            macd_line = macd.macd().iloc[-1]
-            macd_signal = macd.macd_signal().iloc[-1]
-            
-            # EMA 20 vs 50
-            ema_20 = ta.trend.EMAIndicator(df['close'], window=20).ema_indicator().iloc[-1]
-            ema_50 = ta.trend.EMAIndicator(df['close'], window=50).ema_indicator().iloc[-1]
-            
-            # Détermination tendance
-            if ema_20 > ema_50 and macd_line > macd_signal and rsi < 70:
-                trend = "BULL"
-            elif ema_20 < ema_50 and macd_line < macd_signal and rsi > 30:
-                trend = "BEAR"
-            else:
-                trend = "NEUTRAL"
-            
-            return {
-                'trend': trend,
-                'rsi': rsi,
-                'macd': macd_line - macd_signal,
-                'ema_cross': ema_20 > ema_50
-            }
-            
-        except Exception as e:
-            logger.error(f"Erreur _analyze_timeframe: {e}")
-            return {'trend': 'NEUTRAL', 'rsi': 50, 'macd': 0, 'ema_cross': False}
-    
-    def _get_recommendation(self, alignment_score: int) -> str:
-        """Recommandation selon score d'alignement"""
-        if alignment_score >= 5:
-            return "STRONG_BUY"  # Tous timeframes bullish
-        elif alignment_score >= 3:
-            return "BUY"  # Majorité bullish
-        elif alignment_score <= 1:
-            return "STRONG_SELL"  # Majorité bearish
-        else:
-            return "HOLD"  # Mixte
-    
-    def calculate_dynamic_tp_sl(self, symbol: str, entry_price: float) -> dict:
-        """Calcule TP/SL dynamiques selon volatilité"""
-        try:
-            klines = self.binance.get_klines(symbol, "4h", 50)
-            
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            
-            df['high'] = pd.to_numeric(df['high'])
-            df['low'] = pd.to_numeric(df['low'])
-            df['close'] = pd.to_numeric(df['close'])
-            
-            # ATR (Average True Range) = volatilité
-            atr_indicator = ta.volatility.AverageTrueRange(
-                df['high'], df['low'], df['close'], window=14
-            )
-            atr = atr_indicator.average_true_range().iloc[-1]
-            
-            atr_pct = (atr / entry_price) * 100
-            
-            # Ajuste TP/SL selon volatilité
-            if atr_pct < 2:  # Faible volatilité
-                tp_pct = 0.04  # +4%
-                sl_pct = 0.02  # -2%
-            elif atr_pct < 4:  # Moyenne volatilité
-                tp_pct = 0.06  # +6%
-                sl_pct = 0.03  # -3%
-            else:  # Forte volatilité
-                tp_pct = 0.10  # +10%
-                sl_pct = 0.04  # -4%
-            
-            return {
-                'take_profit': entry_price * (1 + tp_pct),
-                'stop_loss': entry_price * (1 - sl_pct),
-                'atr_pct': atr_pct,
-                'tp_pct': tp_pct * 100,
-                'sl_pct': sl_pct * 100
-            }
-            
-        except Exception as e:
-            logger.error(f"Erreur calculate_dynamic_tp_sl: {e}")
-            return {
-                'take_profit': entry_price * 1.06,
-                'stop_loss': entry_price * 0.97,
-                'atr_pct': 3.0,
-                'tp_pct': 6.0,
-                'sl_pct': 3.0
-            }
-    
-    def get_market_sentiment(self) -> dict:
-        """Récupère Fear & Greed Index"""
-        try:
-            import requests
-            response = requests.get("https://api.alternative.me/fng/", timeout=5)
-            data = response.json()['data'][0]
-            
-            fng_value = int(data['value'])
-            
-            if fng_value < 25:
-                sentiment = "EXTREME_FEAR"
-                bias = "BULLISH"  # Bon moment pour acheter
-            elif fng_value < 45:
-                sentiment = "FEAR"
-                bias = "NEUTRAL_BULLISH"
-            elif fng_value < 55:
-                sentiment = "NEUTRAL"
-                bias = "NEUTRAL"
-            elif fng_value < 75:
-                sentiment = "GREED"
-                bias = "NEUTRAL_BEARISH"
-            else:
-                sentiment = "EXTREME_GREED"
-                bias = "BEARISH"  # Éviter les achats
-            
-            logger.info(f"Fear & Greed Index: {fng_value} ({sentiment})")
-            
-            return {
-                'value': fng_value,
-                'sentiment': sentiment,
-                'bias': bias
-            }
-            
-        except Exception as e:
-            logger.error(f"Erreur get_market_sentiment: {e}")
-            return {'value': 50, 'sentiment': 'NEUTRAL', 'bias': 'NEUTRAL'}
+from concurrent.futures import ThreadPoolExecutor
+from binance_client import BinanceClient
+from config import Config
+from indicator_engine import IndicatorEngine, batch_snapshots
+from metrics import get_metrics
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Règles de décision en fonctions pures: scalaires (bot live) ou tableaux (backtest)
+
+def classify_trend(ema_50, ema_200):
+    """Tendance globale BULL/BEAR/SIDEWAYS (bande de ±2% autour de l'EMA200)"""
+    return np.select([ema_50 > ema_200 * 1.02, ema_50 < ema_200 * 0.98], ["BULL", "BEAR"], "SIDEWAYS")
+
+
+def classify_timeframe(ema_20, ema_50, macd, macd_signal, rsi):
+    """Tendance d'un timeframe BULL/BEAR/NEUTRAL"""
+    bull = (ema_20 > ema_50) & (macd > macd_signal) & (rsi < 70)
+    bear = (ema_20 < ema_50) & (macd < macd_signal) & (rsi > 30)
+    return np.select([bull, bear], ["BULL", "BEAR"], "NEUTRAL")
+
+
+def alignment_score(daily, h4, h1):
+    """Score d'alignement 0-6 (1d: 3, 4h: 2, 1h: 1)"""
+    return (
+        3 * (np.asarray(daily) == "BULL")
+        + 2 * (np.asarray(h4) == "BULL")
+        + 1 * (np.asarray(h1) == "BULL")
+    )
+
+
+def recommendation_from_score(score):
+    """Recommandation selon score d'alignement"""
+    return np.select([score >= 5, score >= 3, score <= 1], ["STRONG_BUY", "BUY", "STRONG_SELL"], "HOLD")
+
+
+def tp_sl_pct(atr_pct):
+    """(tp_pct, sl_pct) en fraction selon la volatilité ATR en %"""
+    low, mid = atr_pct < 2, atr_pct < 4
+    tp = np.select([low, mid], [0.04, 0.06], 0.10)
+    sl = np.select([low, mid], [0.02, 0.03], 0.04)
+    return tp, sl
+
+
+class MarketAnalyzer:
+    def __init__(self, binance_client: BinanceClient, indicator_engine: IndicatorEngine = None):
+        self.binance = binance_client
+        self.indicator_engine = indicator_engine
+    
+    def _columns(self, symbols: list, interval: str, limit: int) -> dict:
+        """Klines en colonnes de plusieurs symboles (requêtes en parallèle), vides exclues"""
+        def fetch(symbol):
+            return self.binance.get_kline_columns(symbol, interval, limit)
+        
+        if len(symbols) == 1:
+            columns = {symbols[0]: fetch(symbols[0])}
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(Config.CYCLE_WORKERS, len(symbols)))) as pool:
+                columns = dict(zip(symbols, pool.map(fetch, symbols)))
+        return {symbol: klines for symbol, klines in columns.items() if len(klines['close'])}
+    
+    def _indicators(self, interval: str, klines_by_symbol: dict) -> dict:
+        """Indicateurs de plusieurs symboles: engine incrémental, sinon un passage vectorisé"""
+        with get_metrics().timer('indicator_seconds', interval=interval):
+            if self.indicator_engine is not None:
+                return {
+                    symbol: self.indicator_engine.snapshot(symbol, interval, klines)
+                    for symbol, klines in klines_by_symbol.items()
+                }
+            return batch_snapshots(klines_by_symbol)
+    
+    def get_market_trend(self, symbol: str) -> str:
+        """Détermine tendance globale: BULL, BEAR, SIDEWAYS"""
+        return self.get_market_trends([symbol])[symbol]
+    
+    def get_market_trends(self, symbols: list) -> dict:
+        """Tendance globale de plusieurs symboles (EMA50/EMA200 journalières, calcul groupé)"""
+        trends = {symbol: "NEUTRAL" for symbol in symbols}
+        try:
+            # Analyse sur timeframe journalier
+            indicators = self._indicators("1d", self._columns(symbols, "1d", 200))
+            if not indicators:
+                return trends
+            
+            # EMA 50 et 200
+            ordered = list(indicators)
+            ema_50 = np.array([indicators[symbol]['ema_50'] for symbol in ordered])
+            ema_200 = np.array([indicators[symbol]['ema_200'] for symbol in ordered])
+            
+            # Détermination tendance
+            for symbol, trend, e50, e200 in zip(ordered, classify_trend(ema_50, ema_200), ema_50, ema_200):
+                trends[symbol] = str(trend)
+                logger.info(f"{symbol} Tendance globale: {trend} (EMA50: {e50:.2f}, EMA200: {e200:.2f})")
+            return trends
+            
+        except Exception as e:
+            logger.error(f"Erreur get_market_trend: {e}")
+            return trends
+    
+    def multi_timeframe_analysis(self, symbol: str) -> dict:
+        """Analyse sur 3 timeframes"""
+        return self.multi_timeframe_analyses([symbol])[symbol]
+    
+    def multi_timeframe_analyses(self, symbols: list) -> dict:
+        """Analyse sur 3 timeframes de plusieurs symboles (un calcul groupé par timeframe)"""
+        try:
+            # 1 jour - Tendance long terme
+            daily = self._analyze_timeframes(symbols, "1d", 50)
+            
+            # 4 heures - Tendance moyen terme
+            h4 = self._analyze_timeframes(symbols, "4h", 50)
+            
+            # 1 heure - Signal court terme
+            h1 = self._analyze_timeframes(symbols, "1h", 50)
+            
+            # Score d'alignement
+            scores = alignment_score(
+                [daily[s]['trend'] for s in symbols],
+                [h4[s]['trend'] for s in symbols],
+                [h1[s]['trend'] for s in symbols]
+            )
+            
+            return {
+                symbol: {
+                    'daily': daily[symbol],
+                    'h4': h4[symbol],
+                    'h1': h1[symbol],
+                    'alignment_score': int(score),  # 0-6
+                    'recommendation': self._get_recommendation(int(score))
+                }
+                for symbol, score in zip(symbols, scores)
+            }
+            
+        except Exception as e:
+            logger.error(f"Erreur multi_timeframe_analysis: {e}")
+            return {symbol: {'recommendation': 'HOLD', 'alignment_score': 0} for symbol in symbols}
+    
+    def _analyze_timeframe(self, symbol: str, timeframe: str, limit: int) -> dict:
+        """Analyse un timeframe spécifique"""
+        return self._analyze_timeframes([symbol], timeframe, limit)[symbol]
+    
+    def _analyze_timeframes(self, symbols: list, timeframe: str, limit: int) -> dict:
+        """Analyse un timeframe pour plusieurs symboles (indicateurs en un passage)"""
+        default = {'trend': 'NEUTRAL', 'rsi': 50, 'macd': 0, 'ema_cross': False}
+        results = {symbol: dict(default) for symbol in symbols}
+        try:
+            indicators = self._indicators(timeframe, self._columns(symbols, timeframe, limit))
+            if not indicators:
+                return results
+            
+            ordered = list(indicators)
+            column = lambda name: np.array([indicators[symbol][name] for symbol in ordered])
+            
+            # RSI, MACD, EMA 20 vs 50
+            rsi = column('rsi')
+            macd_line = column('macd')
+            macd_signal = column('macd_signal')
+            ema_20 = column('ema_20')
+            ema_50 = column('ema_50')
+            
+            # Détermination tendance
+            trends = classify_timeframe(ema_20, ema_50, macd_line, macd_signal, rsi)
+            
+            for i, symbol in enumerate(ordered):
+                results[symbol] = {
+                    'trend': str(trends[i]),
+                    'rsi': float(rsi[i]),
+                    'macd': float(macd_line[i] - macd_signal[i]),
+                    'ema_cross': bool(ema_20[i] > ema_50[i]),
+                    # Réutilisé par calculate_dynamic_tp_sl (même série 4h/50)
+                    'atr': indicators[symbol]['atr']
+                }
+            return results
+            
+        except Exception as e:
+            logger.error(f"Erreur _analyze_timeframe: {e}")
+            return results
+    
+    def _get_recommendation(self, alignment_score: int) -> str:
+        """Recommandation selon score d'alignement"""
+        return str(recommendation_from_score(alignment_score))
+    
+    def calculate_dynamic_tp_sl(self, symbol: str, entry_price: float, atr: float = None) -> dict:
+        """Calcule TP/SL dynamiques selon volatilité
+
+        `atr`: ATR 4h déjà calculé (multi_tf['h4']['atr'] de l'analyse groupée), sinon recalculé.
+        """
+        try:
+            # ATR (Average True Range) = volatilité
+            if atr is None:
+                atr = self._indicators("4h", self._columns([symbol], "4h", 50))[symbol]['atr']
+            
+            atr_pct = (atr / entry_price) * 100
+            
+            # Ajuste TP/SL selon volatilité (faible <2%, moyenne <4%, forte)
+            tp_pct, sl_pct = (float(v) for v in tp_sl_pct(atr_pct))
+            
+            return {
+                'take_profit': entry_price * (1 + tp_pct),
+                'stop_loss': entry_price * (1 - sl_pct),
+                'atr_pct': atr_pct,
+                'tp_pct': tp_pct * 100,
+                'sl_pct': sl_pct * 100
+            }
+            
+        except Exception as e:
+            logger.error(f"Erreur calculate_dynamic_tp_sl: {e}")
+            return {
+                'take_profit': entry_price * 1.06,
+                'stop_loss': entry_price * 0.97,
+                'atr_pct': 3.0,
+                'tp_pct': 6.0,
+                'sl_pct': 3.0
+            }
+    
+    def get_market_sentiment(self) -> dict:
+        """Récupère Fear & Greed Index"""
+        try:
+            import requests
+            response = requests.get("https://api.alternative.me/fng/", timeout=5)
+            data = response.json()['data'][0]
+            
+            fng_value = int(data['value'])
+            
+            if fng_value < 25:
+                sentiment = "EXTREME_FEAR"
+                bias = "BULLISH"  # Bon moment pour acheter
+            elif fng_value < 45:
+                sentiment = "FEAR"
+                bias = "NEUTRAL_BULLISH"
+            elif fng_value < 55:
+                sentiment = "NEUTRAL"
+                bias = "NEUTRAL"
+            elif fng_value < 75:
+                sentiment = "GREED"
+                bias = "NEUTRAL_BEARISH"
+            else:
+                sentiment = "EXTREME_GREED"
+                bias = "BEARISH"  # Éviter les achats
+            
+            logger.info(f"Fear & Greed Index: {fng_value} ({sentiment})")
+            
+            return {
+                'value': fng_value,
+                'sentiment': sentiment,
+                'bias': bias
+            }
+            
+        except Exception as e:
+            logger.error(f"Erreur get_market_sentiment: {e}")
+            return {'value': 50, 'sentiment': 'NEUTRAL', 'bias': 'NEUTRAL'}
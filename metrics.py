@@ -0,0 +1,305 @@
+import bisect
+import json
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bornes (secondes) communes à tous les histogrammes: de l'appel REST au cycle complet
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """Compteurs, jauges et histogrammes en mémoire (un verrou, O(log buckets) par mesure)
+
+    Les jauges peuvent être des callbacks évalués à l'export (profondeur de file...).
+    Export au format texte Prometheus ou en dictionnaire JSON.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, enabled: bool = True):
+        self.buckets = tuple(buckets)
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._gauge_callbacks = {}
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name: str, text: str):
+        self._help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def gauge_callback(self, name: str, fn):
+        """Jauge lue à l'export: fn() -> valeur, ou {label_value: valeur} avec label 'key'"""
+        self._gauge_callbacks[name] = fn
+
+    def observe(self, name: str, seconds: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets) + 1)
+            histogram.counts[index] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Durée du bloc observée dans l'histogramme `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def _collect(self) -> tuple:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            histograms = {
+                key: (list(h.counts), h.sum, h.count) for key, h in self._histograms.items()
+            }
+        for name, fn in list(self._gauge_callbacks.items()):
+            try:
+                value = fn()
+            except Exception as e:
+                logger.debug(f"Jauge {name} indisponible: {e}")
+                continue
+            if isinstance(value, dict):
+                for label, v in value.items():
+                    gauges[(name, (('key', label),))] = v
+            else:
+                gauges[(name, ())] = value
+        return counters, gauges, histograms
+
+    def render_prometheus(self) -> str:
+        counters, gauges, histograms = self._collect()
+        lines = []
+        seen = set()
+
+        def header(name: str, kind: str):
+            if name in seen:
+                return
+            seen.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for (name, key), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+        for (name, key), value in sorted(gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+        for (name, key), (counts, total, count) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(key)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Vue JSON: compteurs/jauges par nom, histogrammes avec moyenne et quantiles estimés"""
+        counters, gauges, histograms = self._collect()
+
+        def group(values: dict) -> dict:
+            grouped = {}
+            for (name, key), value in sorted(values.items()):
+                grouped.setdefault(name, {})[",".join(f"{k}={v}" for k, v in key) or "_"] = value
+            return grouped
+
+        histogram_view = {}
+        for (name, key), (counts, total, count) in sorted(histograms.items()):
+            histogram_view.setdefault(name, {})[",".join(f"{k}={v}" for k, v in key) or "_"] = {
+                'count': count,
+                'sum': round(total, 6),
+                'mean': round(total / count, 6) if count else None,
+                'p50': self._quantile(counts, count, 0.50),
+                'p90': self._quantile(counts, count, 0.90),
+                'p99': self._quantile(counts, count, 0.99)
+            }
+
+        return {
+            'timestamp': time.time(),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'counters': group(counters),
+            'gauges': group(gauges),
+            'histograms': histogram_view
+        }
+
+    def _quantile(self, counts: list, count: int, q: float):
+        """Borne supérieure du bucket contenant le quantile q (None au-delà de la dernière borne)"""
+        if not count:
+            return None
+        rank = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return None
+
+
+class StageTimer:
+    """Chronomètre par étapes: lap(stage) observe le temps écoulé depuis l'étape précédente"""
+
+    def __init__(self, registry: MetricsRegistry, name: str):
+        self.registry = registry
+        self.name = name
+        self.started = self._last = time.perf_counter()
+        self.laps = {}
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.registry.observe(self.name, now - self._last, stage=stage)
+        self.laps[stage] = self.laps.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Pas de log par scrape
+        pass
+
+
+class MetricsExporter:
+    """Endpoint HTTP Prometheus (localhost) + snapshot JSON périodique, en threads daemon"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 0,
+                 snapshot_path: str = None, snapshot_seconds: float = 60):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.snapshot_path = snapshot_path
+        self.snapshot_seconds = snapshot_seconds
+        self._server = None
+        self._stop = threading.Event()
+        self._snapshot_thread = None
+
+    def start(self):
+        if self.port:
+            try:
+                handler = type('MetricsHandler', (_MetricsHandler,), {'registry': self.registry})
+                self._server = ThreadingHTTPServer((self.host, self.port), handler)
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+                logger.info(f"📈 Métriques Prometheus: http://{self.host}:{self._server.server_port}/metrics")
+            except OSError as e:
+                logger.error(f"Endpoint métriques indisponible ({self.host}:{self.port}): {e}")
+                self._server = None
+
+        if self.snapshot_path and self.snapshot_seconds > 0:
+            self._snapshot_thread = threading.Thread(target=self._snapshot_loop, name="metrics-snapshot", daemon=True)
+            self._snapshot_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self.snapshot_path:
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        """Écriture atomique du snapshot JSON"""
+        try:
+            directory = os.path.dirname(self.snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = self.snapshot_path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(self.registry.snapshot(), f, indent=1)
+            os.replace(tmp, self.snapshot_path)
+        except OSError as e:
+            logger.error(f"Erreur snapshot métriques: {e}")
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_seconds):
+            self.write_snapshot()
+
+
+_shared_registry = None
+_shared_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Registre unique du process"""
+    global _shared_registry
+    with _shared_lock:
+        if _shared_registry is None:
+            _shared_registry = MetricsRegistry(enabled=Config.METRICS_ENABLED)
+        return _shared_registry
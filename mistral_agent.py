@@ -1,148 +1,382 @@
-import requests
-import json
-import pandas as pd
-import ta
-from config import Config
-from models import MarketAnalysis, TradeSignal
-import logging
-
-logger = logging.getLogger(__name__)
-
-class MistralAgent:
-    def __init__(self):
-        self.api_key = Config.MISTRAL_API_KEY
-        self.base_url = "https://api.mistral.ai/v1"
-        self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
-    def calculate_indicators(self, klines):
-        """Calcule indicateurs techniques"""
-        df = pd.DataFrame(klines, columns=[
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-            'taker_buy_quote', 'ignore'
-        ])
-
-        df['close'] = pd.to_numeric(df['close'])
-        df['high'] = pd.to_numeric(df['high'])
-        df['low'] = pd.to_numeric(df['low'])
-        df['volume'] = pd.to_numeric(df['volume'])
-
-        # RSI
-        df['rsi'] = ta.momentum.RSIIndicator(df['close'], window=14).rsi()
-
-        # MACD
-        macd = ta.trend.MACD(df['close'])
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
-
-        # Bollinger Bands
-        bb = ta.volatility.BollingerBands(df['close'])
-        df['bb_high'] = bb.bollinger_hband()
-        df['bb_low'] = bb.bollinger_lband()
-
-        # EMA
-        df['ema_20'] = ta.trend.EMAIndicator(df['close'], window=20).ema_indicator()
-        df['ema_50'] = ta.trend.EMAIndicator(df['close'], window=50).ema_indicator()
-
-        return df.tail(1).to_dict('records')[0]
-
-    def analyze_market(self, symbol: str, klines, current_price: float, balance: float):
-        """Demande analyse à Mistral"""
-
-        indicators = self.calculate_indicators(klines)
-
-        prompt = f"""Tu es un expert trading crypto. Analyse {symbol} et retourne UNIQUEMENT un JSON valide.
-
-DONNÉES ACTUELLES:
-- Prix: ${current_price:.2f}
-- RSI: {indicators['rsi']:.2f}
-- MACD: {indicators['macd']:.4f}
-- MACD Signal: {indicators['macd_signal']:.4f}
-- BB High: {indicators['bb_high']:.2f}
-- BB Low: {indicators['bb_low']:.2f}
-- EMA 20: {indicators['ema_20']:.2f}
-- EMA 50: {indicators['ema_50']:.2f}
-
-RÈGLES STRICTES:
-- Risk max: {Config.MAX_RISK_PERCENT}% du capital (${balance * Config.MAX_RISK_PERCENT / 100:.2f})
-- Stop loss: {Config.STOP_LOSS_PERCENT}% obligatoire
-- Take profit: minimum 2:1 ratio risk/reward
-
-Retourne ce JSON exact:
-{{
-  "action": "BUY|SELL|HOLD",
-  "trend": "BULLISH|BEARISH|NEUTRAL",
-  "confidence": 0-100,
-  "entry_price": {current_price},
-  "stop_loss": prix_stop,
-  "take_profit": prix_tp,
-  "position_size_usd": montant_max,
-  "reasoning": "Explication courte"
-}}"""
-
-        try:
-            payload = {
-                "model": "mistral-small",  # Changé de mistral-large-latest à mistral-small
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 1000,
-                "temperature": 0.1
-            }
-
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
-
-            response.raise_for_status()
-            result = response.json()
-
-            analysis_text = result['choices'][0]['message']['content'].strip()
-
-            # Nettoyer la réponse Mistral (elle peut contenir des blocs de code markdown)
-            if analysis_text.startswith('```json'):
-                analysis_text = analysis_text[7:]  # Enlever ```json
-            if analysis_text.startswith('```'):
-                analysis_text = analysis_text[3:]  # Enlever ```
-            if analysis_text.endswith('```'):
-                analysis_text = analysis_text[:-3]  # Enlever ``` à la fin
-            
-            analysis_text = analysis_text.strip()
-
-            # Parse JSON
-            analysis_json = json.loads(analysis_text)
-
-            analysis = MarketAnalysis(
-                symbol=symbol,
-                trend=analysis_json['trend'],
-                confidence=analysis_json['confidence'],
-                entry_price=analysis_json['entry_price'],
-                stop_loss=analysis_json['stop_loss'],
-                take_profit=analysis_json['take_profit'],
-                position_size_usd=analysis_json['position_size_usd'],
-                reasoning=analysis_json['reasoning']
-            )
-
-            signal = TradeSignal(
-                action=analysis_json['action'],
-                symbol=symbol,
-                analysis=analysis
-            )
-
-            logger.info(f"Mistral analyse {symbol}: {signal.action} (conf: {analysis.confidence}%)")
-            return signal
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erreur HTTP Mistral: {e}")
-            return TradeSignal(action="HOLD", symbol=symbol)
-        except json.JSONDecodeError as e:
-            logger.error(f"Erreur parsing JSON Mistral: {e}")
-            logger.error(f"Réponse brute: {analysis_text}")
-            return TradeSignal(action="HOLD", symbol=symbol)
-        except Exception as e:
-            logger.error(f"Erreur Mistral: {e}")
-            return TradeSignal(action="HOLD", symbol=symbol)
\ No newline at end of file
+import asyncio
+import json
+import time
+import aiohttp
+import numpy as np
+from config import Config
+from models import MarketAnalysis, TradeSignal
+from indicator_engine import IndicatorEngine, batch_snapshots
+from kline_decoder import decode_klines
+from llm_cache import LLMResponseCache, indicator_fingerprint
+from metrics import get_metrics
+from llm_pipeline import HedgedLLMClient, LatencyTracker, LLMBudgetExceeded, rule_based_signals
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indicateurs envoyés dans le prompt
+PROMPT_INDICATORS = ('rsi', 'macd', 'macd_signal', 'bb_high', 'bb_low', 'ema_20', 'ema_50')
+
+MODEL = "mistral-small"  # Changé de mistral-large-latest à mistral-small
+# À incrémenter à chaque changement du prompt (invalide le cache des réponses)
+PROMPT_VERSION = "2"
+
+ACTIONS = ("BUY", "SELL", "HOLD")
+
+
+def format_number(value: float, digits: int = 8) -> str:
+    """`digits` chiffres significatifs sans notation exponentielle (0.000012345, pas 0.00)"""
+    return np.format_float_positional(value, precision=digits, unique=False, fractional=False, trim='-')
+
+class MistralAgent:
+    def __init__(self, indicator_engine: IndicatorEngine = None):
+        self.api_key = Config.MISTRAL_API_KEY
+        self.base_url = "https://api.mistral.ai/v1"
+        self.indicator_engine = indicator_engine
+        self.pipeline = HedgedLLMClient(
+            self._endpoints(), Config.LLM_HEDGE_DELAY_SECONDS, LatencyTracker(Config.LLM_LATENCY_WINDOW)
+        )
+        # Échéance absolue du cycle en cours (None = pas de budget)
+        self.cycle_deadline = None
+        self.response_cache = (
+            LLMResponseCache(Config.LLM_CACHE_PATH, Config.LLM_CACHE_MAX_ENTRIES, Config.LLM_CACHE_TTL_SECONDS)
+            if Config.LLM_CACHE_ENABLED else None
+        )
+
+    def _endpoints(self) -> list:
+        """Endpoint principal + endpoint de couverture (si LLM_HEDGE_MODEL)"""
+        endpoints = [{
+            'name': MODEL,
+            'url': f"{self.base_url}/chat/completions",
+            'api_key': self.api_key,
+            'model': MODEL
+        }]
+        if Config.LLM_HEDGE_MODEL:
+            base_url = (Config.LLM_HEDGE_BASE_URL or self.base_url).rstrip('/')
+            endpoints.append({
+                'name': Config.LLM_HEDGE_MODEL,
+                'url': f"{base_url}/chat/completions",
+                'api_key': Config.LLM_HEDGE_API_KEY or self.api_key,
+                'model': Config.LLM_HEDGE_MODEL
+            })
+        return endpoints
+
+    def begin_cycle(self, budget_seconds: float = None):
+        """Démarre le budget de latence LLM du cycle (0 = illimité)"""
+        budget_seconds = Config.LLM_CYCLE_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+        self.cycle_deadline = time.monotonic() + budget_seconds if budget_seconds > 0 else None
+
+    def _call_timeout(self, timeout: float) -> float:
+        if self.cycle_deadline is None:
+            return timeout
+        return min(timeout, self.cycle_deadline - time.monotonic())
+
+    def calculate_indicators(self, klines, symbol: str = None, interval: str = Config.TIMEFRAME):
+        """Calcule indicateurs techniques (klines en colonnes NumPy ou payload REST brut)"""
+        return self.calculate_indicators_many({symbol: klines}, interval)[symbol]
+
+    def calculate_indicators_many(self, klines_by_symbol: dict, interval: str = Config.TIMEFRAME) -> dict:
+        """Indicateurs de plusieurs symboles: engine incrémental, sinon un passage vectorisé groupé"""
+        klines_by_symbol = {
+            symbol: decode_klines(klines) if isinstance(klines, list) else klines
+            for symbol, klines in klines_by_symbol.items()
+        }
+
+        with get_metrics().timer('indicator_seconds', interval=interval):
+            if self.indicator_engine is not None:
+                snapshots = {
+                    symbol: self.indicator_engine.snapshot(symbol, interval, klines)
+                    for symbol, klines in klines_by_symbol.items() if symbol
+                }
+                pending = {symbol: klines for symbol, klines in klines_by_symbol.items() if not symbol}
+                return {**snapshots, **batch_snapshots(pending)}
+
+            return batch_snapshots(klines_by_symbol)
+
+    def analyze_market(self, symbol: str, klines, current_price: float, balance: float):
+        """Demande analyse à Mistral (réponse en cache si les indicateurs n'ont pas bougé)"""
+
+        indicators = self.calculate_indicators(klines, symbol)
+
+        cache_key, signal = self._cached_signal(symbol, indicators, current_price)
+        if signal is not None:
+            return signal
+
+        return self._analyze_single(symbol, indicators, current_price, balance, cache_key)
+
+    def analyze_markets(self, markets: list, balance: float) -> dict:
+        """Analyse groupée: une seule requête Mistral pour tous les symboles
+
+        markets: liste de (symbol, klines, current_price). Retourne {symbol: TradeSignal}.
+        Les entrées absentes ou invalides de la réponse sont réanalysées une par une.
+        """
+        signals = {}
+        pending = []
+        indicators_by_symbol = self.calculate_indicators_many({symbol: klines for symbol, klines, _ in markets})
+        for symbol, klines, current_price in markets:
+            indicators = indicators_by_symbol[symbol]
+            cache_key, signal = self._cached_signal(symbol, indicators, current_price)
+            if signal is not None:
+                signals[symbol] = signal
+            else:
+                pending.append((symbol, indicators, current_price, cache_key))
+
+        batch_size = max(1, Config.LLM_BATCH_MAX_SYMBOLS)
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            if len(batch) == 1:
+                symbol, indicators, current_price, cache_key = batch[0]
+                signals[symbol] = self._analyze_single(symbol, indicators, current_price, balance, cache_key)
+                continue
+
+            parsed = self._analyze_batch(batch, balance)
+            for symbol, indicators, current_price, cache_key in batch:
+                if symbol in parsed:
+                    signal, analysis_json = parsed[symbol]
+                    # Mise en cache après validation par _signal_from_json (entry_price > 0)
+                    if cache_key is not None:
+                        self.response_cache.put(cache_key, analysis_json)
+                    logger.info(f"Mistral analyse {symbol} (groupée): {signal.action} (conf: {signal.analysis.confidence}%)")
+                    signals[symbol] = signal
+                else:
+                    logger.warning(f"Mistral {symbol}: entrée groupée invalide, analyse individuelle")
+                    signals[symbol] = self._analyze_single(symbol, indicators, current_price, balance, cache_key)
+
+        return signals
+
+    def _cached_signal(self, symbol: str, indicators: dict, current_price: float):
+        """(clé cache, TradeSignal en cache ou None)"""
+        if self.response_cache is None:
+            return None, None
+
+        fingerprint = indicator_fingerprint(current_price, indicators, Config.LLM_CACHE_PRICE_STEP_PCT)
+        cache_key = LLMResponseCache.make_key(MODEL, PROMPT_VERSION, symbol, fingerprint)
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return cache_key, None
+
+        try:
+            signal = self._signal_from_json(symbol, self._rebase(cached, current_price))
+        except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+            # Entrée illisible: traitée comme absente (écrasée par la prochaine réponse)
+            logger.warning(f"Cache Mistral {symbol} invalide, ignoré: {e}")
+            return cache_key, None
+        logger.info(f"Mistral analyse {symbol} (cache): {signal.action} (conf: {signal.analysis.confidence}%)")
+        return cache_key, signal
+
+    def _analyze_single(self, symbol: str, indicators: dict, current_price: float, balance: float, cache_key: str = None):
+        prompt = f"""Tu es un expert trading crypto. Analyse {symbol} et retourne UNIQUEMENT un JSON valide.
+
+DONNÉES ACTUELLES:
+{self._market_block(indicators, current_price)}
+
+RÈGLES STRICTES:
+{self._rules_block(balance)}
+
+Retourne ce JSON exact:
+{{
+  "action": "BUY|SELL|HOLD",
+  "trend": "BULLISH|BEARISH|NEUTRAL",
+  "confidence": 0-100,
+  "entry_price": {current_price},
+  "stop_loss": prix_stop,
+  "take_profit": prix_tp,
+  "position_size_usd": montant_max,
+  "reasoning": "Explication courte"
+}}"""
+
+        analysis_text = ""
+        try:
+            analysis_text = self._chat(prompt, max_tokens=1000, timeout=Config.LLM_CALL_TIMEOUT_SECONDS)
+
+            # Parse JSON
+            analysis_json = json.loads(analysis_text)
+            signal = self._signal_from_json(symbol, analysis_json)
+
+            # Mise en cache après validation par _signal_from_json (entry_price > 0)
+            if cache_key is not None:
+                self.response_cache.put(cache_key, analysis_json)
+
+            logger.info(f"Mistral analyse {symbol}: {signal.action} (conf: {signal.analysis.confidence}%)")
+            return signal
+
+        except LLMBudgetExceeded as e:
+            logger.warning(f"Mistral {symbol}: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erreur HTTP Mistral: {e}")
+        except json.JSONDecodeError as e:
+            logger.error(f"Erreur parsing JSON Mistral: {e}")
+            logger.error(f"Réponse brute: {analysis_text}")
+        except Exception as e:
+            logger.error(f"Erreur Mistral: {e}")
+        return self.fallback_signal(symbol, indicators, current_price, balance)
+
+    def fallback_signal(self, symbol: str, indicators: dict, current_price: float, balance: float) -> TradeSignal:
+        """Signal de repli sans LLM: règles sur les indicateurs déjà calculés (LLM_FALLBACK=rules) ou HOLD"""
+        if Config.LLM_FALLBACK != "rules":
+            return TradeSignal(action="HOLD", symbol=symbol)
+
+        action, confidence = rule_based_signals({**indicators, 'close': current_price})
+        action, confidence = str(action), float(confidence)
+        if action == "HOLD":
+            return TradeSignal(action="HOLD", symbol=symbol)
+
+        # SL fixe, TP à 2:1 (mêmes règles que le prompt)
+        sl_pct = Config.STOP_LOSS_PERCENT / 100
+        direction = 1 if action == "BUY" else -1
+        analysis = MarketAnalysis(
+            symbol=symbol,
+            trend="BULLISH" if indicators['ema_20'] > indicators['ema_50'] else "BEARISH",
+            confidence=confidence,
+            entry_price=current_price,
+            stop_loss=current_price * (1 - direction * sl_pct),
+            take_profit=current_price * (1 + direction * 2 * sl_pct),
+            position_size_usd=balance * Config.MAX_RISK_PERCENT / 100,
+            reasoning="Repli règles (LLM indisponible)"
+        )
+        logger.info(f"🧮 {symbol}: signal de repli {action} (conf: {confidence:.0f}%)")
+        return TradeSignal(action=action, symbol=symbol, analysis=analysis)
+
+    def _analyze_batch(self, batch: list, balance: float) -> dict:
+        """Requête groupée → {symbol: (TradeSignal, json)} pour les seules entrées valides"""
+        blocks = "\n\n".join(
+            f"### {symbol}\n{self._market_block(indicators, current_price)}"
+            for symbol, indicators, current_price, _ in batch
+        )
+        prompt = f"""Tu es un expert trading crypto. Analyse chacun des {len(batch)} symboles ci-dessous et retourne UNIQUEMENT un tableau JSON valide.
+
+DONNÉES ACTUELLES:
+{blocks}
+
+RÈGLES STRICTES (pour chaque symbole):
+{self._rules_block(balance)}
+
+Retourne ce tableau JSON exact, un objet par symbole:
+[
+  {{
+    "symbol": "SYMBOLE",
+    "action": "BUY|SELL|HOLD",
+    "trend": "BULLISH|BEARISH|NEUTRAL",
+    "confidence": 0-100,
+    "entry_price": prix_actuel,
+    "stop_loss": prix_stop,
+    "take_profit": prix_tp,
+    "position_size_usd": montant_max,
+    "reasoning": "Explication courte"
+  }}
+]"""
+
+        analysis_text = ""
+        try:
+            analysis_text = self._chat(prompt, max_tokens=600 * len(batch) + 400,
+                                       timeout=Config.LLM_BATCH_TIMEOUT_SECONDS)
+            entries = json.loads(analysis_text)
+        except LLMBudgetExceeded as e:
+            logger.warning(f"Mistral (groupée): {e}")
+            return {}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erreur HTTP Mistral (groupée): {e}")
+            return {}
+        except json.JSONDecodeError as e:
+            logger.error(f"Erreur parsing JSON Mistral (groupée): {e}")
+            logger.error(f"Réponse brute: {analysis_text}")
+            return {}
+        except Exception as e:
+            logger.error(f"Erreur Mistral (groupée): {e}")
+            return {}
+
+        if not isinstance(entries, list):
+            logger.error(f"Réponse Mistral groupée: tableau attendu, reçu {type(entries).__name__}")
+            return {}
+
+        prices = {symbol: current_price for symbol, _, current_price, _ in batch}
+        parsed = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            symbol = str(entry.get('symbol', '')).upper()
+            if symbol not in prices or symbol in parsed:
+                continue
+            # Comme en analyse individuelle: entrée au prix actuel, pas au prix recopié par le LLM
+            entry = {**entry, 'entry_price': prices[symbol]}
+            try:
+                parsed[symbol] = (self._signal_from_json(symbol, entry), entry)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Entrée Mistral {symbol} invalide: {e}")
+        return parsed
+
+    @staticmethod
+    def _market_block(indicators: dict, current_price: float) -> str:
+        # Précision relative: les paires à moins de $0.01 de l'univers ne s'affichent pas "0.00"
+        return f"""- Prix: ${format_number(current_price)}
+- RSI: {indicators['rsi']:.2f}
+- MACD: {format_number(indicators['macd'], 4)}
+- MACD Signal: {format_number(indicators['macd_signal'], 4)}
+- BB High: {format_number(indicators['bb_high'])}
+- BB Low: {format_number(indicators['bb_low'])}
+- EMA 20: {format_number(indicators['ema_20'])}
+- EMA 50: {format_number(indicators['ema_50'])}"""
+
+    @staticmethod
+    def _rules_block(balance: float) -> str:
+        return f"""- Risk max: {Config.MAX_RISK_PERCENT}% du capital (${balance * Config.MAX_RISK_PERCENT / 100:.2f})
+- Stop loss: {Config.STOP_LOSS_PERCENT}% obligatoire
+- Take profit: minimum 2:1 ratio risk/reward"""
+
+    def _chat(self, prompt: str, max_tokens: int, timeout: float) -> str:
+        """Appel chat/completions (borné par le budget du cycle) → texte sans blocs markdown"""
+        payload = {
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": 0.1
+        }
+
+        result = self.pipeline.complete(payload, self._call_timeout(timeout))
+
+        analysis_text = result['choices'][0]['message']['content'].strip()
+
+        # Nettoyer la réponse Mistral (elle peut contenir des blocs de code markdown)
+        if analysis_text.startswith('```json'):
+            analysis_text = analysis_text[7:]  # Enlever ```json
+        if analysis_text.startswith('```'):
+            analysis_text = analysis_text[3:]  # Enlever ```
+        if analysis_text.endswith('```'):
+            analysis_text = analysis_text[:-3]  # Enlever ``` à la fin
+
+        return analysis_text.strip()
+
+    def _signal_from_json(self, symbol: str, analysis_json: dict) -> TradeSignal:
+        """Réponse JSON Mistral → TradeSignal (KeyError/ValueError si champ manquant ou invalide)"""
+        action = str(analysis_json['action']).upper()
+        if action not in ACTIONS:
+            raise ValueError(f"action inconnue: {analysis_json['action']}")
+        if not float(analysis_json['entry_price']) > 0:
+            # Taille de position = montant / entry_price: un prix nul ou négatif est inutilisable
+            raise ValueError(f"entry_price invalide: {analysis_json['entry_price']}")
+
+        analysis = MarketAnalysis(
+            symbol=symbol,
+            trend=analysis_json['trend'],
+            confidence=float(analysis_json['confidence']),
+            entry_price=float(analysis_json['entry_price']),
+            stop_loss=float(analysis_json['stop_loss']),
+            take_profit=float(analysis_json['take_profit']),
+            position_size_usd=float(analysis_json['position_size_usd']),
+            reasoning=analysis_json['reasoning']
+        )
+
+        return TradeSignal(
+            action=action,
+            symbol=symbol,
+            analysis=analysis
+        )
+
+    @staticmethod
+    def _rebase(analysis_json: dict, current_price: float) -> dict:
+        """Réponse en cache recalée sur le prix actuel (SL/TP au même écart relatif)"""
+        ratio = current_price / float(analysis_json['entry_price'])
+        rebased = dict(analysis_json)
+        rebased['entry_price'] = current_price
+        rebased['stop_loss'] = float(analysis_json['stop_loss']) * ratio
+        rebased['take_profit'] = float(analysis_json['take_profit']) * ratio
+        return rebased
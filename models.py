@@ -1,19 +1,67 @@
-from dataclasses import dataclass
-from typing import Literal
-
-@dataclass
-class MarketAnalysis:
-    symbol: str
-    trend: Literal["BULLISH", "BEARISH", "NEUTRAL"]
-    confidence: float  # 0-100
-    entry_price: float
-    stop_loss: float
-    take_profit: float
-    position_size_usd: float
-    reasoning: str
-
-@dataclass
-class TradeSignal:
-    action: Literal["BUY", "SELL", "HOLD", "CLOSE"]
-    symbol: str
-    analysis: MarketAnalysis = None
\ No newline at end of file
+import json
+from dataclasses import dataclass, field, asdict, fields
+from typing import Literal
+
+@dataclass
+class MarketAnalysis:
+    symbol: str
+    trend: Literal["BULLISH", "BEARISH", "NEUTRAL"]
+    confidence: float  # 0-100
+    entry_price: float
+    stop_loss: float
+    take_profit: float
+    position_size_usd: float
+    reasoning: str
+
+@dataclass
+class TradeSignal:
+    action: Literal["BUY", "SELL", "HOLD", "CLOSE"]
+    symbol: str
+    analysis: MarketAnalysis = None
+
+@dataclass
+class StrategyParams:
+    """Paramètres de décision (barème should_trade, risk, trailing, pyramiding), optimisables"""
+    trade_threshold: int = 5
+    # Barème des points should_trade (max 10)
+    multi_tf_points: dict = field(default_factory=lambda: {
+        'STRONG_BUY': 4, 'BUY': 3, 'HOLD': 1, 'SELL': 0, 'STRONG_SELL': 0
+    })
+    mistral_buy_points: tuple = ((80, 3), (65, 2), (0, 1))  # (confiance min, points)
+    mistral_sell_points: int = -1
+    sentiment_points: dict = field(default_factory=lambda: {
+        'EXTREME_FEAR': 3, 'FEAR': 2, 'NEUTRAL': 1, 'GREED': 0, 'EXTREME_GREED': -1
+    })
+    # Risk de base selon confiance IA: (confiance min, fraction du capital)
+    risk_tiers: tuple = ((80, 0.03), (70, 0.025), (60, 0.02), (50, 0.015))
+    trend_multipliers: dict = field(default_factory=lambda: {'BULL': 1.2, 'BEAR': 0.5})
+    default_trend_multiplier: float = 0.8
+    # Trailing: démarre au-delà de +trigger%, stop à -distance% du prix
+    trailing_trigger_pct: float = 2.0
+    trailing_distance_pct: float = 2.0
+    # Pyramiding: à partir de +trigger%, tailles relatives à la position d'origine
+    pyramid_trigger_pct: float = 3.0
+    pyramid_sizes: tuple = (0.5, 0.25)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'StrategyParams':
+        """Depuis un dict JSON (listes → tuples, clés inconnues ignorées)"""
+        def as_tuple(value):
+            return tuple(as_tuple(v) for v in value) if isinstance(value, list) else value
+
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: as_tuple(v) for k, v in data.items() if k in known})
+
+    @classmethod
+    def load(cls, path: str) -> 'StrategyParams':
+        """Fichier produit par parameter_sweep.py ({"params": {...}}) ou dict à plat"""
+        with open(path) as f:
+            data = json.load(f)
+        return cls.from_dict(data.get('params', data))
+
+    def save(self, path: str, metadata: dict = None):
+        with open(path, 'w') as f:
+            json.dump({'params': self.to_dict(), 'metadata': metadata or {}}, f, indent=2)
\ No newline at end of file
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import threading
+import time
+import logging
+import websockets
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ('NEW', 'PARTIALLY_FILLED', 'PENDING_NEW')
+
+
+def _order_from_rest(order: dict) -> dict:
+    """Ordre REST (create/cancel/openOrders/get_order) → entrée de l'index"""
+    executed = float(order.get('executedQty', 0) or 0)
+    quote = float(order.get('cummulativeQuoteQty', 0) or 0)
+    return {
+        'symbol': order['symbol'],
+        'orderId': order['orderId'],
+        'list_id': order.get('orderListId', -1),
+        'side': order.get('side'),
+        'type': order.get('type'),
+        'status': order.get('status', 'NEW'),
+        'quantity': float(order.get('origQty', 0) or 0),
+        'executed_qty': executed,
+        'avg_price': quote / executed if executed > 0 else None,
+        'stop_price': float(order['stopPrice']) if order.get('stopPrice') else None,
+        'updated_at': order.get('updateTime') or order.get('transactTime')
+    }
+
+
+def _order_from_event(event: dict) -> dict:
+    """executionReport du user data stream → entrée de l'index"""
+    executed = float(event['z'])
+    quote = float(event['Z'])
+    return {
+        'symbol': event['s'],
+        'orderId': event['i'],
+        'list_id': event.get('g', -1),
+        'side': event['S'],
+        'type': event['o'],
+        'status': event['X'],
+        'quantity': float(event['q']),
+        'executed_qty': executed,
+        'avg_price': quote / executed if executed > 0 else None,
+        'stop_price': float(event['P']) if float(event.get('P', 0) or 0) > 0 else None,
+        'updated_at': event['E']
+    }
+
+
+class OrderIndex:
+    """Ordres connus par orderId, tenus à jour par le user data stream ou un appel REST groupé
+
+    on_update(order) est appelé à chaque changement de statut (fill, annulation...).
+    """
+
+    def __init__(self, on_update=None):
+        self.on_update = on_update
+        self._orders = {}
+        self._lock = threading.Lock()
+        self.last_sync = 0.0
+
+    def get(self, order_id):
+        with self._lock:
+            order = self._orders.get(order_id)
+            return dict(order) if order else None
+
+    def open_orders(self, symbol: str = None, order_type: str = None) -> list:
+        with self._lock:
+            return [
+                dict(o) for o in self._orders.values()
+                if o['status'] in OPEN_STATUSES
+                and (symbol is None or o['symbol'] == symbol)
+                and (order_type is None or o['type'] == order_type)
+            ]
+
+    def _apply(self, order: dict, notify: bool = True):
+        with self._lock:
+            previous = self._orders.get(order['orderId'])
+            # Événements hors ordre: on garde le plus récent
+            if previous and previous['updated_at'] and order['updated_at'] and order['updated_at'] < previous['updated_at']:
+                return
+            if previous:
+                order = {**previous, **{k: v for k, v in order.items() if v is not None}}
+            self._orders[order['orderId']] = order
+            changed = previous is None or previous['status'] != order['status']
+        if notify and changed and self.on_update is not None:
+            self.on_update(dict(order))
+
+    def track(self, order: dict):
+        """Ordre renvoyé par create_order / cancel_order, ou liste OCO (orderReports)"""
+        if not order:
+            return
+        if 'orderReports' in order:
+            for report in order['orderReports']:
+                self.track(report)
+            return
+
+        tracked = _order_from_rest(order)
+        self._apply(tracked)
+        # Annuler une jambe d'OCO annule toute la liste
+        if tracked['status'] == 'CANCELED' and tracked['list_id'] not in (None, -1):
+            for sibling in self.open_orders(tracked['symbol']):
+                if sibling['list_id'] == tracked['list_id']:
+                    self._apply({**sibling, 'status': 'CANCELED'})
+
+    def apply_event(self, event: dict):
+        if event.get('e') == 'executionReport':
+            self._apply(_order_from_event(event))
+
+    def sync(self, open_orders: list, resolve=None) -> bool:
+        """Réconciliation avec un appel get_open_orders() tous symboles
+
+        Les ordres ouverts dans l'index mais absents de la réponse sont résolus via
+        resolve(symbol, orderId) (get_order) pour connaître leur statut/prix réel.
+        open_orders=None (appel REST en erreur): index inchangé, False renvoyé.
+        """
+        if open_orders is None:
+            logger.warning("⚠️ Ordres ouverts indisponibles: réconciliation de l'index reportée")
+            return False
+        listed = {o['orderId'] for o in open_orders}
+        for order in open_orders:
+            self._apply(_order_from_rest(order))
+
+        for order in self.open_orders():
+            if order['orderId'] in listed:
+                continue
+            resolved = resolve(order['symbol'], order['orderId']) if resolve else None
+            if resolved:
+                self._apply(_order_from_rest(resolved))
+            else:
+                # Statut non résolu: l'ordre reste ouvert jusqu'à la prochaine réconciliation
+                logger.warning(f"⚠️ Ordre #{order['orderId']} {order['symbol']} non résolu, conservé ouvert")
+        self.last_sync = time.time()
+        return True
+
+
+class UserDataStream:
+    """User data stream Binance (listenKey) → OrderIndex
+
+    Après chaque (re)connexion, l'index est réconcilié par un get_open_orders() tous
+    symboles, les événements manqués pendant la coupure étant ainsi rattrapés.
+    """
+
+    def __init__(self, binance_client, order_index: OrderIndex, ws_url: str = None):
+        self.binance = binance_client
+        self.order_index = order_index
+        self.ws_url = (ws_url or Config.BINANCE_WS_URL).rstrip('/')
+        self.reconnect_delay = 5
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()), name="user-stream", daemon=True)
+        self._thread.start()
+        logger.info("📡 User data stream démarré")
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def resync(self):
+        self.order_index.sync(self.binance.get_open_orders(), self.binance.get_order)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            listen_key = await loop.run_in_executor(None, self.binance.get_listen_key)
+            if not listen_key:
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            try:
+                async with websockets.connect(f"{self.ws_url}/ws/{listen_key}", ping_interval=20, close_timeout=1) as ws:
+                    self.connected = True
+                    await loop.run_in_executor(None, self.resync)
+                    keepalive_at = time.monotonic() + Config.USER_STREAM_KEEPALIVE_SECONDS
+                    while not self._stop.is_set():
+                        try:
+                            message = await asyncio.wait_for(ws.recv(), timeout=1)
+                        except asyncio.TimeoutError:
+                            message = None
+
+                        if message is not None:
+                            self._on_message(message)
+
+                        if time.monotonic() >= keepalive_at:
+                            await loop.run_in_executor(None, self.binance.keepalive_listen_key, listen_key)
+                            keepalive_at = time.monotonic() + Config.USER_STREAM_KEEPALIVE_SECONDS
+            except (websockets.WebSocketException, OSError) as e:
+                logger.warning(f"User stream déconnecté: {e}, reconnexion dans {self.reconnect_delay}s")
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                self.connected = False
+
+    def _on_message(self, message: str):
+        try:
+            event = json.loads(message)
+            self.order_index.apply_event(event)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Événement user stream ignoré: {e}")
+        except Exception as e:
+            logger.error(f"Erreur user stream: {e}", exc_info=True)
@@ -0,0 +1,221 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from config import Config
+from kline_store import KlineStore
+from models import StrategyParams
+from backtester import load_history, prepare_symbol, run_backtest, INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+# Espace de recherche par défaut (champs de StrategyParams + risk_scale)
+DEFAULT_GRID = {
+    'trade_threshold': [4, 5, 6, 7],
+    'trailing_trigger_pct': [1.0, 2.0, 3.0],
+    'trailing_distance_pct': [1.0, 2.0, 3.0],
+    'pyramid_trigger_pct': [2.0, 3.0, 5.0],
+    'pyramid_sizes': [[], [0.5], [0.5, 0.25]],
+    # Multiplie tous les paliers risk_tiers
+    'risk_scale': [0.5, 1.0, 1.5],
+}
+
+OBJECTIVES = {
+    'return': lambda m: m['return_pct'],
+    'return_dd': lambda m: m['return_pct'] - m['max_drawdown_pct'],
+    'profit_factor': lambda m: min(m['profit_factor'], 100.0),
+}
+
+# Données de marché du worker, reçues une seule fois via l'initializer du pool
+_worker_state = {}
+
+
+def build_params(point: dict, base: StrategyParams = None) -> StrategyParams:
+    """StrategyParams depuis un point de la grille (listes JSON acceptées)"""
+    base = base or StrategyParams()
+    values = dict(point)
+    risk_scale = values.pop('risk_scale', None)
+    overrides = vars(StrategyParams.from_dict(values))
+    params = replace(base, **{k: overrides[k] for k in values if k in overrides})
+    if risk_scale is not None:
+        params = replace(params, risk_tiers=tuple(
+            (min_conf, round(risk * risk_scale, 6)) for min_conf, risk in params.risk_tiers
+        ))
+    return params
+
+
+def grid_points(grid: dict, samples: int = None, seed: int = 0) -> list:
+    """Produit cartésien de la grille, ou `samples` points tirés sans remise"""
+    keys = list(grid)
+    combos = list(itertools.product(*(grid[k] for k in keys)))
+    if samples and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return [dict(zip(keys, combo)) for combo in combos]
+
+
+def walk_forward_windows(end_time: int, train_days: int, test_days: int, folds: int) -> list:
+    """Fenêtres (train, test) glissantes se terminant à end_time, la plus ancienne d'abord"""
+    day = INTERVAL_MS["1d"]
+    windows = []
+    for k in range(folds, 0, -1):
+        test_end = end_time - (k - 1) * test_days * day
+        test_start = test_end - test_days * day
+        windows.append(((test_start - train_days * day, test_start), (test_start, test_end)))
+    return windows
+
+
+def _init_worker(prepared: dict, balance: float):
+    logging.disable(logging.INFO)
+    _worker_state['prepared'] = prepared
+    _worker_state['balance'] = balance
+
+
+def _evaluate(task):
+    index, point, windows = task
+    params = build_params(point)
+    prepared, balance = _worker_state['prepared'], _worker_state['balance']
+    return index, [
+        run_backtest(prepared, balance, params, start_time=start, end_time=end)['metrics']
+        for start, end in windows
+    ]
+
+
+def run_sweep(prepared: dict, points: list, windows: list, balance: float, workers: int = None) -> list:
+    """Évalue chaque point sur chaque fenêtre (process pool), retourne les métriques par point"""
+    workers = workers or os.cpu_count() or 1
+    tasks = [(i, point, windows) for i, point in enumerate(points)]
+    results = [None] * len(points)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(prepared, balance)) as pool:
+        chunksize = max(1, len(tasks) // (workers * 8))
+        for done, (index, metrics) in enumerate(pool.map(_evaluate, tasks, chunksize=chunksize), 1):
+            results[index] = metrics
+            if done % 100 == 0:
+                logger.info(f"⚙️ {done}/{len(tasks)} combinaisons évaluées")
+    return results
+
+
+def _objective(metrics: dict, objective: str, min_trades: int) -> float:
+    if metrics['trades'] < min_trades:
+        return float('-inf')
+    return OBJECTIVES[objective](metrics)
+
+
+def _format_point(point: dict) -> str:
+    return " ".join(f"{k}={v}" for k, v in point.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimisation multi-cœurs des paramètres de stratégie")
+    parser.add_argument('--symbols', nargs='+', default=Config.SYMBOLS)
+    parser.add_argument('--grid', help="Fichier JSON {param: [valeurs]} (défaut: DEFAULT_GRID)")
+    parser.add_argument('--samples', type=int, help="Nombre de points tirés au hasard dans la grille")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--days', type=int, default=180, help="Fenêtre d'optimisation finale (jours)")
+    parser.add_argument('--folds', type=int, default=0, help="Nombre de plis walk-forward (0 = désactivé)")
+    parser.add_argument('--test-days', type=int, default=30)
+    parser.add_argument('--objective', choices=sorted(OBJECTIVES), default='return_dd')
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--balance', type=float, default=Config.BACKTEST_INITIAL_BALANCE)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--out', default="sweep_results.csv")
+    parser.add_argument('--params-out', default="strategy_params.json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+    points = grid_points(grid, args.samples, args.seed)
+
+    store = KlineStore(Config.KLINE_STORE_DIR, fetch=lambda *a: [])
+    prepared = {symbol: prepare_symbol(cols) for symbol, cols in load_history(store, args.symbols).items()}
+    if not prepared:
+        logger.error("Aucune donnée dans le store, lancer d'abord: python backtester.py --sync")
+        return
+
+    end_time = max(int(sym['close_time'][-1]) for sym in prepared.values()) + 1
+    final_window = (end_time - args.days * INTERVAL_MS["1d"], end_time)
+    folds = walk_forward_windows(end_time, args.days, args.test_days, args.folds)
+    windows = [final_window] + [w for fold in folds for w in fold]
+
+    logger.info(f"🔎 {len(points)} combinaisons x {len(windows)} fenêtres sur {len(prepared)} symboles")
+    started = time.perf_counter()
+    results = run_sweep(prepared, points, windows, args.balance, args.workers)
+    elapsed = time.perf_counter() - started
+
+    # Classement sur la fenêtre finale (paramètres à déployer)
+    ranking = sorted(
+        range(len(points)),
+        key=lambda i: _objective(results[i][0], args.objective, args.min_trades),
+        reverse=True
+    )
+
+    print(f"\n🏆 Top {args.top} ({args.objective}, {args.days}j, {elapsed:.1f}s)")
+    print(f"{'#':>3} {'score':>8} {'return%':>8} {'maxDD%':>7} {'trades':>6} {'win%':>6}  params")
+    for rank, i in enumerate(ranking[:args.top], 1):
+        m = results[i][0]
+        print(f"{rank:>3} {_objective(m, args.objective, args.min_trades):>8.2f} {m['return_pct']:>8.2f} "
+              f"{m['max_drawdown_pct']:>7.2f} {m['trades']:>6} {m['win_rate']:>6.1f}  {_format_point(points[i])}")
+
+    # Walk-forward: meilleur point sur chaque train, mesuré hors échantillon sur le test suivant
+    walk_forward = []
+    for k in range(len(folds)):
+        train_col, test_col = 1 + 2 * k, 2 + 2 * k
+        best = max(range(len(points)),
+                   key=lambda i: _objective(results[i][train_col], args.objective, args.min_trades))
+        test = results[best][test_col]
+        walk_forward.append({
+            'fold': k + 1,
+            'params': points[best],
+            'train_score': _objective(results[best][train_col], args.objective, args.min_trades),
+            'test': test
+        })
+
+    if walk_forward:
+        print(f"\n🚶 Walk-forward ({len(folds)} plis, train {args.days}j / test {args.test_days}j)")
+        for fold in walk_forward:
+            test = fold['test']
+            print(f"  pli {fold['fold']}: train={fold['train_score']:.2f} → test return={test['return_pct']:+.2f}% "
+                  f"dd={test['max_drawdown_pct']:.2f}% trades={test['trades']}  {_format_point(fold['params'])}")
+        oos = sum(fold['test']['return_pct'] for fold in walk_forward)
+        print(f"  Hors échantillon cumulé: {oos:+.2f}%")
+
+    with open(args.out, 'w', newline='') as f:
+        writer = csv.writer(f)
+        metric_names = list(results[ranking[0]][0])
+        writer.writerow(['rank', 'score'] + list(grid) + metric_names)
+        for rank, i in enumerate(ranking, 1):
+            m = results[i][0]
+            writer.writerow(
+                [rank, _objective(m, args.objective, args.min_trades)]
+                + [json.dumps(points[i][k]) for k in grid]
+                + [m[name] for name in metric_names]
+            )
+
+    best = ranking[0]
+    build_params(points[best]).save(args.params_out, metadata={
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'symbols': list(prepared),
+        'objective': args.objective,
+        'window_days': args.days,
+        'point': points[best],
+        'metrics': results[best][0],
+        'walk_forward': walk_forward
+    })
+    print(f"\n💾 Classement: {args.out} | Paramètres: {args.params_out} (STRATEGY_PARAMS_FILE)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import threading
+import time
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class PriceSnapshot:
+    """Prix de tous les symboles suivis via une seule requête ticker, servis tant qu'ils sont frais"""
+
+    def __init__(self, fetch_prices, max_age_seconds: float):
+        # fetch_prices(symbols) -> {symbol: price}
+        self.fetch_prices = fetch_prices
+        self.max_age_seconds = max_age_seconds
+        self._prices = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self, symbols) -> dict:
+        """Recharge le snapshot pour `symbols` (une requête)"""
+        symbols = sorted(set(symbols))
+        if not symbols:
+            return {}
+
+        prices = self.fetch_prices(symbols)
+        if not prices:
+            return {}
+
+        with self._lock:
+            self._prices = prices
+            self._fetched_at = time.time()
+
+        logger.info(f"📸 Snapshot prix: {len(prices)} symboles @ {self.timestamp_label()}")
+        return dict(prices)
+
+    def get(self, symbol: str):
+        """Prix du snapshot, None si absent ou plus vieux que max_age_seconds"""
+        with self._lock:
+            if self._fetched_at is None or time.time() - self._fetched_at > self.max_age_seconds:
+                return None
+            return self._prices.get(symbol)
+
+    @property
+    def fetched_at(self):
+        """Horodatage (epoch) du dernier snapshot"""
+        return self._fetched_at
+
+    def timestamp_label(self) -> str:
+        if self._fetched_at is None:
+            return "-"
+        return datetime.fromtimestamp(self._fetched_at).strftime('%H:%M:%S')
@@ -0,0 +1,227 @@
+import asyncio
+import random
+import threading
+import time
+import logging
+import aiohttp
+import requests
+from config import Config
+from metrics import get_metrics
+from lazy_imports import LazyModule
+
+logger = logging.getLogger(__name__)
+
+# python-binance importé à la première erreur à classer (pas au démarrage)
+binance_exceptions = LazyModule("binance.exceptions")
+
+# Poids REQUEST_WEIGHT Binance par méthode (nom python-binance), éventuellement selon les paramètres
+ENDPOINT_WEIGHTS = {
+    'ping': 1,
+    'get_exchange_info': 20,
+    'get_symbol_info': 20,
+    'get_account': 20,
+    'get_klines': 2,
+    'get_symbol_ticker': lambda p: 2 if p.get('symbol') else 4,
+    'get_ticker': lambda p: 2 if p.get('symbol') else 80,
+    'create_order': 1,
+    'cancel_order': 1,
+    'cancel_replace_order': 1,
+    'create_oco_order': 1,
+    'get_order': 4,
+    'get_open_orders': lambda p: 6 if p.get('symbol') else 80,
+    'stream_get_listen_key': 2,
+    'stream_keepalive': 2,
+}
+
+# Ordres: on ne rejoue pas après une erreur ambiguë (risque de double exécution)
+NON_IDEMPOTENT = {'create_order', 'cancel_order', 'cancel_replace_order', 'create_oco_order'}
+
+# Statuts HTTP sur lesquels Binance n'a pas traité la requête
+RATE_LIMIT_STATUS = (429, 418)
+
+
+def endpoint_weight(name: str, params: dict) -> int:
+    weight = ENDPOINT_WEIGHTS.get(name, 1)
+    return weight(params) if callable(weight) else weight
+
+
+class WeightRateLimiter:
+    """Token bucket sur le poids par minute, recalé sur X-MBX-USED-WEIGHT-1M, avec retry jitteré
+
+    Les appelants sont mis en attente (jamais rejetés) quand le budget est épuisé.
+    """
+
+    def __init__(self, weight_limit: int = None, headroom: float = None, max_retries: int = None):
+        limit = weight_limit or Config.BINANCE_WEIGHT_LIMIT
+        self.capacity = limit * (headroom or Config.BINANCE_WEIGHT_HEADROOM)
+        self.refill_per_second = self.capacity / 60.0
+        self.max_retries = Config.BINANCE_MAX_RETRIES if max_retries is None else max_retries
+
+        self.tokens = self.capacity
+        self.inflight = 0
+        self.blocked_until = 0.0
+        self._last_refill = time.monotonic()
+        self._cond = threading.Condition()
+
+        self.waits = 0
+        self.retries = 0
+        self.metrics = get_metrics()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.refill_per_second)
+        self._last_refill = now
+
+    def _try_acquire(self, weight: int) -> float:
+        """Prend `weight` jetons si possible (retourne 0), sinon le délai d'attente estimé"""
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.blocked_until:
+            # Fin de pause imposée par Binance: nouvelle fenêtre, recalée ensuite par les headers
+            self.blocked_until = 0.0
+            self.tokens = self.capacity
+            self._last_refill = now
+        self._refill()
+        if self.tokens >= weight:
+            self.tokens -= weight
+            self.inflight += weight
+            return 0.0
+        return (weight - self.tokens) / self.refill_per_second
+
+    def acquire(self, weight: int):
+        with self._cond:
+            wait = self._try_acquire(weight)
+            if wait:
+                self.waits += 1
+                logger.debug(f"⏳ Rate limit: attente {wait:.2f}s (poids {weight})")
+            while wait:
+                self._cond.wait(wait)
+                wait = self._try_acquire(weight)
+
+    async def acquire_async(self, weight: int):
+        while True:
+            with self._cond:
+                wait = self._try_acquire(weight)
+            if not wait:
+                return
+            self.waits += 1
+            await asyncio.sleep(wait)
+
+    def release(self, weight: int, headers=None):
+        """Fin de requête: recale le bucket sur le poids réellement consommé"""
+        with self._cond:
+            self.inflight = max(0, self.inflight - weight)
+            used = headers.get('X-MBX-USED-WEIGHT-1M') if headers is not None else None
+            if used is not None:
+                self.metrics.set_gauge('binance_used_weight_1m', int(used))
+                self._refill()
+                # Budget réel de la fenêtre courante, moins les requêtes encore en vol
+                self.tokens = min(self.capacity, max(0.0, self.capacity - int(used) - self.inflight))
+            self._cond.notify_all()
+
+    def block(self, seconds: float):
+        """429/418: plus aucune requête avant `seconds`"""
+        self.metrics.inc('binance_rate_limited_total')
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+        logger.warning(f"🚦 Binance rate limit: pause {seconds:.0f}s")
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Backoff exponentiel avec full jitter"""
+        ceiling = min(Config.BINANCE_RETRY_MAX_SECONDS, Config.BINANCE_RETRY_BASE_SECONDS * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def _retry_decision(self, name: str, error: Exception, attempt: int):
+        """Délai avant nouvel essai, ou None pour propager l'erreur"""
+        if attempt >= self.max_retries:
+            return None
+
+        status = getattr(error, 'status_code', None)
+        if status in RATE_LIMIT_STATUS:
+            response = getattr(error, 'response', None)
+            headers = getattr(response, 'headers', None) or {}
+            retry_after = float(headers.get('Retry-After', 60))
+            self.block(retry_after)
+            return 0.0
+
+        if name in NON_IDEMPOTENT:
+            return None
+
+        transient = (
+            isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                               binance_exceptions.BinanceRequestException, asyncio.TimeoutError,
+                               aiohttp.ClientConnectionError))
+            or (isinstance(error, binance_exceptions.BinanceAPIException)
+                and (status is None or status == 0 or status >= 500))
+        )
+        return self.backoff_delay(attempt) if transient else None
+
+    def call(self, name: str, fn, headers_of=None, **params):
+        """Exécute fn(**params) sous le budget de poids, avec retry sur erreurs transitoires"""
+        weight = endpoint_weight(name, params)
+        attempt = 0
+        while True:
+            waiting = time.perf_counter()
+            self.acquire(weight)
+            started = time.perf_counter()
+            self.metrics.observe('binance_ratelimit_wait_seconds', started - waiting)
+            headers = None
+            try:
+                return fn(**params)
+            except (binance_exceptions.BinanceAPIException, binance_exceptions.BinanceRequestException,
+                    requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.metrics.inc('binance_request_errors_total', endpoint=name)
+                delay = self._retry_decision(name, e, attempt)
+                if delay is None:
+                    raise
+                self.retries += 1
+                logger.warning(f"🔁 Retry {name} ({attempt + 1}/{self.max_retries}) dans {delay:.2f}s: {e}")
+            finally:
+                self.metrics.observe('binance_request_seconds', time.perf_counter() - started, endpoint=name)
+                if headers_of is not None:
+                    headers = headers_of()
+                self.release(weight, headers)
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, name: str, coro_fn, headers_of=None, **params):
+        """Équivalent asyncio de call()"""
+        weight = endpoint_weight(name, params)
+        attempt = 0
+        while True:
+            waiting = time.perf_counter()
+            await self.acquire_async(weight)
+            started = time.perf_counter()
+            self.metrics.observe('binance_ratelimit_wait_seconds', started - waiting)
+            headers = None
+            try:
+                return await coro_fn(**params)
+            except (binance_exceptions.BinanceAPIException, asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                self.metrics.inc('binance_request_errors_total', endpoint=name)
+                delay = self._retry_decision(name, e, attempt)
+                if delay is None:
+                    raise
+                self.retries += 1
+                logger.warning(f"🔁 Retry {name} ({attempt + 1}/{self.max_retries}) dans {delay:.2f}s: {e}")
+            finally:
+                self.metrics.observe('binance_request_seconds', time.perf_counter() - started, endpoint=name)
+                if headers_of is not None:
+                    headers = headers_of()
+                self.release(weight, headers)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> WeightRateLimiter:
+    """Limiteur unique du process (le quota Binance est par IP)"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = WeightRateLimiter()
+        return _shared_limiter
@@ -0,0 +1,110 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    symbol TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS markers (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    entry REAL NOT NULL,
+    exit REAL NOT NULL,
+    quantity REAL NOT NULL,
+    pnl REAL NOT NULL,
+    closed_at REAL NOT NULL
+);
+"""
+
+
+def _json_default(value):
+    # Scalaires NumPy (indicateurs dans market_context) → types Python
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=_json_default, separators=(',', ':'))
+
+
+class StateStore:
+    """État du bot persistant (SQLite WAL): positions ouvertes, stats, marqueurs, trades clôturés
+
+    Chaque écriture est une transaction courte; seules les positions ouvertes et les
+    marqueurs sont relus au démarrage, l'historique des trades n'est jamais rechargé.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: transaction validée survit à un crash du process
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _write(self, sql: str, params: tuple):
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    def save_position(self, symbol: str, position: dict):
+        self._write(
+            "INSERT INTO positions (symbol, data, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(symbol) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            (symbol, _dumps(position), time.time())
+        )
+
+    def delete_position(self, symbol: str):
+        self._write("DELETE FROM positions WHERE symbol = ?", (symbol,))
+
+    def load_positions(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT symbol, data FROM positions").fetchall()
+        return {symbol: json.loads(data) for symbol, data in rows}
+
+    def set_marker(self, name: str, value):
+        """Valeur JSON nommée (stats du jour, dernier rapport...)"""
+        self._write(
+            "INSERT INTO markers (name, value, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+            (name, _dumps(value), time.time())
+        )
+
+    def get_marker(self, name: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM markers WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def record_trade(self, symbol: str, reason: str, entry: float, exit_price: float, quantity: float, pnl: float):
+        """Trade clôturé + suppression de la position, dans la même transaction"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "INSERT INTO trades (symbol, reason, entry, exit, quantity, pnl, closed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (symbol, reason, entry, exit_price, quantity, pnl, time.time())
+                )
+                self._conn.execute("DELETE FROM positions WHERE symbol = ?", (symbol,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
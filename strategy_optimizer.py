@@ -1,17 +1,63 @@
-from typing import Dict, List
+import numpy as np
 import logging
 import os
+from config import Config
+from models import StrategyParams
 
 # Configuration seuil via variable env
 TRADE_THRESHOLD = int(os.getenv('TRADE_THRESHOLD', '5'))
 
 logger = logging.getLogger(__name__)
 
+
+def load_strategy_params() -> StrategyParams:
+    """Paramètres du fichier STRATEGY_PARAMS_FILE (parameter_sweep.py), sinon défauts + TRADE_THRESHOLD"""
+    path = Config.STRATEGY_PARAMS_FILE
+    if path:
+        try:
+            params = StrategyParams.load(path)
+            logger.info(f"🎛️ Paramètres stratégie chargés: {path}")
+            return params
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Erreur chargement paramètres {path}: {e}, défauts utilisés")
+    return StrategyParams(trade_threshold=TRADE_THRESHOLD)
+
+
+def _points_label(points: int) -> str:
+    return f"{points:+d}" if points else "0"
+
+
+def trade_scores(multi_tf_signal, mistral_action, mistral_conf, sentiment_label, params: StrategyParams):
+    """Score should_trade vectorisé (tableaux NumPy ou scalaires, même barème)"""
+    multi_tf_signal = np.asarray(multi_tf_signal)
+    mistral_action = np.asarray(mistral_action)
+    mistral_conf = np.asarray(mistral_conf, dtype=np.float64)
+    sentiment_label = np.asarray(sentiment_label)
+
+    tf_points = np.select(
+        [multi_tf_signal == label for label in params.multi_tf_points],
+        list(params.multi_tf_points.values()), params.multi_tf_points.get('STRONG_SELL', 0)
+    )
+    buy_points = np.select(
+        [mistral_conf >= min_conf for min_conf, _ in params.mistral_buy_points],
+        [points for _, points in params.mistral_buy_points], 0
+    )
+    mistral_points = np.select(
+        [mistral_action == 'BUY', mistral_action == 'HOLD'], [buy_points, 0], params.mistral_sell_points
+    )
+    sentiment_points = np.select(
+        [sentiment_label == label for label in params.sentiment_points],
+        list(params.sentiment_points.values()), params.sentiment_points.get('EXTREME_GREED', -1)
+    )
+    return tf_points + mistral_points + sentiment_points
+
+
 class StrategyOptimizer:
     """Optimise la stratégie de trading en combinant plusieurs analyses"""
     
-    def __init__(self):
-        self.min_score = TRADE_THRESHOLD
+    def __init__(self, params: StrategyParams = None):
+        self.params = params or StrategyParams(trade_threshold=TRADE_THRESHOLD)
+        self.min_score = self.params.trade_threshold
         logger.info(f"🎯 Seuil de trading configuré: {self.min_score}/10")
     
     def should_trade(self, symbol: str, multi_tf: dict, mistral: dict, sentiment: dict, **kwargs) -> dict:
@@ -19,69 +65,38 @@ class StrategyOptimizer:
         Décide si on doit trader basé sur tous les signaux
         **kwargs accepte tous les paramètres supplémentaires
         """
+        params = self.params
         score = 0
         reasons = []
         
         # 1. Analyse Multi-Timeframe (poids: 4 points)
         tf_signal = multi_tf.get('signal', 'HOLD')
-        if tf_signal == 'STRONG_BUY':
-            score += 4
-            reasons.append("Multi-TF: STRONG_BUY (+4)")
-        elif tf_signal == 'BUY':
-            score += 3
-            reasons.append("Multi-TF: BUY (+3)")
-        elif tf_signal == 'HOLD':
-            score += 1
-            reasons.append("Multi-TF: HOLD (+1)")
-        elif tf_signal == 'SELL':
-            score += 0
-            reasons.append("Multi-TF: SELL (0)")
-        else:  # STRONG_SELL
-            score += 0
-            reasons.append("Multi-TF: STRONG_SELL (0)")
+        points = params.multi_tf_points.get(tf_signal, params.multi_tf_points.get('STRONG_SELL', 0))
+        score += points
+        reasons.append(f"Multi-TF: {tf_signal} ({_points_label(points)})")
         
         # 2. Mistral AI (poids: 3 points)
         mistral_action = mistral.get('action', 'HOLD')
         mistral_conf = mistral.get('confidence', 0)
         
         if mistral_action == 'BUY':
-            if mistral_conf >= 80:
-                score += 3
-                reasons.append(f"Mistral: BUY {mistral_conf}% (+3)")
-            elif mistral_conf >= 65:
-                score += 2
-                reasons.append(f"Mistral: BUY {mistral_conf}% (+2)")
-            else:
-                score += 1
-                reasons.append(f"Mistral: BUY {mistral_conf}% (+1)")
+            points = next((p for min_conf, p in params.mistral_buy_points if mistral_conf >= min_conf), 0)
         elif mistral_action == 'HOLD':
-            reasons.append(f"Mistral: HOLD {mistral_conf}% (0)")
+            points = 0
         else:  # SELL
-            score -= 1
-            reasons.append(f"Mistral: SELL {mistral_conf}% (-1)")
+            points = params.mistral_sell_points
+        score += points
+        reasons.append(f"Mistral: {mistral_action} {mistral_conf}% ({_points_label(points)})")
         
         # 3. Sentiment (Fear & Greed) (poids: 3 points)
         sentiment_value = sentiment.get('value', 50)
         sentiment_label = sentiment.get('label', 'NEUTRAL')
-        
-        if sentiment_label == 'EXTREME_FEAR':
-            score += 3
-            reasons.append(f"Sentiment: EXTREME_FEAR {sentiment_value} (+3)")
-        elif sentiment_label == 'FEAR':
-            score += 2
-            reasons.append(f"Sentiment: FEAR {sentiment_value} (+2)")
-        elif sentiment_label == 'NEUTRAL':
-            score += 1
-            reasons.append(f"Sentiment: NEUTRAL {sentiment_value} (+1)")
-        elif sentiment_label == 'GREED':
-            score += 0
-            reasons.append(f"Sentiment: GREED {sentiment_value} (0)")
-        else:  # EXTREME_GREED
-            score -= 1
-            reasons.append(f"Sentiment: EXTREME_GREED {sentiment_value} (-1)")
+        points = params.sentiment_points.get(sentiment_label, params.sentiment_points.get('EXTREME_GREED', -1))
+        score += points
+        reasons.append(f"Sentiment: {sentiment_label} {sentiment_value} ({_points_label(points)})")
         
         # Décision finale
-        should_trade_decision = score >= TRADE_THRESHOLD
+        should_trade_decision = score >= self.min_score
         
         result = {
             'should_trade': should_trade_decision,
@@ -90,11 +105,11 @@ class StrategyOptimizer:
         }
         
         if should_trade_decision:
-            logger.info(f"✅ Trade validé pour {symbol}! Score: {score}/{TRADE_THRESHOLD}")
+            logger.info(f"✅ Trade validé pour {symbol}! Score: {score}/{self.min_score}")
             for reason in reasons:
                 logger.info(f"  └─ {reason}")
         else:
-            logger.info(f"❌ Trade refusé pour {symbol}. Score: {score}/{TRADE_THRESHOLD}")
+            logger.info(f"❌ Trade refusé pour {symbol}. Score: {score}/{self.min_score}")
         
         return result
     
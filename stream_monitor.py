@@ -0,0 +1,106 @@
+import asyncio
+import json
+import threading
+import logging
+import websockets
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class StreamMonitor:
+    """Flux temps réel (bookTicker/trade) des symboles en position
+
+    Les ticks sont coalescés par symbole: le handler ne voit que le dernier prix,
+    traité dans un thread séparé pour ne jamais bloquer la lecture du WebSocket.
+    """
+
+    def __init__(self, on_price, symbols_provider, ws_url: str = None, stream_type: str = None):
+        # on_price(symbol, price), symbols_provider() -> symboles à suivre
+        self.on_price = on_price
+        self.symbols_provider = symbols_provider
+        self.ws_url = (ws_url or Config.BINANCE_WS_URL).rstrip('/')
+        self.stream_type = stream_type or Config.STREAM_TYPE
+        self.reconnect_delay = 5
+
+        self._latest = {}
+        self._latest_lock = threading.Lock()
+        self._pending = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self.ticks = 0
+
+    def start(self):
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=lambda: asyncio.run(self._run()), name="stream-ws", daemon=True),
+            threading.Thread(target=self._dispatch_loop, name="stream-dispatch", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"📡 Stream monitor démarré ({self.stream_type})")
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        self._pending.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _stream_url(self, symbols: list) -> str:
+        streams = "/".join(f"{s.lower()}@{self.stream_type}" for s in symbols)
+        return f"{self.ws_url}/stream?streams={streams}"
+
+    async def _run(self):
+        while not self._stop.is_set():
+            symbols = sorted(self.symbols_provider())
+            if not symbols:
+                await asyncio.sleep(1)
+                continue
+
+            try:
+                async with websockets.connect(self._stream_url(symbols), ping_interval=20, close_timeout=1) as ws:
+                    logger.info(f"📡 Abonné: {', '.join(symbols)}")
+                    while not self._stop.is_set():
+                        try:
+                            message = await asyncio.wait_for(ws.recv(), timeout=1)
+                        except asyncio.TimeoutError:
+                            message = None
+
+                        if message is not None:
+                            self._on_message(message)
+
+                        # Positions ouvertes/fermées → réabonnement
+                        if sorted(self.symbols_provider()) != symbols:
+                            break
+            except (websockets.WebSocketException, OSError) as e:
+                logger.warning(f"Stream déconnecté: {e}, reconnexion dans {self.reconnect_delay}s")
+                await asyncio.sleep(self.reconnect_delay)
+
+    def _on_message(self, message: str):
+        try:
+            payload = json.loads(message)
+            data = payload.get('data', payload)
+            symbol = data['s']
+            # trade: dernier prix ('b' y est l'id d'ordre acheteur), bookTicker: meilleur bid (sortie d'un long)
+            price = float(data['p'] if data.get('e') == 'trade' or self.stream_type == 'trade' else data['b'])
+        except (ValueError, KeyError, TypeError):
+            return
+
+        with self._latest_lock:
+            self._latest[symbol] = price
+        self.ticks += 1
+        self._pending.set()
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            self._pending.wait(1)
+            self._pending.clear()
+
+            with self._latest_lock:
+                latest, self._latest = self._latest, {}
+
+            for symbol, price in latest.items():
+                try:
+                    self.on_price(symbol, price)
+                except Exception as e:
+                    logger.error(f"Erreur tick {symbol}: {e}", exc_info=True)
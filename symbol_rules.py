@@ -0,0 +1,160 @@
+import math
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+
+def _decimals(value: str) -> int:
+    """Nombre de décimales d'un pas Binance ("0.00100000" → 3)"""
+    return max(0, -Decimal(value).normalize().as_tuple().exponent)
+
+
+@dataclass(frozen=True)
+class SymbolRules:
+    """Règles de trading d'un symbole, précompilées depuis ses filtres exchangeInfo"""
+    __slots__ = ('symbol', 'base_asset', 'quote_asset', 'status', 'step_size', 'min_qty',
+                 'tick_size', 'min_notional', 'qty_precision', 'price_precision')
+
+    symbol: str
+    base_asset: str
+    quote_asset: str
+    status: str
+    step_size: float
+    min_qty: float
+    tick_size: float
+    min_notional: float
+    qty_precision: int
+    price_precision: int
+
+    @classmethod
+    def from_info(cls, info: dict) -> "SymbolRules":
+        filters = {f['filterType']: f for f in info['filters']}
+        lot = filters['LOT_SIZE']
+        price = filters['PRICE_FILTER']
+        notional = filters.get('NOTIONAL') or filters.get('MIN_NOTIONAL') or {}
+        return cls(
+            symbol=info['symbol'],
+            base_asset=info.get('baseAsset', ''),
+            quote_asset=info.get('quoteAsset', ''),
+            status=info.get('status', 'TRADING'),
+            step_size=float(lot['stepSize']),
+            min_qty=float(lot['minQty']),
+            tick_size=float(price['tickSize']),
+            min_notional=float(notional.get('minNotional', 0)),
+            qty_precision=_decimals(lot['stepSize']),
+            price_precision=_decimals(price['tickSize'])
+        )
+
+    def floor_quantity(self, quantity: float) -> float:
+        """Quantité arrondie au step inférieur (1.0 reste 1.0, pas 0.99999)"""
+        # Arrondi à 1e-9 step avant floor: absorbe le bruit flottant de quantity / step
+        steps = math.floor(round(quantity / self.step_size, 9))
+        return round(steps * self.step_size, self.qty_precision)
+
+    def adjust_quantity(self, quantity: float) -> float:
+        """Quantité au step inférieur, au minimum min_qty"""
+        return max(self.floor_quantity(quantity), self.min_qty)
+
+    def round_price(self, price: float) -> float:
+        """Prix au tick le plus proche"""
+        return round(round(price / self.tick_size) * self.tick_size, self.price_precision)
+
+
+class SymbolRulesBook:
+    """Règles de tous les symboles depuis un seul appel exchangeInfo, rafraîchies en arrière-plan
+
+    fetch_all() -> réponse exchangeInfo complète; fetch_one(symbol) -> info d'un symbole
+    absent du dernier chargement (nouveau listing). Sans fetchers (client asyncio), les
+    réponses sont passées à load() / add().
+    """
+
+    def __init__(self, fetch_all=None, fetch_one=None, refresh_seconds: float = 3600):
+        self.fetch_all = fetch_all
+        self.fetch_one = fetch_one
+        self.refresh_seconds = refresh_seconds
+        self._rules = {}
+        self.loaded_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._load_lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """Recharge toutes les règles via fetch_all()"""
+        return self.load(self.fetch_all())
+
+    def load(self, info: dict) -> int:
+        """Compile une réponse exchangeInfo (remplacement atomique du dictionnaire)"""
+        if not info:
+            return 0
+
+        started = time.perf_counter()
+        rules = {}
+        for symbol_info in info.get('symbols', []):
+            try:
+                rules[symbol_info['symbol']] = SymbolRules.from_info(symbol_info)
+            except (KeyError, ValueError):
+                continue
+        self._rules = rules
+        self.loaded_at = time.time()
+        logger.info(f"📐 Règles de {len(rules)} symboles chargées en {(time.perf_counter() - started) * 1000:.0f} ms")
+        return len(rules)
+
+    def add(self, info: dict) -> SymbolRules:
+        rules = SymbolRules.from_info(info)
+        self._rules = {**self._rules, rules.symbol: rules}
+        return rules
+
+    def _ensure_loaded(self):
+        """Chargement complet au premier usage (un seul exchangeInfo même en concurrence)"""
+        if self.loaded_at or self.fetch_all is None:
+            return
+        with self._load_lock:
+            if not self.loaded_at:
+                self.refresh()
+
+    def get(self, symbol: str) -> SymbolRules:
+        """Règles d'un symbole (chargement complet au premier appel, KeyError si inconnu)"""
+        self._ensure_loaded()
+        rules = self._rules.get(symbol)
+        if rules is None and self.fetch_one is not None:
+            info = self.fetch_one(symbol)
+            if info:
+                rules = self.add(info)
+        if rules is None:
+            raise KeyError(f"Règles inconnues pour {symbol}")
+        return rules
+
+    def symbols(self, quote_asset: str = None, status: str = "TRADING") -> list:
+        self._ensure_loaded()
+        return [
+            r.symbol for r in self._rules.values()
+            if (quote_asset is None or r.quote_asset == quote_asset) and (status is None or r.status == status)
+        ]
+
+    def start(self):
+        """Chargement immédiat puis rafraîchissement périodique, en thread daemon (démarrage non bloquant)"""
+        if self._thread is not None or self.fetch_all is None:
+            return
+        self._thread = threading.Thread(target=self._refresh_loop, name="symbol-rules", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        # Préchauffage: le premier ordre ne paie pas l'exchangeInfo (attend au plus ce chargement)
+        try:
+            self._ensure_loaded()
+        except Exception as e:
+            logger.error(f"Erreur chargement règles symboles: {e}")
+        if self.refresh_seconds <= 0:
+            return
+        while not self._stop.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Erreur rafraîchissement règles symboles: {e}")
@@ -0,0 +1,24 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from benchmark import synthetic_klines, isolate_config
+
+
+@pytest.fixture(autouse=True)
+def config():
+    """Config isolée (aucun disque, réseau ni thread) et restaurée après chaque test"""
+    saved = {name: value for name, value in vars(Config).items() if name.isupper()}
+    yield Config
+    for name, value in saved.items():
+        setattr(Config, name, value)
+
+
+@pytest.fixture
+def klines(config):
+    fixtures = synthetic_klines(["BTCUSDT", "ETHUSDT"])
+    isolate_config(list(fixtures))
+    return fixtures
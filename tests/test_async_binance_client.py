@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import hmac
+import threading
+from urllib.parse import urlencode
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_binance_client import AsyncBinanceClient, AsyncBinanceREST, AsyncClientBridge
+from binance_client import BinanceClient
+
+API_KEY, API_SECRET = "test-key", "test-secret"
+
+EXCHANGE_INFO = {'symbols': [{
+    'symbol': "BTCUSDT", 'status': "TRADING", 'baseAsset': "BTC", 'quoteAsset': "USDT",
+    'filters': [
+        {'filterType': "PRICE_FILTER", 'tickSize': "0.01"},
+        {'filterType': "LOT_SIZE", 'stepSize': "0.00001", 'minQty': "0.00001"},
+        {'filterType': "NOTIONAL", 'minNotional': "5"}
+    ]
+}]}
+
+
+def fake_exchange(open_orders_status: int = 200):
+    """Exchange Binance minimal en aiohttp: vérifie clé API et signature HMAC des appels signés"""
+    app = web.Application()
+    orders = []
+
+    def signed(request):
+        params = list(request.query.items())
+        signature = dict(params).get('signature')
+        payload = urlencode([(k, v) for k, v in params if k != 'signature'])
+        expected = hmac.new(API_SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        if request.headers.get('X-MBX-APIKEY') != API_KEY or signature != expected:
+            raise web.HTTPUnauthorized(text='{"code": -1022, "msg": "Signature invalide"}', content_type="application/json")
+        return dict(params)
+
+    async def exchange_info(request):
+        return web.json_response(EXCHANGE_INFO)
+
+    async def ticker_price(request):
+        return web.json_response({'symbol': request.query['symbol'], 'price': "50000.00"})
+
+    async def create_order(request):
+        params = signed(request)
+        order = {
+            'symbol': params['symbol'], 'orderId': len(orders) + 1, 'side': params['side'],
+            'type': params['type'], 'status': "FILLED", 'origQty': params['quantity'],
+            'executedQty': params['quantity'], 'cummulativeQuoteQty': str(float(params['quantity']) * 50000)
+        }
+        orders.append(order)
+        return web.json_response(order, headers={'X-MBX-USED-WEIGHT-1M': "3"})
+
+    async def open_orders(request):
+        signed(request)
+        if open_orders_status != 200:
+            return web.json_response({'code': -1021, 'msg': "Timestamp hors fenêtre"}, status=open_orders_status)
+        return web.json_response([])
+
+    app.router.add_get('/api/v3/exchangeInfo', exchange_info)
+    app.router.add_get('/api/v3/ticker/price', ticker_price)
+    app.router.add_post('/api/v3/order', create_order)
+    app.router.add_get('/api/v3/openOrders', open_orders)
+    return app, orders
+
+
+async def _with_client(scenario):
+    app, orders = fake_exchange()
+    async with TestServer(app) as server:
+        client = AsyncBinanceClient(AsyncBinanceREST(API_KEY, API_SECRET, str(server.make_url(''))))
+        try:
+            return orders, await scenario(client)
+        finally:
+            await client.close()
+
+
+def test_signed_market_order_against_local_exchange():
+    async def scenario(client):
+        return await client.place_order("BTCUSDT", "BUY", 0.0012345)
+
+    orders, order = asyncio.run(_with_client(scenario))
+
+    assert order['status'] == "FILLED"
+    assert [o['origQty'] for o in orders] == ["0.00123"]
+
+
+def test_open_orders_error_returns_none():
+    async def scenario(client):
+        client.rest.api_secret = "mauvais-secret"
+        return await client.get_open_orders()
+
+    _, orders = asyncio.run(_with_client(scenario))
+
+    assert orders is None
+
+
+def test_sync_client_over_bridge_shares_async_transport():
+    async def serve(ready, done):
+        app, _ = fake_exchange(open_orders_status=400)
+        async with TestServer(app) as server:
+            ready.set_result(str(server.make_url('')))
+            await done
+
+    loop = asyncio.new_event_loop()
+    ready, done = loop.create_future(), loop.create_future()
+    task = loop.create_task(serve(ready, done))
+    base_url = loop.run_until_complete(ready)
+
+    bridge = AsyncClientBridge(AsyncBinanceREST(API_KEY, API_SECRET, base_url))
+    server_thread = threading.Thread(target=loop.run_until_complete, args=(task,), daemon=True)
+    server_thread.start()
+    try:
+        binance = BinanceClient(client=bridge)
+        assert binance.get_current_price("BTCUSDT") == 50000.0
+        assert binance.get_open_orders() is None
+    finally:
+        bridge.close()
+        loop.call_soon_threadsafe(done.set_result, None)
+        server_thread.join(5)
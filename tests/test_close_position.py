@@ -0,0 +1,56 @@
+import pytest
+from benchmark import _fake_bot
+
+
+@pytest.fixture
+def bot(klines):
+    bot = _fake_bot(klines)
+    price = bot.binance.client.prices["BTCUSDT"]
+    bot.active_positions["BTCUSDT"] = {
+        'symbol': "BTCUSDT", 'entry': price, 'quantity': 0.01, 'original_quantity': 0.01,
+        'stop_loss': price * 0.97, 'take_profit': price * 1.06, 'pyramid_count': 0
+    }
+    bot._place_exit_orders("BTCUSDT", 0.01, price * 0.97)
+    # Vente market refusée (solde insuffisant, filtre...)
+    bot.binance.place_order = lambda **kwargs: None
+    return bot
+
+
+def _exchange_orders(bot, status="NEW"):
+    return [o for o in bot.binance.client.orders.values() if o['status'] == status]
+
+
+def test_stop_filled_behind_stale_index_is_closed_at_fill(bot):
+    position = bot.active_positions["BTCUSDT"]
+    stop = bot.binance.client.orders[position['stop_order_id']]
+    fill = position['stop_loss'] * 0.999
+    stop.update(status='FILLED', executedQty="0.01", cummulativeQuoteQty=str(0.01 * fill))
+    bot.binance.cancel_order = lambda symbol, order_id: None
+    bot.binance.get_balances = lambda: {"USDT": 10000.0}
+
+    bot.close_position("BTCUSDT", "STOP_LOSS", exit_price=position['stop_loss'])
+
+    assert "BTCUSDT" not in bot.active_positions
+    assert bot.daily_stats['profit'] == pytest.approx((fill - position['entry']) * 0.01)
+    assert _exchange_orders(bot) == []
+
+
+def test_failed_sell_replaces_exits_when_asset_held(bot):
+    old_stop = bot.active_positions["BTCUSDT"]['stop_order_id']
+    bot.binance.get_balances = lambda: {"BTC": 0.01, "USDT": 10000.0}
+
+    bot.close_position("BTCUSDT", "STOP_LOSS")
+
+    position = bot.active_positions["BTCUSDT"]
+    assert position['stop_order_id'] != old_stop
+    assert [o['orderId'] for o in _exchange_orders(bot)] == [position['stop_order_id']]
+
+
+def test_failed_sell_without_confirmed_holding_keeps_order_ids(bot):
+    old_stop = bot.active_positions["BTCUSDT"]['stop_order_id']
+    bot.binance.get_balances = lambda: None
+
+    bot.close_position("BTCUSDT", "STOP_LOSS")
+
+    assert bot.active_positions["BTCUSDT"]['stop_order_id'] == old_stop
+    assert _exchange_orders(bot) == []
@@ -0,0 +1,32 @@
+import json
+import pytest
+from llm_cache import LLMResponseCache
+
+
+@pytest.mark.parametrize("content", [
+    '[["BTCUSDT|k", 1',
+    '{"BTCUSDT|k": [1, {}]}',
+    '[["BTCUSDT|k", 1]]',
+    '[["BTCUSDT|k", "hier", {}]]',
+])
+def test_bad_cache_file_loads_as_empty(tmp_path, content):
+    path = tmp_path / "llm_cache.json"
+    path.write_text(content)
+
+    cache = LLMResponseCache(str(path))
+
+    assert cache.stats()['entries'] == 0
+    assert cache.get("BTCUSDT|k") is None
+
+
+def test_puts_are_written_on_flush(tmp_path):
+    path = tmp_path / "llm_cache.json"
+    cache = LLMResponseCache(str(path))
+    cache.put("BTCUSDT|k", {'action': "HOLD"})
+    cache.put("ETHUSDT|k", {'action': "BUY"})
+    assert not path.exists()
+
+    cache.flush()
+
+    assert [entry[0] for entry in json.loads(path.read_text())] == ["BTCUSDT|k", "ETHUSDT|k"]
+    assert LLMResponseCache(str(path)).get("ETHUSDT|k") == {'action': "BUY"}
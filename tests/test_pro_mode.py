@@ -0,0 +1,15 @@
+import sys
+import main
+from benchmark import fake_binance
+
+
+def test_failed_pro_import_only_affects_that_bot(klines, monkeypatch):
+    with monkeypatch.context() as patch:
+        # Import des modules PRO en échec (find_spec les a pourtant trouvés)
+        patch.setitem(sys.modules, "strategy_optimizer", None)
+        standard = main.TradingBot(binance_client=fake_binance(klines))
+    pro = main.TradingBot(binance_client=fake_binance(klines))
+
+    assert main.PRO_MODE
+    assert not standard.pro_mode and not hasattr(standard, 'market_analyzer')
+    assert pro.pro_mode and hasattr(pro, 'market_analyzer')
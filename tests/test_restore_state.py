@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from benchmark import _fake_bot
+from order_index import OrderIndex
+from state_store import StateStore
+
+
+def _restored_bot(klines, tmp_path):
+    """Bot redémarré avec une position BTCUSDT enregistrée et son stop vivant sur l'exchange"""
+    bot = _fake_bot(klines)
+    bot.state_store = StateStore(str(tmp_path / "state.db"))
+    exchange = bot.binance.client
+    price = exchange.prices["BTCUSDT"]
+    stop = exchange.create_order("BTCUSDT", "SELL", "STOP_LOSS_LIMIT", "0.01", stopPrice=price * 0.97)
+    bot.state_store.save_position("BTCUSDT", {
+        'symbol': "BTCUSDT", 'entry': price, 'quantity': 0.01, 'original_quantity': 0.01,
+        'stop_loss': price * 0.97, 'take_profit': price * 1.06, 'pyramid_count': 0,
+        'stop_order_id': stop['orderId']
+    })
+    bot.binance.get_balances = lambda: {"BTC": 0.01, "USDT": 10000.0}
+    return bot, stop
+
+
+def test_failed_syncs_after_restore_keep_position(klines, tmp_path):
+    bot, stop = _restored_bot(klines, tmp_path)
+    bot.binance.get_open_orders = lambda symbol=None: None
+    bot.binance.get_order = lambda symbol, order_id: None
+
+    bot.restore_state()
+    bot.run_cycle()
+    bot.run_cycle()
+
+    assert "BTCUSDT" in bot.active_positions
+    assert "BTCUSDT" in bot.state_store.load_positions()
+    assert [o['orderId'] for o in bot.binance.client.orders.values()] == [stop['orderId']]
+
+
+def test_connected_stream_without_resync_keeps_restored_position(klines, tmp_path):
+    bot, _ = _restored_bot(klines, tmp_path)
+    bot.binance.get_open_orders = lambda symbol=None: None
+    bot.binance.get_order = lambda symbol, order_id: None
+    bot.restore_state()
+    # User stream connecté mais sa réconciliation a échoué: l'index reste vide
+    bot.user_stream = SimpleNamespace(connected=True)
+
+    bot.run_cycle()
+
+    assert "BTCUSDT" in bot.active_positions
+    assert "BTCUSDT" in bot.state_store.load_positions()
+
+
+def test_unavailable_price_does_not_close(klines, tmp_path):
+    bot, _ = _restored_bot(klines, tmp_path)
+    bot.restore_state()
+    bot.binance.get_current_price = lambda symbol: 0.0
+    bot.order_index = OrderIndex()
+
+    assert bot.check_stop_loss_hit("BTCUSDT") is False
+    assert "BTCUSDT" in bot.active_positions
+
+
+def test_restored_stop_filled_is_closed_at_fill_price(klines, tmp_path):
+    bot, stop = _restored_bot(klines, tmp_path)
+    real_open_orders = bot.binance.get_open_orders
+    bot.binance.get_open_orders = lambda symbol=None: None
+    bot.restore_state()
+
+    fill_price = stop['stopPrice']
+    stop.update(status='FILLED', executedQty="0.01", cummulativeQuoteQty=str(0.01 * float(fill_price)))
+    bot.binance.get_open_orders = real_open_orders
+    bot.run_cycle()
+
+    assert "BTCUSDT" not in bot.active_positions
+    assert bot.state_store.load_positions() == {}
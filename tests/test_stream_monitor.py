@@ -0,0 +1,128 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from websockets.asyncio.server import serve
+from benchmark import _fake_bot
+from stream_monitor import StreamMonitor
+
+
+def _monitor(stream_type):
+    return StreamMonitor(lambda symbol, price: None, lambda: [], stream_type=stream_type)
+
+
+def test_trade_payload_uses_trade_price():
+    monitor = _monitor("trade")
+    monitor._on_message(json.dumps({'e': "trade", 's': "BTCUSDT", 'p': "100.5", 'b': 12345}))
+    assert monitor._latest == {"BTCUSDT": 100.5}
+
+
+def test_book_ticker_payload_uses_best_bid():
+    monitor = _monitor("bookTicker")
+    monitor._on_message(json.dumps({'stream': "btcusdt@bookTicker", 'data': {'u': 1, 's': "BTCUSDT", 'b': "99.5", 'a': "99.6"}}))
+    assert monitor._latest == {"BTCUSDT": 99.5}
+
+
+class LocalBookTickerServer:
+    """Serveur WebSocket local: diffuse une série de meilleurs bids bookTicker puis garde la connexion"""
+
+    def __init__(self, symbol: str, bids: list, interval: float = 0.05):
+        self.symbol = symbol
+        self.bids = bids
+        self.interval = interval
+        self.paths = []
+        self.url = None
+        self._ready = threading.Event()
+        self._loop = None
+        self._stopped = None
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+
+    async def _handler(self, connection):
+        self.paths.append(connection.request.path)
+        for update_id, bid in enumerate(self.bids, 1):
+            data = {'u': update_id, 's': self.symbol, 'b': f"{bid:.8f}", 'B': "1", 'a': f"{bid * 1.0001:.8f}", 'A': "1"}
+            await connection.send(json.dumps({'stream': f"{self.symbol.lower()}@bookTicker", 'data': data}))
+            await asyncio.sleep(self.interval)
+        await connection.wait_closed()
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = self._loop.create_future()
+        async with serve(self._handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            self.url = f"ws://127.0.0.1:{port}"
+            self._ready.set()
+            await self._stopped
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._stopped.set_result, None)
+        self._thread.join(5)
+
+
+def _wait_for(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture
+def bot(klines, config):
+    config.STREAM_DEBOUNCE_SECONDS = 0
+    config.STREAM_MIN_STOP_STEP_PCT = 0
+    config.EXIT_ORDER_MODE = "stop"
+    bot = _fake_bot(klines)
+    price = bot.binance.client.prices["BTCUSDT"]
+    bot.active_positions["BTCUSDT"] = {
+        'symbol': "BTCUSDT", 'entry': price, 'quantity': 0.01, 'original_quantity': 0.01,
+        'stop_loss': price * 0.97, 'take_profit': price * 1.06, 'pyramid_count': 0
+    }
+    bot._place_exit_orders("BTCUSDT", 0.01, price * 0.97)
+    return bot
+
+
+def test_rising_stream_trails_stop_then_takes_profit(bot):
+    exchange = bot.binance.client
+    entry = bot.active_positions["BTCUSDT"]['entry']
+    first_stop = bot.active_positions["BTCUSDT"]['stop_order_id']
+    stops, closes = [], []
+    original_close = bot.close_position
+
+    def on_price(symbol, price):
+        bot.on_stream_price(symbol, price)
+        position = bot.active_positions.get(symbol)
+        if position is not None and (not stops or stops[-1] != position['stop_loss']):
+            stops.append(position['stop_loss'])
+
+    def close_position(symbol, reason, exit_price=None):
+        closes.append((reason, exit_price))
+        return original_close(symbol, reason, exit_price=exit_price)
+
+    bot.close_position = close_position
+    bids = [entry * (1 + pct / 100) for pct in (1, 2.5, 3.5, 4.5, 5.5, 6.5)]
+
+    with LocalBookTickerServer("BTCUSDT", bids) as server:
+        monitor = StreamMonitor(on_price, lambda: list(bot.active_positions), ws_url=server.url, stream_type="bookTicker")
+        monitor.start()
+        try:
+            assert _wait_for(lambda: "BTCUSDT" not in bot.active_positions)
+        finally:
+            monitor.stop()
+
+    assert server.paths == ["/stream?streams=btcusdt@bookTicker"]
+    # Trailing: stop remonté (cancelReplace) au moins deux fois, toujours croissant
+    assert len(stops) >= 3 and stops == sorted(stops)
+    replaced = [o for o in exchange.orders.values() if o['type'] == "STOP_LOSS_LIMIT"]
+    assert replaced[0]['orderId'] == first_stop and len(replaced) >= 3
+    assert all(o['status'] == "CANCELED" for o in replaced)
+    # Take profit logiciel (pas d'OCO): une seule vente market au-dessus du TP
+    assert closes == [("TAKE_PROFIT", pytest.approx(bids[-1]))]
+    assert [o['side'] for o in exchange.orders.values() if o['type'] == "MARKET"] == ["SELL"]
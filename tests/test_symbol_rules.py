@@ -0,0 +1,30 @@
+import threading
+from symbol_rules import SymbolRulesBook
+
+EXCHANGE_INFO = {'symbols': [{
+    'symbol': "BTCUSDT", 'status': "TRADING", 'baseAsset': "BTC", 'quoteAsset': "USDT",
+    'filters': [
+        {'filterType': "PRICE_FILTER", 'tickSize': "0.01"},
+        {'filterType': "LOT_SIZE", 'stepSize': "0.00001", 'minQty': "0.00001"},
+        {'filterType': "NOTIONAL", 'minNotional': "5"}
+    ]
+}]}
+
+
+def test_start_warms_rules_without_blocking():
+    release = threading.Event()
+    calls = []
+
+    def fetch_all():
+        calls.append(1)
+        release.wait(5)
+        return EXCHANGE_INFO
+
+    book = SymbolRulesBook(fetch_all, refresh_seconds=3600)
+    book.start()
+    # start() rend la main pendant le chargement; un get() concurrent attend ce chargement
+    assert not book.loaded_at
+    release.set()
+    assert book.get("BTCUSDT").symbol == "BTCUSDT"
+    book.stop()
+    assert len(calls) == 1
@@ -0,0 +1,118 @@
+import re
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tokens à effet de levier (BTCUP, ETHBEAR...) et stablecoins: jamais candidats
+LEVERAGED_SUFFIX = re.compile(r'(UP|DOWN|BULL|BEAR)$')
+STABLE_BASES = {'USDC', 'FDUSD', 'TUSD', 'BUSD', 'USDP', 'DAI', 'EUR', 'AEUR', 'USDE', 'PYUSD'}
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    std = values.std()
+    if std == 0 or not np.isfinite(std):
+        return np.zeros_like(values)
+    return (values - values.mean()) / std
+
+
+class UniverseScanner:
+    """Sélection des symboles du cycle parmi toutes les paires d'un quote asset
+
+    Une seule requête ticker 24h (tous symboles), filtres liquidité / volatilité /
+    momentum en NumPy, puis classement: seuls les top_n candidats passent à
+    l'analyse multi-timeframe et à Mistral.
+    """
+
+    def __init__(self, fetch_tickers, list_symbols, quote_asset: str = "USDT", top_n: int = 10,
+                 min_quote_volume: float = 0.0, min_range_pct: float = 0.0,
+                 max_range_pct: float = float('inf'), min_change_pct: float = -100.0):
+        # fetch_tickers() -> tickers 24h bruts; list_symbols(quote_asset) -> symboles tradables
+        self.fetch_tickers = fetch_tickers
+        self.list_symbols = list_symbols
+        self.quote_asset = quote_asset
+        self.top_n = top_n
+        self.min_quote_volume = min_quote_volume
+        self.min_range_pct = min_range_pct
+        self.max_range_pct = max_range_pct
+        self.min_change_pct = min_change_pct
+        self.last_scan = []
+        self.last_scan_at = None
+
+    def _eligible(self) -> set:
+        suffix = len(self.quote_asset)
+        bases = {symbol[:-suffix]: symbol for symbol in self.list_symbols(self.quote_asset)}
+
+        def leveraged(base: str) -> bool:
+            # Levier seulement si le préfixe est lui-même coté (BTCUP → BTC), pas JUP ni SYRUP
+            match = LEVERAGED_SUFFIX.search(base)
+            return match is not None and base[:match.start()] in bases
+
+        return {
+            symbol for base, symbol in bases.items()
+            if base not in STABLE_BASES and not leveraged(base)
+        }
+
+    def rank(self, tickers: list) -> list:
+        """Candidats classés [(symbol, score, stats)] après filtres, meilleur en premier"""
+        eligible = self._eligible()
+        tickers = [t for t in tickers if t['symbol'] in eligible]
+        if not tickers:
+            return []
+
+        symbols = np.array([t['symbol'] for t in tickers])
+        columns = np.array(
+            [(t['quoteVolume'], t['priceChangePercent'], t['highPrice'], t['lowPrice'], t['lastPrice'])
+             for t in tickers],
+            dtype=np.float64
+        )
+        quote_volume, change_pct, high, low, last = columns.T
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            range_pct = (high - low) / low * 100
+            # Position du dernier prix dans le range 24h (1 = au plus haut)
+            range_position = np.where(high > low, (last - low) / (high - low), 0.5)
+
+        mask = (
+            (quote_volume >= self.min_quote_volume)
+            & (range_pct >= self.min_range_pct)
+            & (range_pct <= self.max_range_pct)
+            & (change_pct >= self.min_change_pct)
+            & (last > 0)
+        )
+        if not mask.any():
+            return []
+
+        symbols, quote_volume, change_pct = symbols[mask], quote_volume[mask], change_pct[mask]
+        range_pct, range_position = range_pct[mask], range_position[mask]
+
+        # Liquidité (log), momentum et force dans le range pèsent autant
+        score = (_zscore(np.log10(quote_volume + 1)) + _zscore(change_pct) + _zscore(range_position)) / 3
+        order = np.argsort(-score, kind='stable')
+
+        return [
+            (str(symbols[i]), float(score[i]), {
+                'quote_volume': float(quote_volume[i]),
+                'change_pct': float(change_pct[i]),
+                'range_pct': float(range_pct[i])
+            })
+            for i in order
+        ]
+
+    def scan(self) -> list:
+        """Top N symboles du moment (dernier résultat si la requête ticker échoue)"""
+        started = time.perf_counter()
+        tickers = self.fetch_tickers()
+        if not tickers:
+            logger.warning("🔭 Univers: tickers 24h indisponibles, sélection précédente conservée")
+            return list(self.last_scan)
+
+        ranked = self.rank(tickers)
+        self.last_scan = [symbol for symbol, _, _ in ranked[:self.top_n]]
+        self.last_scan_at = time.time()
+        logger.info(
+            f"🔭 Univers: {len(tickers)} tickers, {len(ranked)} candidats, top {len(self.last_scan)} "
+            f"en {(time.perf_counter() - started) * 1000:.0f} ms: {', '.join(self.last_scan)}"
+        )
+        return list(self.last_scan)